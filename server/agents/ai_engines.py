@@ -1,52 +1,158 @@
 import os
-from dotenv import load_dotenv
-load_dotenv()
-from langchain_groq import ChatGroq
-from langchain_openai import ChatOpenAI
-from pydantic import BaseModel, Field
+from threading import Lock
+from utils.config import load_config
+load_config()
+# Provider SDKs (langchain_groq, langchain_openai, httpx) are imported on first
+# use, so workers that never call an LLM don't pay for loading them.
 # from langchain_google_genai import ChatGoogleGenerativeAI
 
+# Engine backend: "live" calls the provider, "fake" uses FakeChatModel,
+# "record" calls the provider and saves responses, "replay" serves saved ones.
+LLM_BACKEND = os.environ.get("LLM_BACKEND", "live")
+
 
 class AiEngines:
 
     """
     AI engines for langchain function calling facility.
     This class provides methods to initialize various AI models.
+
+    Clients are memoized per (provider, model, temperature) and share
+    connection-pooled HTTP clients, so repeated calls return the same
+    thread-safe instance instead of opening new sessions.
     """
 
+    _clients = {}
+    _lock = Lock()
+    _http_client = None
+    _http_async_client = None
+
+    @classmethod
+    def _http_limits(cls) -> "httpx.Limits":
+        import httpx
+        return httpx.Limits(
+            max_connections=int(os.environ.get("LLM_HTTP_MAX_CONNECTIONS", 100)),
+            max_keepalive_connections=int(os.environ.get("LLM_HTTP_MAX_KEEPALIVE", 20)),
+            keepalive_expiry=float(os.environ.get("LLM_HTTP_KEEPALIVE_EXPIRY", 30)),
+        )
+
+    @classmethod
+    def http_client(cls) -> "httpx.Client":
+        """Returns the shared, connection-pooled synchronous HTTP client."""
+        import httpx
+        with cls._lock:
+            if cls._http_client is None:
+                cls._http_client = httpx.Client(limits=cls._http_limits())
+            return cls._http_client
+
+    @classmethod
+    def http_async_client(cls) -> "httpx.AsyncClient":
+        """Returns the shared, connection-pooled asynchronous HTTP client."""
+        import httpx
+        with cls._lock:
+            if cls._http_async_client is None:
+                cls._http_async_client = httpx.AsyncClient(limits=cls._http_limits())
+            return cls._http_async_client
+
+    @classmethod
+    def _memoized(cls, key: tuple, factory):
+        client = cls._clients.get(key)
+        if client is None:
+            with cls._lock:
+                client = cls._clients.get(key)
+            if client is None:
+                client = factory()
+                with cls._lock:
+                    client = cls._clients.setdefault(key, client)
+        return client
+
+    @classmethod
+    def _with_backend(cls, model: str, live_factory):
+        """Wraps or replaces a live client according to LLM_BACKEND."""
+        if LLM_BACKEND != "live":
+            from agents.offline_models import FakeChatModel, RecordReplayChatModel
+        if LLM_BACKEND == "fake":
+            return FakeChatModel(model_name=model)
+        if LLM_BACKEND == "replay":
+            return RecordReplayChatModel(model_name=model, mode="replay")
+        if LLM_BACKEND == "record":
+            return RecordReplayChatModel(model_name=model, mode="record", inner=live_factory())
+        return live_factory()
+
+    @classmethod
+    def reset(cls):
+        """Drops memoized clients and closes the shared HTTP clients."""
+        with cls._lock:
+            cls._clients.clear()
+            http_client, cls._http_client = cls._http_client, None
+            http_async_client, cls._http_async_client = cls._http_async_client, None
+        if http_client is not None:
+            http_client.close()
+        if http_async_client is not None:
+            cls._close_async(http_async_client)
+
+    @staticmethod
+    def _close_async(client: "httpx.AsyncClient"):
+        # The async client's pool lives on the shared loop, so close it there
+        import asyncio
+        from utils.event_loop import get_event_loop, run_sync
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is get_event_loop():
+            running.create_task(client.aclose())
+        else:
+            run_sync(client.aclose(), timeout=10)
+
     @classmethod
-    def openai_api(cls) -> ChatOpenAI:
+    def openai_api(cls, model: str = "gpt-3.5-turbo-0125", temperature: float = 0) -> "ChatOpenAI":
         """
         Initializes the OpenAI API client.
+        Args:
+            model (str): The model to use for the API.
+            temperature (float): Sampling temperature.
         Returns:
             ChatOpenAI: An instance of the ChatOpenAI model.
         """
         try:
-            os.environ["OPENAI_API_KEY"] = os.environ.get("OPENAI_API_KEY")
-            llm = ChatOpenAI(model="gpt-3.5-turbo-0125", temperature=0)
-            return llm
+            from langchain_openai import ChatOpenAI
+            return cls._memoized(
+                ("openai", model, temperature),
+                lambda: cls._with_backend(model, lambda: ChatOpenAI(
+                    model=model,
+                    temperature=temperature,
+                    api_key=os.environ.get("OPENAI_API_KEY"),
+                    http_client=cls.http_client(),
+                    http_async_client=cls.http_async_client(),
+                )),
+            )
         except Exception as e:
             print(f"Error initializing OpenAI API: {e}")
             raise
 
     @classmethod
-    def groq_api(cls, model: str = "mixtral-8x7b-32768"):
+    def groq_api(cls, model: str = "mixtral-8x7b-32768", temperature: float = 0):
         """
         Initializes the GROQ API client.
         Args:
             model (str): The model to use for the API.
+            temperature (float): Sampling temperature.
         Returns:
             ChatGroq: An instance of the ChatGroq model.
         """
         try:
-            
-            llm = ChatGroq(
-                temperature=0,
-                groq_api_key=os.environ.get("GROQ_API_KEY"),
-                model_name=model,
+            from langchain_groq import ChatGroq
+            return cls._memoized(
+                ("groq", model, temperature),
+                lambda: cls._with_backend(model, lambda: ChatGroq(
+                    temperature=temperature,
+                    groq_api_key=os.environ.get("GROQ_API_KEY"),
+                    model_name=model,
+                    http_client=cls.http_client(),
+                    http_async_client=cls.http_async_client(),
+                )),
             )
-            # llm = llm.bind_tools(tools)
-            return llm
         except Exception as e:
             print(f"Error initializing GROQ API: {e}")
             raise
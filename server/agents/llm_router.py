@@ -0,0 +1,405 @@
+import asyncio
+import os
+import time
+from collections import deque
+from threading import Lock
+from typing import Any, Dict, List, Optional
+from agents.ai_engines import AiEngines
+from utils.event_loop import get_event_loop, run_sync
+from utils.logger import get_logger
+from utils.metrics import record_llm_usage, register_collector
+from utils.rate_limit import get_rate_limiter
+
+logger = get_logger(__name__)
+
+# Engines per route as "provider:model", in order of preference. Scoring
+# prompts are short and low-stakes, so they go to the cheapest, fastest model
+# first; the insights report prefers the stronger model.
+DEFAULT_ROUTES = {
+    "score": "groq:llama-3.1-8b-instant,groq:mixtral-8x7b-32768,openai:gpt-3.5-turbo-0125",
+    "insights": "groq:mixtral-8x7b-32768,openai:gpt-3.5-turbo-0125",
+}
+# Overall budget per routed call, including failover and hedges
+LLM_TIMEOUT_SECONDS = float(os.environ.get("LLM_TIMEOUT_SECONDS", 30))
+# Fire a backup engine once the current one exceeds its p95 latency
+LLM_HEDGING = os.environ.get("LLM_HEDGING", "true").lower() == "true"
+LLM_MAX_HEDGES = int(os.environ.get("LLM_MAX_HEDGES", 1))
+# Hedge delay until an engine has enough samples for a p95
+LLM_HEDGE_DELAY_SECONDS = float(os.environ.get("LLM_HEDGE_DELAY_SECONDS", 5))
+LLM_HEDGE_MIN_SAMPLES = int(os.environ.get("LLM_HEDGE_MIN_SAMPLES", 20))
+LLM_BREAKER_FAILURES = int(os.environ.get("LLM_BREAKER_FAILURES", 5))
+LLM_BREAKER_COOLDOWN_SECONDS = float(os.environ.get("LLM_BREAKER_COOLDOWN_SECONDS", 30))
+LATENCY_WINDOW = int(os.environ.get("LLM_LATENCY_WINDOW", 200))
+
+
+class NoEngineAvailable(RuntimeError):
+    """Every engine for a route failed, timed out or has an open circuit."""
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    After `failure_threshold` failures in a row the circuit opens and calls
+    are refused for `cooldown` seconds. Then one trial call is let through
+    (half-open): success closes the circuit, failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int = LLM_BREAKER_FAILURES,
+                 cooldown: float = LLM_BREAKER_COOLDOWN_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial = False
+        self._lock = Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half_open" if time.monotonic() - self.opened_at >= self.cooldown else "open"
+
+    def allow(self) -> bool:
+        """Whether a call may go to this engine now."""
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._trial:
+                self._trial = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def release(self):
+        """Give back a half-open trial that was cancelled before finishing."""
+        with self._lock:
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial or self.failures >= self.failure_threshold:
+                if self.opened_at is None or self._trial:
+                    logger.warning(f"Circuit opened after {self.failures} consecutive failures.")
+                self.opened_at = time.monotonic()
+            self._trial = False
+
+
+class Engine:
+    """One provider/model pair with its own breaker and latency stats."""
+
+    def __init__(self, spec: str):
+        self.name = spec
+        self.provider, _, self.model = spec.partition(":")
+        if self.provider not in ("groq", "openai") or not self.model:
+            raise ValueError(f"Invalid engine '{spec}'; expected 'groq:<model>' or 'openai:<model>'")
+        self.breaker = CircuitBreaker()
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.counts = {"ok": 0, "error": 0, "timeout": 0, "cancelled": 0, "hedged": 0}
+        self._lock = Lock()
+
+    def client(self):
+        if self.provider == "openai":
+            return AiEngines.openai_api(model=self.model)
+        return AiEngines.groq_api(model=self.model)
+
+    def count(self, outcome: str, latency: float = None):
+        with self._lock:
+            self.counts[outcome] += 1
+            if latency is not None:
+                self.latencies.append(latency)
+
+    def percentile(self, q: float) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self.latencies)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+    def hedge_delay(self) -> float:
+        """Seconds to wait on this engine before firing a backup."""
+        with self._lock:
+            enough = len(self.latencies) >= LLM_HEDGE_MIN_SAMPLES
+        return self.percentile(0.95) if enough else LLM_HEDGE_DELAY_SECONDS
+
+    def stats(self) -> Dict[str, Any]:
+        p50, p95 = self.percentile(0.5), self.percentile(0.95)
+        with self._lock:
+            counts = dict(self.counts)
+        finished = counts["ok"] + counts["error"] + counts["timeout"]
+        return {
+            **counts,
+            "error_rate": round((counts["error"] + counts["timeout"]) / finished, 4) if finished else 0.0,
+            "p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+            "circuit": self.breaker.state,
+        }
+
+
+class LlmRouter:
+    """
+    Routes chat calls across engines with a deadline, hedging, circuit
+    breakers and failover.
+
+    Calls run on the shared event loop. The first engine whose circuit
+    allows it is tried; if it has not answered by its p95 latency, the
+    next engine is fired as a hedge and the first success wins. Errors fail
+    over to the next engine until the deadline.
+
+    Rate limits are reserved before an engine is started. An engine whose
+    provider is throttled is skipped, so hedges and failovers never wait;
+    only when every engine is throttled does the call wait for the first
+    one, and that wait does not count against the deadline.
+    """
+
+    def __init__(self, routes: Dict[str, str] = None):
+        self._engines: Dict[str, Engine] = {}
+        self._routes: Dict[str, List[Engine]] = {}
+        self._lock = Lock()
+        for route, default in {**DEFAULT_ROUTES, **(routes or {})}.items():
+            self.configure(route, os.environ.get(f"LLM_ROUTE_{route.upper()}", default))
+
+    def configure(self, route: str, specs: str):
+        """Set the engines for a route from a comma-separated spec list."""
+        engines = []
+        with self._lock:
+            for spec in [item.strip() for item in specs.split(",") if item.strip()]:
+                engines.append(self._engines.setdefault(spec, Engine(spec)))
+            self._routes[route] = engines
+
+    def engines(self, route: str) -> List[Engine]:
+        if route not in self._routes:
+            raise KeyError(f"Unknown LLM route '{route}'")
+        return self._routes[route]
+
+    async def _call(self, engine: Engine, messages, bind: Dict[str, Any]):
+        start = time.perf_counter()
+        try:
+            llm = engine.client()
+            if bind:
+                llm = llm.bind(**bind)
+            message = await llm.ainvoke(messages)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            engine.count("error")
+            engine.breaker.record_failure()
+            record_llm_usage(None, engine.model, outcome="error")
+            logger.warning(f"LLM engine {engine.name} failed: {e}")
+            raise
+        engine.count("ok", time.perf_counter() - start)
+        engine.breaker.record_success()
+        record_llm_usage(message, engine.model)
+        message.response_metadata["engine"] = engine.name
+        return message
+
+    async def ainvoke(self, route: str, messages, tokens: int = 0, timeout: float = None, **bind):
+        """
+        Send `messages` through a route and return the first successful AIMessage.
+
+        Args:
+            route: Route name, e.g. "score" or "insights".
+            messages: Chat messages for the model.
+            tokens: Estimated tokens, charged to the engine's rate limiter.
+            timeout: Deadline in seconds (defaults to LLM_TIMEOUT_SECONDS).
+            **bind: Extra model arguments, e.g. response_format.
+
+        Raises:
+            NoEngineAvailable: If no engine answered before the deadline.
+        """
+        loop = asyncio.get_running_loop()
+        timeout = timeout or LLM_TIMEOUT_SECONDS
+        queue = list(self.engines(route))
+        pending: Dict[asyncio.Task, Engine] = {}
+        throttled: List[Engine] = []
+        errors = []
+        hedges = 0
+
+        def start(engine: Engine) -> Engine:
+            pending[loop.create_task(self._call(engine, messages, bind))] = engine
+            return engine
+
+        def launch() -> Optional[Engine]:
+            # Skip engines whose circuit is open; a half-open one gets its trial call.
+            # Skip throttled engines too rather than waiting on their limiter.
+            while queue:
+                engine = queue.pop(0)
+                if not engine.breaker.allow():
+                    errors.append(f"{engine.name}: circuit open")
+                elif get_rate_limiter(engine.provider).try_acquire(tokens) > 0:
+                    engine.breaker.release()
+                    throttled.append(engine)
+                    errors.append(f"{engine.name}: rate limited")
+                else:
+                    return start(engine)
+            return None
+
+        current = launch()
+        if current is None and throttled:
+            # Every available engine is throttled: wait for the preferred one
+            # before the deadline and hedge clocks start
+            engine = throttled[0]
+            try:
+                await asyncio.wait_for(get_rate_limiter(engine.provider).acquire_async(tokens), timeout)
+            except asyncio.TimeoutError:
+                raise NoEngineAvailable(f"Rate limit for '{route}' did not clear within {timeout:.0f}s")
+            if engine.breaker.allow():
+                current = start(engine)
+        if current is None:
+            raise NoEngineAvailable(f"No engine available for '{route}': {'; '.join(errors)}")
+        deadline = loop.time() + timeout
+        try:
+            while pending:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                wait = remaining
+                can_hedge = LLM_HEDGING and queue and hedges < LLM_MAX_HEDGES
+                if can_hedge:
+                    wait = min(wait, current.hedge_delay())
+                done, _ = await asyncio.wait(pending, timeout=wait, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    if can_hedge:
+                        slow, hedge = current, launch()
+                        if hedge is not None:
+                            slow.count("hedged")
+                            hedges += 1
+                            current = hedge
+                            logger.info(f"Hedging '{route}' call on {slow.name} with {hedge.name}")
+                    continue
+
+                for task in done:
+                    engine = pending.pop(task)
+                    if task.exception() is None:
+                        return task.result()
+                    errors.append(f"{engine.name}: {task.exception()}")
+                if not pending:
+                    # Fail over to the next engine
+                    current = launch() or current
+        finally:
+            for task, engine in pending.items():
+                task.cancel()
+                # Still running at the deadline counts against the engine;
+                # a losing hedge does not
+                if loop.time() >= deadline:
+                    engine.count("timeout")
+                    engine.breaker.record_failure()
+                    record_llm_usage(None, engine.model, outcome="timeout")
+                else:
+                    engine.count("cancelled")
+                    engine.breaker.release()
+
+        if loop.time() >= deadline:
+            errors.append(f"deadline of {timeout:.0f}s exceeded")
+        raise NoEngineAvailable(f"No engine answered the '{route}' call: {'; '.join(errors)}")
+
+    def invoke(self, route: str, messages, tokens: int = 0, timeout: float = None, **bind):
+        """Blocking variant of `ainvoke` for worker threads."""
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is not None and running is get_event_loop():
+            # Blocking here would deadlock the loop the call runs on
+            raise RuntimeError("Use ainvoke on the shared event loop")
+        return run_sync(self.ainvoke(route, messages, tokens, timeout, **bind))
+
+    def stats(self) -> Dict[str, Any]:
+        """Latency, outcome counts and circuit state per engine, plus the routes."""
+        with self._lock:
+            engines = dict(self._engines)
+            routes = {route: [engine.name for engine in items] for route, items in self._routes.items()}
+        return {
+            "routes": routes,
+            "engines": {name: engine.stats() for name, engine in engines.items()},
+        }
+
+
+class RoutedLLM:
+    """
+    Chat-model-like handle for one route, so code written against a single
+    LLM (`invoke`, `ainvoke`, `bind`) gets routing transparently.
+    """
+
+    # Usage metrics are recorded per engine by the router
+    records_usage = True
+
+    def __init__(self, router: LlmRouter, route: str, bind: Dict[str, Any] = None):
+        self.router = router
+        self.route = route
+        self._bind = bind or {}
+
+    @property
+    def model_name(self) -> str:
+        """
+        The route and its current engines, e.g.
+        `route:score=groq:llama-3.1-8b-instant,groq:mixtral-8x7b-32768,openai:gpt-3.5-turbo-0125`. Used in
+        insight cache keys, so changing LLM_ROUTE_* changes the keys.
+        """
+        engines = ",".join(engine.name for engine in self.router.engines(self.route))
+        return f"route:{self.route}={engines}"
+
+    def bind(self, **kwargs) -> "RoutedLLM":
+        return RoutedLLM(self.router, self.route, {**self._bind, **kwargs})
+
+    def invoke(self, messages, tokens: int = 0, timeout: float = None):
+        return self.router.invoke(self.route, messages, tokens, timeout, **self._bind)
+
+    async def ainvoke(self, messages, tokens: int = 0, timeout: float = None):
+        return await self.router.ainvoke(self.route, messages, tokens, timeout, **self._bind)
+
+
+_router: Optional[LlmRouter] = None
+_router_lock = Lock()
+
+
+def get_router() -> LlmRouter:
+    """Return the process-wide router, creating it on first use."""
+    global _router
+    if _router is None:
+        with _router_lock:
+            if _router is None:
+                _router = LlmRouter()
+    return _router
+
+
+def routed_llm(route: str) -> RoutedLLM:
+    """Chat-model-like handle that sends calls through `route`."""
+    return RoutedLLM(get_router(), route)
+
+
+def _engine_metrics():
+    if _router is None:
+        return []
+    lines = [
+        "# HELP bidwise_llm_engine_latency_seconds LLM engine latency quantiles over recent calls.",
+        "# TYPE bidwise_llm_engine_latency_seconds gauge",
+    ]
+    circuits = [
+        "# HELP bidwise_llm_engine_circuit_open Whether an engine's circuit breaker is open (1) or half-open (0.5).",
+        "# TYPE bidwise_llm_engine_circuit_open gauge",
+    ]
+    calls = [
+        "# HELP bidwise_llm_engine_calls_total Routed LLM calls per engine, by outcome.",
+        "# TYPE bidwise_llm_engine_calls_total counter",
+    ]
+    for name, stats in _router.stats()["engines"].items():
+        for quantile, key in (("0.5", "p50_ms"), ("0.95", "p95_ms")):
+            if stats[key] is not None:
+                lines.append(f'bidwise_llm_engine_latency_seconds{{engine="{name}",quantile="{quantile}"}} {stats[key] / 1000}')
+        circuits.append(f'bidwise_llm_engine_circuit_open{{engine="{name}"}} '
+                        f'{ {"closed": 0, "half_open": 0.5, "open": 1}[stats["circuit"]] }')
+        for outcome in ("ok", "error", "timeout", "cancelled", "hedged"):
+            calls.append(f'bidwise_llm_engine_calls_total{{engine="{name}",outcome="{outcome}"}} {stats[outcome]}')
+    return lines + circuits + calls
+
+
+register_collector(_engine_metrics)
@@ -0,0 +1,142 @@
+import asyncio
+import hashlib
+import json
+import os
+import random
+import time
+from typing import Any, List, Optional
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from pydantic import Field
+
+# Offline chat models selected by LLM_BACKEND. Kept out of agents.ai_engines
+# so langchain is only imported once an engine is actually built.
+LLM_CASSETTE_DIR = os.environ.get("LLM_CASSETTE_DIR", "llm_cassettes")
+
+
+def _prompt_digest(messages: List[BaseMessage], model: str) -> str:
+    payload = json.dumps(
+        {"model": model, "messages": [[message.type, message.content] for message in messages]},
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Deterministic offline stand-in for the bid analysis LLMs.
+
+    The response depends only on the prompt, so repeated runs produce the
+    same scores. Latency, jitter and error rate are configurable to
+    simulate a real provider under load.
+    """
+
+    model_name: str = "fake-bid-analyst"
+    latency: float = Field(default_factory=lambda: float(os.environ.get("FAKE_LLM_LATENCY", 0.5)))
+    jitter: float = Field(default_factory=lambda: float(os.environ.get("FAKE_LLM_JITTER", 0.1)))
+    error_rate: float = Field(default_factory=lambda: float(os.environ.get("FAKE_LLM_ERROR_RATE", 0.0)))
+    seed: Optional[int] = None
+    _random: Any = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-bid-analyst"
+
+    def _rng(self) -> random.Random:
+        if self._random is None:
+            self._random = random.Random(self.seed)
+        return self._random
+
+    def _plan(self, messages: List[BaseMessage]):
+        """Pick delay and failure, then build the deterministic response."""
+        rng = self._rng()
+        delay = max(0.0, self.latency + rng.uniform(-self.jitter, self.jitter))
+        failed = rng.random() < self.error_rate
+
+        digest = _prompt_digest(messages, self.model_name)
+        score = 40 + int(digest[:8], 16) % 60
+        content = json.dumps({
+            "aiScore": score,
+            "analysis": f"Synthetic analysis {digest[:12]}",
+            "technical_evaluation": {"score": score, "summary": "Simulated technical assessment"},
+            "financial_analysis": {"cost_effectiveness": "high" if score >= 70 else "moderate"},
+            "risk_evaluation": {"level": "low" if score >= 70 else "medium"},
+            "recommendations": ["Simulated recommendation"],
+        })
+        prompt_tokens = sum(len(str(message.content)) for message in messages) // 4
+        message = AIMessage(
+            content=content,
+            usage_metadata={
+                "input_tokens": prompt_tokens,
+                "output_tokens": len(content) // 4,
+                "total_tokens": prompt_tokens + len(content) // 4,
+            },
+        )
+        return delay, failed, ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        delay, failed, result = self._plan(messages)
+        time.sleep(delay)
+        if failed:
+            raise RuntimeError("Simulated LLM failure")
+        return result
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        delay, failed, result = self._plan(messages)
+        await asyncio.sleep(delay)
+        if failed:
+            raise RuntimeError("Simulated LLM failure")
+        return result
+
+
+class RecordReplayChatModel(BaseChatModel):
+    """
+    Records real responses to disk, or serves previously recorded ones.
+
+    Responses are stored as one JSON file per prompt in `cassette_dir`,
+    keyed by a hash of the model name and messages.
+    """
+
+    model_name: str
+    mode: str = "replay"
+    cassette_dir: str = LLM_CASSETTE_DIR
+    inner: Optional[Any] = None
+
+    @property
+    def _llm_type(self) -> str:
+        return f"{self.mode}-{self.model_name}"
+
+    def _path(self, messages: List[BaseMessage]) -> str:
+        return os.path.join(self.cassette_dir, f"{_prompt_digest(messages, self.model_name)}.json")
+
+    def _load(self, path: str) -> ChatResult:
+        try:
+            with open(path, "r") as f:
+                saved = json.load(f)
+        except FileNotFoundError:
+            raise LookupError(f"No recorded LLM response at {path}")
+        message = AIMessage(content=saved["content"], usage_metadata=saved.get("usage_metadata"))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _save(self, path: str, message: AIMessage):
+        os.makedirs(self.cassette_dir, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump({"content": message.content, "usage_metadata": message.usage_metadata}, f)
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        path = self._path(messages)
+        if self.mode == "replay":
+            return self._load(path)
+        message = self.inner.invoke(messages, stop=stop, **kwargs)
+        self._save(path, message)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        path = self._path(messages)
+        if self.mode == "replay":
+            return self._load(path)
+        message = await self.inner.ainvoke(messages, stop=stop, **kwargs)
+        self._save(path, message)
+        return ChatResult(generations=[ChatGeneration(message=message)])
@@ -1,9 +1,17 @@
-from flask import Flask
+from utils.config import load_config
+load_config()
+from flask import Flask, jsonify
 from routes import register_blueprints
+from services.mongodb import bootstrap_indexes, check_health
+from utils.response_cache import start_change_stream_invalidation
+from utils import metrics
+from utils.logger import init_request_logging
+from utils.serialization import OrjsonProvider
 from flask_cors import CORS
 import os
 
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 
 cors_config = {
         r"*": {
@@ -19,17 +27,29 @@ cors_config = {
         }
     }
 CORS(app, resources=cors_config)
+metrics.init_app(app)
+init_request_logging(app)
 
 @app.route("/")
 def home():
     return "Backend is running"
 
+@app.route("/health")
+def health():
+    mongo_ok = check_health()
+    return jsonify({"mongo": "ok" if mongo_ok else "unavailable"}), 200 if mongo_ok else 503
+
 # Register routes
 register_blueprints(app)
 
+if os.getenv("RESPONSE_CACHE_CHANGE_STREAMS", "false").lower() == "true":
+    start_change_stream_invalidation(["projects", "bids", "traffic_data", "traffic_buckets", "project_progress"])
+
 
-""" Step 4: Start the server """
+""" Step 4: Start the development server (production: gunicorn -c gunicorn.conf.py wsgi:app) """
 if __name__ == '__main__':
     HOST = os.getenv("FLASK_RUN_HOST") or "0.0.0.0"
     PORT = os.getenv("FLASK_RUN_PORT") or 8000
-    app.run(debug=True, host=HOST, port=PORT)
\ No newline at end of file
+    # Gunicorn runs this from its when_ready hook instead (gunicorn.conf.py)
+    bootstrap_indexes()
+    app.run(debug=os.getenv("FLASK_DEBUG", "true").lower() == "true", host=HOST, port=PORT)
\ No newline at end of file
@@ -0,0 +1 @@
+"""Benchmarks for the Flask API and the bid analysis pipeline."""
@@ -0,0 +1,149 @@
+"""
+Near-duplicate index quality and lookup cost at scale.
+
+Indexes synthetic bids, then looks up planted resubmissions and fresh
+bids. Resubmissions either change only ids and date ("identical") or also
+one price by 1-5% ("price"). Exact keys and band keys are kept in in-memory
+tables that mirror the `fields_key` and multikey `bands` indexes, so the
+reported candidate counts are the entries MongoDB would read per lookup.
+No database or server is involved.
+
+The synthetic generator draws from a small set of templates and values, so
+at large sizes most fresh bids have genuine near-twins in the index.
+
+    python -m benchmarks.dedup --bids 100000 --queries 500 --output dedup.json
+"""
+import argparse
+import copy
+import json
+import random
+import sys
+import time
+from collections import defaultdict
+from typing import Any, Dict, List
+
+import numpy as np
+
+from benchmarks.synthetic import generate_bids, generate_projects
+from services.dedup import DEDUP_MATCH_THRESHOLD, DEDUP_MAX_SCAN, BidSimilarityIndex, bid_tokens, fields_key
+from services.prompting import project_bid
+
+
+def resubmission(bid: Dict[str, Any], rng: random.Random, index: int, kind: str) -> Dict[str, Any]:
+    """A revised copy of a bid with new ids and date and, for kind "price", one price changed by 1-5%."""
+    revised = copy.deepcopy(bid)
+    revised["bid_id"] = f"RESUB-{index:06d}"
+    revised["bid_date"] = "2025-06-01"
+    if kind == "price":
+        pricing = revised["pricing_proposal"]["pricing_model"]
+        field = rng.choice(["implementation_cost", "monthly_service_fee"])
+        pricing[field] = round(pricing[field] * (1 + rng.choice([-1, 1]) * rng.uniform(0.01, 0.05)))
+    return revised
+
+
+def lookup(index: BidSimilarityIndex, exact: Dict[str, int], buckets: Dict[str, List[int]],
+           signatures: np.ndarray, bid: Dict[str, Any]) -> Dict[str, Any]:
+    key = fields_key(project_bid(bid))
+    if key in exact:
+        return {"candidates": 1, "match": exact[key], "similarity": 1.0}
+    signature = index.signature(bid_tokens(bid))
+    candidates = set()
+    for key in index.band_keys(signature):
+        candidates.update(buckets.get(key, ()))
+    scanned = sorted(candidates)[:DEDUP_MAX_SCAN]
+    if not scanned:
+        return {"candidates": len(candidates), "match": None, "similarity": 0.0}
+    similarities = (signatures[scanned] == signature[None, :]).mean(axis=1)
+    best = int(np.argmax(similarities))
+    matched = similarities[best] >= DEDUP_MATCH_THRESHOLD
+    return {
+        "candidates": len(candidates),
+        "match": scanned[best] if matched else None,
+        "similarity": float(similarities[best]),
+    }
+
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    array = np.asarray(values, dtype=float)
+    return {
+        "mean": round(float(array.mean()), 1),
+        "p95": round(float(np.percentile(array, 95)), 1),
+        "max": round(float(array.max()), 1),
+    }
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bids", type=int, default=20000, help="bids in the index")
+    parser.add_argument("--queries", type=int, default=500, help="resubmissions and fresh bids looked up, each")
+    parser.add_argument("--output", help="write the results as JSON")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(7)
+    projects = generate_projects(50)
+    bids = generate_bids(args.bids, projects)
+    index = BidSimilarityIndex()
+
+    start = time.perf_counter()
+    signatures = np.stack([index.signature(bid_tokens(bid)) for bid in bids])
+    signing_s = time.perf_counter() - start
+    buckets = defaultdict(list)
+    exact = {}
+    for position, (bid, signature) in enumerate(zip(bids, signatures)):
+        exact.setdefault(fields_key(project_bid(bid)), position)
+        for key in index.band_keys(signature):
+            buckets[key].append(position)
+
+    planted = rng.sample(range(args.bids), min(args.queries, args.bids))
+    start = time.perf_counter()
+    resubmitted = {
+        kind: [
+            (position, lookup(index, exact, buckets, signatures, resubmission(bids[position], rng, n, kind)))
+            for n, position in enumerate(planted)
+        ]
+        for kind in ("identical", "price")
+    }
+    fresh = [lookup(index, exact, buckets, signatures, bid) for bid in generate_bids(args.queries, projects, seed=99)]
+    lookup_ms = (time.perf_counter() - start) * 1000 / (2 * len(planted) + len(fresh))
+
+    results = {
+        "bids": args.bids,
+        "num_perm": index.num_perm,
+        "bands": index.bands,
+        "signatures_per_s": round(args.bids / signing_s),
+        "lookup_ms": round(lookup_ms, 2),
+        "resubmissions": {
+            kind: {
+                "matched": round(sum(result["match"] is not None for _, result in results_) / len(results_), 4),
+                # The original bid, or one with identical scoring fields
+                "source": round(sum(
+                    result["match"] is not None
+                    and (result["match"] == position or fields_key(project_bid(bids[result["match"]]))
+                         == fields_key(project_bid(bids[position])))
+                    for position, result in results_
+                ) / len(results_), 4),
+                "candidates": percentiles([result["candidates"] for _, result in results_]),
+            }
+            for kind, results_ in resubmitted.items()
+        },
+        "fresh": {
+            "matched": round(sum(result["match"] is not None for result in fresh) / len(fresh), 4),
+            "candidates": percentiles([result["candidates"] for result in fresh]),
+        },
+    }
+    print(f"{args.bids} bids, {index.num_perm} permutations in {index.bands} bands: "
+          f"{results['signatures_per_s']} signatures/s, {results['lookup_ms']} ms/lookup (excluding I/O)")
+    for kind, stats in results["resubmissions"].items():
+        print(f"{kind + ' resubmissions:':24} matched {stats['matched']:.1%} (source {stats['source']:.1%}), "
+              f"candidates {stats['candidates']}")
+    print(f"{'fresh bids:':24} matched {results['fresh']['matched']:.1%}, "
+          f"candidates {results['fresh']['candidates']}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
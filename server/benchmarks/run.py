@@ -0,0 +1,318 @@
+"""
+End-to-end benchmark for the Flask API.
+
+By default the app runs in-process against an in-memory database
+(MONGO_BACKEND=mongomock) and the fake LLM (LLM_BACKEND=fake), so no
+external services are needed. Use --url to benchmark a running server.
+
+    python -m benchmarks.run --bids 10000 --concurrency 16 --output results.json
+    python -m benchmarks.run --bids 10000 --compare baseline.json --threshold 0.1
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from benchmarks.synthetic import (
+    generate_bids, generate_progress, generate_projects, generate_traffic, generate_traffic_samples, flat_bid,
+)
+
+
+RSS_SAMPLE_SECONDS = 0.01
+
+
+def current_rss_mb() -> Optional[float]:
+    """Current resident set size of this process in MB, or None if unknown."""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm", "r") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError):
+        return None
+
+
+class RssSampler:
+    """
+    Samples current RSS on a thread while a scenario runs. Unlike the
+    process-lifetime ru_maxrss, the growth it reports belongs to this
+    scenario alone.
+    """
+
+    def __init__(self, interval: float = RSS_SAMPLE_SECONDS):
+        self.interval = interval
+        self.baseline = current_rss_mb()
+        self.peak = self.baseline
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, name="rss-sampler", daemon=True)
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            rss = current_rss_mb()
+            if rss is not None and rss > self.peak:
+                self.peak = rss
+
+    def __enter__(self):
+        if self.baseline is not None:
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    @property
+    def delta_mb(self) -> Optional[float]:
+        """Peak RSS growth over the baseline in MB."""
+        if self.baseline is None:
+            return None
+        return round(self.peak - self.baseline, 1)
+
+
+class InProcessClient:
+    """Drives the Flask app through per-thread test clients."""
+
+    def __init__(self, app):
+        self.app = app
+        self._local = threading.local()
+
+    def request(self, method: str, path: str, body: Optional[bytes] = None,
+                content_type: str = "application/json"):
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        response = client.open(path, method=method, data=body, content_type=content_type)
+        return response.status_code, response.get_data()
+
+
+class HttpClient:
+    """Drives a running server over HTTP."""
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url.rstrip("/")
+
+    def request(self, method: str, path: str, body: Optional[bytes] = None,
+                content_type: str = "application/json"):
+        request = urllib.request.Request(
+            self.base_url + path, data=body, method=method, headers={"Content-Type": content_type},
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=300) as response:
+                return response.status, response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.read()
+
+
+def build_app():
+    """Import the app with offline backends unless already configured."""
+    os.environ.setdefault("MONGO_BACKEND", "mongomock")
+    os.environ.setdefault("LLM_BACKEND", "fake")
+    os.environ.setdefault("FAKE_LLM_LATENCY", "0.2")
+    # The CORS setup in app.py needs an allowed origin
+    os.environ.setdefault("BASE_URL", "http://localhost")
+    from app import app
+    return app
+
+
+def seed(client, args, projects, bids):
+    """Load synthetic data, directly for in-process runs or through the API."""
+    if isinstance(client, InProcessClient):
+        from models import TrafficSample
+        from services.ingestion import ingest_bids
+        from services.mongodb import MongoDbOperations
+        from services.traffic import record_samples
+        MongoDbOperations("projects").store_many(projects)
+        # The bulk ingestion pipeline, keeping the synthetic scores
+        ingest_bids([flat_bid(bid) for bid in bids], chunk_size=1000, trusted_scores=True)
+        MongoDbOperations("traffic_data").store_many(generate_traffic(args.traffic))
+        record_samples([TrafficSample(**sample) for sample in generate_traffic_samples(args.schools, args.traffic)])
+        MongoDbOperations("project_progress").store_many(generate_progress(projects))
+        return
+    for project in projects:
+        client.request("POST", "/projects", json.dumps(project).encode())
+    # The API ignores client scores, so the server scores these bids itself
+    for start in range(0, len(bids), 1000):
+        chunk = [flat_bid(bid) for bid in bids[start:start + 1000]]
+        client.request("POST", "/bids/bulk", json.dumps(chunk).encode())
+
+
+def scenarios(projects, bids, analyze_batch: int) -> List[Dict[str, Any]]:
+    """
+    Endpoints to drive; `light` scenarios call the LLM and run fewer
+    requests, and `aggregation` ones need operators mongomock lacks.
+    """
+    project = projects[0]["name"]
+    bid = flat_bid(bids[0])
+    new_bid = {name: bid[name] for name in ("provider", "cost", "coverage", "project_id")}
+    batch = json.dumps(bids[:analyze_batch]).encode()
+    project_bids = json.dumps([b for b in bids if b["project_id"] == project][:200]).encode()
+    return [
+        {"name": "GET /projects", "method": "GET", "path": "/projects"},
+        {"name": "GET /bids?project_id", "method": "GET", "path": f"/bids?project_id={urllib.request.quote(project)}"},
+        {"name": "GET /bids?limit=100", "method": "GET", "path": "/bids?limit=100"},
+        {"name": "GET /bids (all)", "method": "GET", "path": "/bids", "light": True},
+        {"name": "GET /bids/leaderboard", "method": "GET",
+         "path": f"/bids/leaderboard?project_id={urllib.request.quote(project)}", "aggregation": True},
+        {"name": "GET /traffic-data", "method": "GET", "path": "/traffic-data"},
+        {"name": "GET /traffic-data?range", "method": "GET",
+         "path": "/traffic-data?start=2025-01-15T00:00:00Z&end=2025-01-16T00:00:00Z&points=500"},
+        {"name": "GET /project-progress", "method": "GET", "path": "/project-progress"},
+        {"name": "POST /bids/prescore", "method": "POST", "path": "/bids/prescore", "body": project_bids},
+        {"name": "POST /bids", "method": "POST", "path": "/bids", "body": json.dumps(new_bid).encode(), "light": True},
+        {"name": "POST /analyze", "method": "POST", "path": "/analyze?cache=false", "body": batch, "light": True},
+        {"name": "POST /analyze/stream", "method": "POST", "path": "/analyze/stream?cache=false", "body": batch, "light": True},
+    ]
+
+
+def run_scenario(client, scenario: Dict[str, Any], requests: int, concurrency: int) -> Dict[str, Any]:
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+
+    def one(_):
+        nonlocal errors
+        start = time.perf_counter()
+        try:
+            status, _ = client.request(scenario["method"], scenario["path"], scenario.get("body"))
+            failed = status >= 400
+        except Exception:
+            failed = True
+        elapsed = (time.perf_counter() - start) * 1000
+        with lock:
+            latencies.append(elapsed)
+            errors += failed
+
+    with RssSampler() as rss:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(one, range(requests)))
+        wall = time.perf_counter() - start
+
+    values = np.array(latencies)
+    return {
+        "requests": requests,
+        "errors": errors,
+        "mean_ms": round(float(values.mean()), 2),
+        "p50_ms": round(float(np.percentile(values, 50)), 2),
+        "p95_ms": round(float(np.percentile(values, 95)), 2),
+        "p99_ms": round(float(np.percentile(values, 99)), 2),
+        "throughput_rps": round(requests / wall, 2),
+        "rss_delta_mb": rss.delta_mb,
+    }
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Return regressions in p95 latency or throughput beyond the threshold."""
+    regressions = []
+    for name, current in results["endpoints"].items():
+        base = baseline.get("endpoints", {}).get(name)
+        if not base:
+            continue
+        if current["p95_ms"] > base["p95_ms"] * (1 + threshold):
+            regressions.append(f"{name}: p95 {base['p95_ms']} -> {current['p95_ms']} ms")
+        if current["throughput_rps"] < base["throughput_rps"] * (1 - threshold):
+            regressions.append(f"{name}: throughput {base['throughput_rps']} -> {current['throughput_rps']} req/s")
+        if current["errors"] > base["errors"]:
+            regressions.append(f"{name}: errors {base['errors']} -> {current['errors']}")
+    return regressions
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bids", type=int, default=1000, help="synthetic bids to load (10 to 100000)")
+    parser.add_argument("--projects", type=int, default=20)
+    parser.add_argument("--traffic", type=int, default=1440, help="traffic data points to load")
+    parser.add_argument("--schools", type=int, default=50, help="schools with per-minute traffic samples")
+    parser.add_argument("--requests", type=int, default=200, help="requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent clients")
+    parser.add_argument("--analyze-batch", type=int, default=10, help="bids per /analyze request")
+    parser.add_argument("--only", help="comma-separated scenario names to run")
+    parser.add_argument("--url", help="benchmark a running server instead of the in-process app")
+    parser.add_argument("--no-seed", action="store_true", help="do not load synthetic data")
+    parser.add_argument("--no-response-cache", action="store_true", help="disable the read response cache")
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--compare", help="baseline results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed relative regression")
+    args = parser.parse_args(argv)
+
+    if args.no_response_cache:
+        os.environ["RESPONSE_CACHE_ENABLED"] = "false"
+    client = HttpClient(args.url) if args.url else InProcessClient(build_app())
+
+    projects = generate_projects(args.projects)
+    bids = generate_bids(args.bids, projects)
+    if not args.no_seed:
+        start = time.perf_counter()
+        seed(client, args, projects, bids)
+        print(f"Seeded {len(bids)} bids in {time.perf_counter() - start:.1f}s")
+
+    selected = set(args.only.split(",")) if args.only else None
+    results = {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "mode": "http" if args.url else "in-process",
+            "bids": args.bids,
+            "projects": args.projects,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "python": platform.python_version(),
+        },
+        "endpoints": {},
+    }
+    # $topN, $percentile and pipeline $lookup are not implemented by mongomock
+    mongomock = not args.url and os.environ.get("MONGO_BACKEND") == "mongomock"
+    for scenario in scenarios(projects, bids, args.analyze_batch):
+        if selected and scenario["name"] not in selected:
+            continue
+        if mongomock and scenario.get("aggregation"):
+            print(f"{scenario['name']:28} skipped: needs MongoDB 7.0+, not mongomock")
+            continue
+        requests = max(5, args.requests // 10) if scenario.get("light") else args.requests
+        stats = run_scenario(client, scenario, requests, args.concurrency)
+        if args.url:
+            stats["rss_delta_mb"] = None
+        results["endpoints"][scenario["name"]] = stats
+        print(f"{scenario['name']:28} p50 {stats['p50_ms']:>9.2f}  p95 {stats['p95_ms']:>9.2f}  "
+              f"p99 {stats['p99_ms']:>9.2f} ms  {stats['throughput_rps']:>9.2f} req/s  errors {stats['errors']}")
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    failing = {name: stats["errors"] for name, stats in results["endpoints"].items() if stats["errors"]}
+    if failing:
+        # Latencies of error responses say nothing about the endpoint
+        print("ERROR: requests failed; these results are not valid:")
+        for name, errors in failing.items():
+            print(f"  {name}: {errors} errors")
+        return 1
+
+    if args.compare:
+        with open(args.compare, "r") as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print("Regressions against baseline:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print("No regressions against baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
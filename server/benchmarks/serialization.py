@@ -0,0 +1,80 @@
+"""
+Serialization throughput per model for list responses.
+
+Compares the validating path (Model(**doc) -> dict -> json) with the
+trusted-read path (stored dict -> orjson) on synthetic documents. No
+database or server is involved.
+
+    python -m benchmarks.serialization --docs 10000 --output serialization.json
+"""
+import argparse
+import json
+import sys
+import time
+from typing import Any, Callable, Dict, List
+
+from benchmarks.synthetic import flat_bid, generate_bids, generate_progress, generate_projects, generate_traffic
+from models import Bid, Project, ProjectProgress, TrafficData
+from utils.serialization import dumps_bytes, trusted_reader
+
+
+def documents(count: int) -> Dict[str, tuple]:
+    """Stored-form documents per model, as returned by Mongo."""
+    projects = generate_projects(max(1, count))
+    bids = [Bid(**flat_bid(bid)).model_dump() for bid in generate_bids(count, projects[:20])]
+    return {
+        "Project": (Project, projects[:count]),
+        "Bid": (Bid, bids),
+        "TrafficData": (TrafficData, generate_traffic(count)),
+        "ProjectProgress": (ProjectProgress, generate_progress(projects[:count])),
+    }
+
+
+def paths(model) -> Dict[str, Callable[[List[Dict[str, Any]]], bytes]]:
+    read = trusted_reader(model)
+    return {
+        "validate+json": lambda docs: json.dumps([model(**doc).model_dump() for doc in docs]).encode(),
+        "validate+orjson": lambda docs: dumps_bytes([model(**doc).model_dump() for doc in docs]),
+        "trusted+json": lambda docs: json.dumps([read(doc) for doc in docs]).encode(),
+        "trusted+orjson": lambda docs: dumps_bytes([read(doc) for doc in docs]),
+    }
+
+
+def measure(serialize: Callable, docs: List[Dict[str, Any]], repeat: int) -> Dict[str, float]:
+    best = float("inf")
+    size = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        size = len(serialize(docs))
+        best = min(best, time.perf_counter() - start)
+    return {
+        "ms": round(best * 1000, 2),
+        "docs_per_s": round(len(docs) / best),
+        "mb_per_s": round(size / best / 1e6, 1),
+    }
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=5000, help="documents per model")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per path; the best is kept")
+    parser.add_argument("--output", help="write the results as JSON")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name, (model, docs) in documents(args.docs).items():
+        results[name] = {path: measure(serialize, docs, args.repeat) for path, serialize in paths(model).items()}
+        baseline = results[name]["validate+json"]["ms"]
+        for path, stats in results[name].items():
+            stats["speedup"] = round(baseline / stats["ms"], 1) if stats["ms"] else None
+            print(f"{name:16} {path:16} {stats['ms']:>9.2f} ms  {stats['docs_per_s']:>10} docs/s  "
+                  f"{stats['mb_per_s']:>7.1f} MB/s  x{stats['speedup']}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"docs": args.docs, "models": results}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
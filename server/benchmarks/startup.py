@@ -0,0 +1,139 @@
+"""
+Cold-start benchmark: how long a fresh worker process takes from interpreter
+start to answering its first request, plus an import-time profile.
+
+Each run starts a new interpreter that imports the app and serves one
+request in-process (offline backends by default). The median over runs is
+checked against --target-ms.
+
+    python -m benchmarks.startup --runs 5 --target-ms 750
+    python -m benchmarks.startup --profile --top 25
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in the child interpreter; times are measured from interpreter start
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+from app import app
+imported = time.perf_counter()
+client = app.test_client()
+status = client.get(sys.argv[1]).status_code
+done = time.perf_counter()
+if status >= 400:
+    # Timing an error response would not measure a working start
+    sys.exit(f"GET {sys.argv[1]} returned {status}")
+print(json.dumps({"import_ms": (imported - start) * 1000, "first_request_ms": (done - imported) * 1000,
+                  "status": status, "llm_modules_loaded": "langchain_core" in sys.modules}))
+"""
+
+_IMPORTTIME = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s+)(\S+)")
+
+
+def _env() -> Dict[str, str]:
+    env = dict(os.environ)
+    env.setdefault("MONGO_BACKEND", "mongomock")
+    env.setdefault("LLM_BACKEND", "fake")
+    env.setdefault("LOG_LEVEL", "WARNING")
+    # The CORS setup in app.py needs an allowed origin
+    env.setdefault("BASE_URL", "http://localhost")
+    return env
+
+
+def measure(path: str) -> Dict[str, float]:
+    """
+    Start a fresh interpreter, import the app and serve one request.
+
+    Raises:
+        RuntimeError: If the probe fails or the request is answered with an error.
+    """
+    started = time.perf_counter()
+    probe = subprocess.run(
+        [sys.executable, "-c", PROBE, path],
+        cwd=SERVER_DIR, env=_env(), capture_output=True, text=True,
+    )
+    total = (time.perf_counter() - started) * 1000
+    if probe.returncode != 0:
+        lines = probe.stderr.strip().splitlines()
+        raise RuntimeError(f"Startup probe failed: {lines[-1] if lines else f'exit code {probe.returncode}'}")
+    result = json.loads(probe.stdout.strip().splitlines()[-1])
+    result["total_ms"] = total
+    return result
+
+
+def import_profile(top: int) -> List[Dict[str, object]]:
+    """Modules with the largest cumulative import time (python -X importtime)."""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app"],
+        cwd=SERVER_DIR, env=_env(), capture_output=True, text=True, check=True,
+    ).stderr
+    rows = []
+    for line in stderr.splitlines():
+        match = _IMPORTTIME.match(line)
+        if match:
+            rows.append({
+                "module": match.group(4),
+                "self_ms": int(match.group(1)) / 1000,
+                "cumulative_ms": int(match.group(2)) / 1000,
+                "depth": (len(match.group(3)) - 1) // 2,
+            })
+    return sorted(rows, key=lambda row: row["cumulative_ms"], reverse=True)[:top]
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters to start")
+    parser.add_argument("--path", default="/projects", help="first request to serve")
+    parser.add_argument("--target-ms", type=float, default=float(os.environ.get("STARTUP_TARGET_MS", 750)),
+                        help="median interpreter-start-to-first-response budget")
+    parser.add_argument("--profile", action="store_true", help="print the slowest imports")
+    parser.add_argument("--top", type=int, default=20, help="modules in the import profile")
+    parser.add_argument("--output", help="write the results as JSON")
+    args = parser.parse_args(argv)
+
+    try:
+        runs = [measure(args.path) for _ in range(args.runs)]
+    except RuntimeError as e:
+        print(e)
+        return 1
+    summary = {
+        key: round(statistics.median(run[key] for run in runs), 1)
+        for key in ("import_ms", "first_request_ms", "total_ms")
+    }
+    summary["target_ms"] = args.target_ms
+    summary["llm_modules_loaded"] = any(run["llm_modules_loaded"] for run in runs)
+    print(f"cold start (median of {args.runs}): import {summary['import_ms']} ms, "
+          f"first request {summary['first_request_ms']} ms, process total {summary['total_ms']} ms "
+          f"(target {args.target_ms:.0f} ms)")
+    if summary["llm_modules_loaded"]:
+        print("warning: langchain was imported before any LLM call")
+
+    results = {"startup": summary, "runs": runs}
+    if args.profile:
+        results["import_profile"] = import_profile(args.top)
+        print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+        for row in results["import_profile"]:
+            print(f"{row['cumulative_ms']:>14.1f} {row['self_ms']:>9.1f}  {'  ' * row['depth']}{row['module']}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if summary["total_ms"] > args.target_ms:
+        print(f"Cold start exceeds the {args.target_ms:.0f} ms target")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
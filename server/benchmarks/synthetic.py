@@ -0,0 +1,105 @@
+import copy
+import json
+import os
+import random
+from typing import Any, Dict, List
+
+SAMPLE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "sample.json")
+
+TECHNOLOGIES = ["Fiber Optic", "Wireless Point-to-Point", "Hybrid Satellite-Terrestrial", "LTE", "Microwave"]
+PROVIDERS = ["Global Network Solutions", "TechNet Solutions", "SkyLink Connect", "RuralNet", "EduFiber"]
+
+
+def _templates() -> List[Dict[str, Any]]:
+    with open(SAMPLE_PATH, "r") as f:
+        return json.load(f)
+
+
+def generate_projects(count: int) -> List[Dict[str, Any]]:
+    """Projects named like the ones created from the dashboard."""
+    return [
+        {"name": f"Synthetic Project {i:04d}", "status": "Open for Bids", "schools": 50 + (i * 37) % 450}
+        for i in range(count)
+    ]
+
+
+def generate_bids(count: int, projects: List[Dict[str, Any]], seed: int = 42) -> List[Dict[str, Any]]:
+    """
+    Generate bids shaped like sample.json, with the flat Bid fields
+    (provider, cost, coverage, aiScore) filled in as well.
+    """
+    rng = random.Random(seed)
+    templates = _templates()
+    bids = []
+    for i in range(count):
+        bid = copy.deepcopy(templates[i % len(templates)])
+        project = projects[i % len(projects)]
+        schools = project["schools"]
+        implementation = rng.randrange(20_000, 150_000, 1_000)
+        monthly = rng.randrange(1_000, 10_000, 100)
+        total = implementation + monthly * 36
+
+        bid["bid_id"] = f"SYN-BID-{i:06d}"
+        bid["bidder_id"] = f"SYN-BIDDER-{i % 997:04d}"
+        bid["project_id"] = project["name"]
+        bid["project_details"]["location"]["target_schools"] = schools
+        bid["bidder_details"]["company_name"] = rng.choice(PROVIDERS)
+        connectivity = bid["technical_proposal"]["connectivity_options"]
+        connectivity["primary_technology"] = rng.choice(TECHNOLOGIES)
+        connectivity["bandwidth_options"]["standard_package"]["download_speed"] = rng.choice([20, 50, 80, 100, 150])
+        pricing = bid["pricing_proposal"]["pricing_model"]
+        pricing["implementation_cost"] = implementation
+        pricing["monthly_service_fee"] = monthly
+        pricing["total_contract_value"] = total
+
+        bid["provider"] = bid["bidder_details"]["company_name"]
+        bid["cost"] = f"${total:,}"
+        bid["coverage"] = f"{rng.randint(60, 100)}%"
+        bid["aiScore"] = rng.randint(40, 99)
+        bids.append(bid)
+    return bids
+
+
+def flat_bid(bid: Dict[str, Any]) -> Dict[str, Any]:
+    """The stored Bid fields of a synthetic bid."""
+    return {name: bid[name] for name in ("provider", "cost", "coverage", "aiScore", "project_id", "bidder_id", "bid_id")}
+
+
+def generate_traffic(count: int) -> List[Dict[str, Any]]:
+    return [{"time": f"{(i // 60) % 24:02d}:{i % 60:02d}", "bandwidth": 10 + (i * 7) % 90} for i in range(count)]
+
+
+def generate_traffic_samples(schools: int, minutes: int, project_id: str = "PROJECT_ID_1") -> List[Dict[str, Any]]:
+    """Per-minute bandwidth samples for `schools` schools starting 2025-01-15."""
+    return [
+        {
+            "school_id": f"SCHOOL_{school:04d}",
+            "project_id": project_id,
+            "timestamp": f"2025-01-{15 + minute // 1440:02d}T{(minute // 60) % 24:02d}:{minute % 60:02d}:00Z",
+            "bandwidth": 10 + (minute * 7 + school * 13) % 90,
+        }
+        for school in range(schools)
+        for minute in range(minutes)
+    ]
+
+
+def generate_progress(projects: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [
+        {
+            "project": project["name"],
+            "startDate": "2025-01-01",
+            "expectedCompletion": "2025-06-30",
+            "progress": (i * 13) % 100,
+            "milestones": [
+                {
+                    "title": title,
+                    "status": "Completed" if j < 2 else "Pending",
+                    "verificationMethod": "Site Survey Documentation",
+                    "date": f"2025-0{j + 1}-15",
+                    "verifier": "GIGA Technical Team",
+                }
+                for j, title in enumerate(["Initial Assessment", "Infrastructure Setup", "Connectivity Testing", "Handover"])
+            ],
+        }
+        for i, project in enumerate(projects)
+    ]
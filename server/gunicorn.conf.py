@@ -0,0 +1,56 @@
+"""
+Gunicorn settings for production.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+All settings can be overridden with environment variables.
+"""
+import multiprocessing
+import os
+
+bind = os.environ.get("GUNICORN_BIND", f"{os.environ.get('FLASK_RUN_HOST', '0.0.0.0')}:{os.environ.get('FLASK_RUN_PORT', 8000)}")
+
+# Processes x threads. The gthread worker handles I/O-bound Mongo and LLM
+# waits on threads. gevent is not supported: its monkey-patching conflicts
+# with the asyncio loop thread and Motor client in utils/event_loop.py.
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gthread")
+threads = int(os.environ.get("GUNICORN_THREADS", 8))
+
+# Response cache invalidation is per process. Without change streams, other
+# workers would keep serving responses from before a write, so the cache is
+# off by default when more than one worker runs.
+if workers > 1 and os.environ.get("RESPONSE_CACHE_CHANGE_STREAMS", "false").lower() != "true":
+    os.environ.setdefault("RESPONSE_CACHE_ENABLED", "false")
+
+# Load the app once in the master so workers fork with imports done.
+# Clients (Mongo, HTTP, job pool) are created lazily per worker after fork.
+preload_app = os.environ.get("GUNICORN_PRELOAD", "true").lower() == "true"
+
+# Long enough for synchronous /analyze batches; graceful_timeout bounds how
+# long a stopping worker may spend draining analysis jobs.
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 300))
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", 120))
+keepalive = int(os.environ.get("GUNICORN_KEEPALIVE", 5))
+
+# Recycle workers periodically to bound memory growth
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 5000))
+max_requests_jitter = int(os.environ.get("GUNICORN_MAX_REQUESTS_JITTER", 500))
+
+accesslog = os.environ.get("GUNICORN_ACCESS_LOG", "-")
+errorlog = "-"
+loglevel = os.environ.get("LOG_LEVEL", "info").lower()
+
+
+def when_ready(server):
+    """Declare indexes once in the master, not on every import of the app."""
+    from services.mongodb import bootstrap_indexes, close_client
+    bootstrap_indexes()
+    # Workers open their own clients after fork
+    close_client()
+
+
+def worker_exit(server, worker):
+    """Let in-flight background analysis jobs finish before the worker exits."""
+    from services.jobs import drain_jobs
+    drain_jobs(wait=True)
@@ -1,6 +1,7 @@
 from .project import Project
 from .bid import Bid
-from .traffic_data import TrafficData
+from .traffic_data import TrafficData, TrafficSample
 from .project_progress import ProjectProgress, Milestone
+from .insight import BidScore, BidInsights
 
-__all__ = ["Project", "Bid", "TrafficData", "ProjectProgress", "Milestone"]
\ No newline at end of file
+__all__ = ["Project", "Bid", "TrafficData", "TrafficSample", "ProjectProgress", "Milestone", "BidScore", "BidInsights"]
\ No newline at end of file
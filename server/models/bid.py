@@ -1,5 +1,6 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 from typing import Optional
+from utils.numbers import parse_money, parse_percent
 
 class Bid(BaseModel):
     provider: str = Field(..., example="TechNet Solutions")
@@ -8,4 +9,25 @@ class Bid(BaseModel):
     aiScore: int = Field(..., example=85)
     project_id: str = Field(..., example="PROJECT_ID_1")
     bidder_id: str = Field(..., example="BIDDER_1")
-    bid_id: str = Field(..., example="BID_1")
\ No newline at end of file
+    bid_id: str = Field(..., example="BID_1")
+    # Numeric forms of `cost` and `coverage`, filled in at write time so the
+    # server can sort and aggregate on them
+    cost_value: Optional[float] = Field(None, example=125000.0)
+    coverage_pct: Optional[float] = Field(None, example=98.0)
+
+    @model_validator(mode="after")
+    def normalize_numbers(self):
+        if self.cost_value is None:
+            self.cost_value = parse_money(self.cost)
+        if self.coverage_pct is None:
+            self.coverage_pct = parse_percent(self.coverage)
+        return self
+
+    @staticmethod
+    def complete_trusted(doc: dict) -> dict:
+        """`normalize_numbers` for trusted reads of bids stored before these fields existed."""
+        if doc.get("cost_value") is None:
+            doc["cost_value"] = parse_money(doc.get("cost"))
+        if doc.get("coverage_pct") is None:
+            doc["coverage_pct"] = parse_percent(doc.get("coverage"))
+        return doc
@@ -0,0 +1,38 @@
+from pydantic import BaseModel, ConfigDict, Field, field_validator
+from typing import Any, Dict, List, Optional
+
+
+def _round_score(value):
+    # Models sometimes answer 82.5 or "82"; keep the nearest integer
+    if isinstance(value, float):
+        return round(value)
+    if isinstance(value, str) and value.strip().replace(".", "", 1).isdigit():
+        return round(float(value))
+    return value
+
+
+class BidScore(BaseModel):
+    """LLM response for the single-bid scoring prompt."""
+    model_config = ConfigDict(extra="allow")
+
+    aiScore: int = Field(..., ge=0, le=100, example=85)
+    analysis: str = Field("", example="Strong coverage at a competitive cost per school.")
+
+    _normalize_score = field_validator("aiScore", mode="before")(_round_score)
+
+
+class BidInsights(BaseModel):
+    """
+    LLM response for the insights prompt. The known sections are optional
+    and any extra sections the model adds are kept.
+    """
+    model_config = ConfigDict(extra="allow")
+
+    aiScore: Optional[int] = Field(None, ge=0, le=100, example=85)
+    technical_evaluation: Optional[Dict[str, Any]] = None
+    financial_analysis: Optional[Dict[str, Any]] = None
+    risk_evaluation: Optional[Dict[str, Any]] = None
+    compliance_review: Optional[Dict[str, Any]] = None
+    recommendations: Optional[List[Any]] = None
+
+    _normalize_score = field_validator("aiScore", mode="before")(_round_score)
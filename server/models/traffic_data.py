@@ -1,5 +1,14 @@
+from datetime import datetime
 from pydantic import BaseModel, Field
+from typing import Optional
 
 class TrafficData(BaseModel):
     time: str = Field(..., example="00:00")
-    bandwidth: int = Field(..., example=20)
\ No newline at end of file
+    bandwidth: int = Field(..., example=20)
+
+class TrafficSample(BaseModel):
+    """One bandwidth measurement for a school, stored in time buckets."""
+    school_id: str = Field(..., example="SCHOOL_0001")
+    project_id: Optional[str] = Field(None, example="UGSC0001")
+    timestamp: datetime = Field(..., example="2025-01-15T08:30:00Z")
+    bandwidth: float = Field(..., example=20.5)
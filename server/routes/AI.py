@@ -1,20 +1,153 @@
-from flask import jsonify, Blueprint, request, send_file, send_from_directory
+import json
+from flask import jsonify, Blueprint, request, send_file, send_from_directory, Response, stream_with_context
 from services.intelligence import BidAnalyzer, load_bids
+from agents.llm_router import get_router
+from services.insight_cache import all_cache_stats
+from services.jobs import get_job_manager
+from utils.event_loop import run_on_loop
 
 
 
 ai_routes = Blueprint("ai", __name__)
 
 @ai_routes.route("/analyze", methods=["POST"])
-def analyze_bids():
+async def analyze_bids():
+    """
+    Analyze a JSON array of bids. The LLM calls run concurrently on the shared
+    event loop; `?workers` caps the number in flight.
+    """
     try:
         # Expecting a JSON array of bids
         bids = request.get_json()
         if not isinstance(bids, list):
             return jsonify({"error": "Invalid bid data format"}), 400
 
+        workers = request.args.get("workers", type=int)
+        use_cache = request.args.get("cache") != "false"
+
+        if request.args.get("async") == "true":
+            return _submit_job(bids, workers, use_cache)
+
         analyzer = BidAnalyzer()
-        insights = analyzer.analyze_all_bids(bids)
-        return jsonify(insights), 200
+        insights = await run_on_loop(analyzer.aanalyze_all_bids(bids, max_concurrency=workers, use_cache=use_cache))
+        if request.args.get("stats") == "true":
+            return jsonify({"insights": insights, "stats": analyzer.last_run_stats}), 200
+        response = jsonify(insights)
+        response.headers["X-Analysis-Wall-Time-Ms"] = str(analyzer.last_run_stats["wall_time_ms"])
+        return response, 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@ai_routes.route("/analyze/stream", methods=["POST"])
+def stream_bid_analysis():
+    """
+    Analyze a JSON array of bids and stream each insight as soon as it is ready.
+
+    Results arrive in completion order, tagged with `index` and `bid_id`.
+    The format is NDJSON by default; `?format=sse` or an
+    `Accept: text/event-stream` header switches to server-sent events.
+    """
+    bids = request.get_json(silent=True)
+    if not isinstance(bids, list):
+        return jsonify({"error": "Invalid bid data format"}), 400
+
+    workers = request.args.get("workers", type=int)
+    use_cache = request.args.get("cache") != "false"
+    use_sse = request.args.get("format") == "sse" or "text/event-stream" in request.headers.get("Accept", "")
+
+    def generate():
+        analyzer = BidAnalyzer()
+        for index, insights, latency in analyzer.iter_bid_insights(bids, workers, use_cache):
+            payload = json.dumps({
+                "index": index,
+                "bid_id": insights.get("bid_id"),
+                "latency_ms": round(latency, 1),
+                "insights": insights,
+            })
+            yield f"event: insight\ndata: {payload}\n\n" if use_sse else payload + "\n"
+        if use_sse:
+            yield "event: done\ndata: {}\n\n"
+
+    mimetype = "text/event-stream" if use_sse else "application/x-ndjson"
+    response = Response(stream_with_context(generate()), mimetype=mimetype)
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+
+def _submit_job(bids, workers, use_cache):
+    job_id = get_job_manager().submit(bids, max_workers=workers, use_cache=use_cache)
+    return jsonify({
+        "job_id": job_id,
+        "status": "queued",
+        "status_url": f"/analyze/jobs/{job_id}",
+        "results_url": f"/analyze/jobs/{job_id}/results",
+    }), 202
+
+
+@ai_routes.route("/analyze/jobs", methods=["POST"])
+def create_analysis_job():
+    """
+    Queue a JSON array of bids for background analysis.
+    Returns 202 with the job id immediately.
+    """
+    try:
+        bids = request.get_json()
+        if not isinstance(bids, list):
+            return jsonify({"error": "Invalid bid data format"}), 400
+        return _submit_job(
+            bids,
+            request.args.get("workers", type=int),
+            request.args.get("cache") != "false",
+        )
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@ai_routes.route("/analyze/jobs/<job_id>", methods=["GET"])
+def get_analysis_job(job_id):
+    """Return the status and progress counters of a job."""
+    try:
+        job = get_job_manager().get(job_id)
+        if not job:
+            return jsonify({"error": "Job not found."}), 404
+        return jsonify(job), 200
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
\ No newline at end of file
+        return jsonify({"error": str(e)}), 500
+
+
+@ai_routes.route("/analyze/jobs/<job_id>/results", methods=["GET"])
+def get_analysis_job_results(job_id):
+    """
+    Return the results of a job. While the job is running, `results` holds
+    the bids finished so far and `final` is false.
+    """
+    try:
+        job = get_job_manager().get(job_id, include_results=True)
+        if not job:
+            return jsonify({"error": "Job not found."}), 404
+        final = job["status"] in ("completed", "failed")
+        results = job["results"] if final else [r for r in job["results"] if r is not None]
+        return jsonify({
+            "job_id": job_id,
+            "status": job["status"],
+            "completed": job["completed"],
+            "total": job["total"],
+            "final": final,
+            "results": results,
+        }), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@ai_routes.route("/analyze/cache", methods=["GET"])
+def insight_cache_stats():
+    """Return hit/miss counters for the LLM insight caches."""
+    return jsonify(all_cache_stats()), 200
+
+
+@ai_routes.route("/analyze/engines", methods=["GET"])
+def llm_engine_stats():
+    """Return routes, per-engine latency, outcome counts and circuit state."""
+    return jsonify(get_router().stats()), 200
@@ -1,11 +1,92 @@
-from flask import jsonify, Blueprint, request
+import asyncio
+import uuid
+from datetime import datetime, timezone
+from pymongo.errors import DuplicateKeyError
+from flask import jsonify, Blueprint, request, Response, stream_with_context
 from services.mongodb import MongoDbOperations
-from models import Project, Bid, TrafficData, ProjectProgress
-from services.intelligence import analyze_bid_with_groq
+from services.mongodb_async import AsyncMongoDbOperations
+from models import Project, Bid, TrafficData, TrafficSample, ProjectProgress
+from services.intelligence import aanalyze_bid_with_groq
+from services.structured_output import StructuredOutputError
+from agents.llm_router import NoEngineAvailable
+from services.dedup import get_similarity_index
+from services.ingestion import (
+    ingest_bids, parse_bid_records, afind_duplicate, index_bids, INGEST_CHUNK_SIZE, MAX_INGEST_CHUNK_SIZE,
+)
+from services.leaderboard import bid_leaderboard
+from services.traffic import record_samples, traffic_series
+from services.scoring import PRESCORE_ENABLED, prescore_bid, prescore_bids, load_project_schools, aload_project_schools
+from utils.pagination import parse_list_params, STREAM_BATCH_SIZE
+from utils.response_cache import cached_read, response_cache
+from utils.metrics import timed
+from utils.event_loop import run_on_loop
+from utils.serialization import TRUSTED_READS, dumps_bytes, model_projection, trusted_reader
 
 
 api_routes = Blueprint("api", __name__)
 
+
+def _stream_json_array(documents, serialize):
+    """Yield a JSON array one document at a time."""
+    yield b"["
+    for index, doc in enumerate(documents):
+        yield (b"," if index else b"") + dumps_bytes(serialize(doc))
+    yield b"]"
+
+
+def _list_documents(collection_name: str, model, query: dict = None):
+    """
+    Shared GET handler for list endpoints.
+
+    Supports `limit`/`offset` and keyset (`after`) pagination, `fields`
+    projection, `sort` and `stream=true` (see utils.pagination). Without
+    these parameters the full collection is returned as before.
+    """
+    try:
+        params = parse_list_params(request.args, model.model_fields)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    db = MongoDbOperations(collection_name)
+
+    # Projected documents are partial, so they are returned as stored.
+    # Full documents were validated on write; trusted reads let Mongo
+    # project them to the model's fields instead of re-validating.
+    if params.fields:
+        projection, serialize = params.projection(), lambda doc: doc
+    elif TRUSTED_READS:
+        projection, serialize = model_projection(model), trusted_reader(model)
+    else:
+        projection, serialize = params.projection(), lambda doc: model(**doc).dict()
+
+    if params.stream:
+        documents = db.iter_documents(
+            query,
+            projection,
+            params.sort,
+            STREAM_BATCH_SIZE,
+            limit=params.limit,
+            offset=params.offset,
+            after_id=params.after,
+        )
+        return Response(stream_with_context(_stream_json_array(documents, serialize)), mimetype="application/json")
+
+    docs, next_cursor = db.find_page(
+        query=query,
+        projection=projection,
+        sort=params.sort,
+        limit=params.limit,
+        offset=params.offset,
+        after_id=params.after,
+    )
+    with timed("validation"):
+        items = [serialize(doc) for doc in docs]
+    with timed("serialization"):
+        response = jsonify(items)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return response, 200
+
 @api_routes.route("/projects", methods=["POST"])
 def create_project():
     """
@@ -23,17 +104,19 @@ def create_project():
 
         db = MongoDbOperations("projects")
         db.store_data(project)  # This will insert into 'projects' collection
+        response_cache.invalidate("projects")
 
         return jsonify({"message": "Project created successfully"}), 201
+    except DuplicateKeyError:
+        return jsonify({"error": "A project with this name already exists"}), 409
     except Exception as e:
         return jsonify({"error": str(e)}), 400
 
 @api_routes.route("/projects", methods=["GET"])
+@cached_read("projects")
 def get_projects():
     try:
-        db = MongoDbOperations("projects")
-        projects = db.get_all(Project)
-        return jsonify([project.dict() for project in projects]), 200
+        return _list_documents("projects", Project)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -63,6 +146,7 @@ def update_project_status():
         if update_result.matched_count == 0:
             # No project found with that name
             return jsonify({"error": "No project found with the specified name"}), 404
+        response_cache.invalidate("projects")
 
         return jsonify({"message": "Project status updated successfully"}), 200
 
@@ -70,8 +154,43 @@ def update_project_status():
         return jsonify({"error": str(e)}), 400
     
 
+async def _score_and_store_bid(bid_data: dict, use_cache: bool):
+    project_id = bid_data["project_id"]
+    duplicates = get_similarity_index()
+    match = await afind_duplicate(duplicates, bid_data)
+
+    # 1. Score clear-cut bids locally; only ambiguous ones go to the LLM
+    prescore = None
+    if PRESCORE_ENABLED:
+        schools = await aload_project_schools([project_id])
+        prescore = prescore_bid(bid_data, schools.get(project_id))
+    if prescore is not None and not prescore["ambiguous"]:
+        ai_score = prescore["aiScore"]
+    elif use_cache and match is not None and match.identical and match.ai_score is not None:
+        # Same scoring fields as a stored bid: reuse its LLM score, unless
+        # ?cache=false asks for a fresh one
+        ai_score = match.ai_score
+    else:
+        ai_result = await aanalyze_bid_with_groq(bid_data, use_cache=use_cache)
+        ai_score = ai_result["aiScore"]
+
+    # 2. Construct the Bid object
+    new_bid = Bid(
+        **bid_data,
+        aiScore=ai_score,
+        bidder_id="AUTO_GENERATED",
+        bid_id=f"AUTO_BID_{uuid.uuid4().hex[:12]}"
+    )
+
+    # 3. Store in Mongo and index it for near-duplicate lookups; the index
+    # write is a pymongo bulk_write, so it still runs on a thread
+    await AsyncMongoDbOperations("bids").store_data(new_bid)
+    flags = await asyncio.to_thread(index_bids, [new_bid], [0], [match])
+    return new_bid, flags[0]["duplicate_of"] if flags else None
+
+
 @api_routes.route("/bids", methods=["POST"])
-def create_bid():
+async def create_bid():
     """
     Create a new Bid in the 'bids' collection.
     Expects JSON:
@@ -81,7 +200,11 @@ def create_bid():
       "coverage": str,
       "project_id": str
     }
-    The 'aiScore' is generated by the GROQ AI.
+    The 'aiScore' comes from the rule-based pre-scorer, from a stored bid
+    with the same scoring fields, or from the GROQ AI when the pre-scorer
+    marks the bid as ambiguous. Near-duplicates of stored bids are returned
+    with a `duplicate_of` entry. Scoring and the insert run on the shared
+    event loop.
     """
     try:
         data = request.json or {}
@@ -94,73 +217,210 @@ def create_bid():
         if not all([provider, cost, coverage, project_id]):
             return jsonify({"error": "Missing required bid fields."}), 400
 
-        # 1. Use AI logic to get or approximate the 'aiScore'
-        ai_result = analyze_bid_with_groq({
+        bid_data = {
             "provider": provider,
             "cost": cost,
             "coverage": coverage,
             "project_id": project_id
-        })
-        ai_score = ai_result.get("aiScore", 70)  # fallback if missing
-
-        # 2. Construct the Bid object
-        new_bid = Bid(
-            provider=provider,
-            cost=cost,
-            coverage=coverage,
-            aiScore=ai_score,
-            project_id=project_id,
-            bidder_id="AUTO_GENERATED",
-            bid_id="AUTO_BID_123"
-        )
+        }
 
-        # 3. Store in Mongo
-        db = MongoDbOperations("bids")
-        db.store_data(new_bid)
+        new_bid, duplicate_of = await run_on_loop(_score_and_store_bid(bid_data, request.args.get("cache") != "false"))
+        response_cache.invalidate("bids", project_id)
 
-        # 4. Return the newly created bid
-        return jsonify(new_bid.dict()), 201
+        # 4. Return the newly created bid, with its duplicate flag if any
+        body = new_bid.dict()
+        if duplicate_of:
+            body["duplicate_of"] = duplicate_of
+        return jsonify(body), 201
 
+    except StructuredOutputError as e:
+        # The LLM answered but not with a usable score; nothing was stored
+        return jsonify({"error": str(e)}), 502
+    except NoEngineAvailable as e:
+        # Every LLM engine failed, timed out or is circuit-broken
+        return jsonify({"error": str(e)}), 503
     except Exception as e:
         return jsonify({"error": str(e)}), 400
 
+@api_routes.route("/bids/bulk", methods=["POST"])
+def create_bids_bulk():
+    """
+    Create many bids at once from a JSON array or NDJSON body
+    (Content-Type: application/x-ndjson). Each row needs the same fields
+    as POST /bids. Rows are scored concurrently and inserted in chunks;
+    invalid rows are reported by index without aborting the batch.
+    """
+    try:
+        records = parse_bid_records(request.get_data(as_text=True))
+    except ValueError as e:
+        return jsonify({"error": f"Invalid bid payload: {e}"}), 400
+
+    try:
+        chunk_size = int(request.args.get("chunk_size", INGEST_CHUNK_SIZE))
+    except ValueError:
+        chunk_size = 0
+    if chunk_size < 1:
+        return jsonify({"error": "'chunk_size' must be a positive integer"}), 400
+    chunk_size = min(chunk_size, MAX_INGEST_CHUNK_SIZE)
+
+    try:
+        summary = ingest_bids(
+            records,
+            chunk_size=chunk_size,
+            use_cache=request.args.get("cache") != "false",
+        )
+        if summary["inserted"]:
+            response_cache.invalidate("bids")
+        return jsonify(summary), 207 if summary["failed"] else 201
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@api_routes.route("/bids/duplicates", methods=["GET"])
+def list_duplicate_bids():
+    """
+    List bids flagged by the near-duplicate index, newest first.
+    `?suspicious=true` keeps only near-copies of another bidder's bid;
+    `?project_id` and `?limit` (default 100) narrow the list.
+    """
+    duplicates = get_similarity_index()
+    if duplicates is None:
+        return jsonify({"error": "Near-duplicate detection is disabled"}), 404
+    try:
+        flagged = duplicates.flagged(
+            project_id=request.args.get("project_id"),
+            suspicious_only=request.args.get("suspicious") == "true",
+            limit=max(1, min(request.args.get("limit", default=100, type=int), 1000)),
+        )
+        return jsonify(flagged), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@api_routes.route("/bids/prescore", methods=["POST"])
+def prescore_project_bids():
+    """
+    Rank a JSON array of bids for one project with the rule-based scorer.
+    Returns per-bid `aiScore`, `rank`, `ambiguous` and metrics in input order
+    without calling the LLM.
+    """
+    try:
+        bids = request.get_json()
+        if not isinstance(bids, list) or not all(isinstance(bid, dict) for bid in bids):
+            return jsonify({"error": "Invalid bid data format"}), 400
+        project_ids = {bid.get("project_id") for bid in bids if bid.get("project_id")}
+        schools = load_project_schools(project_ids) if project_ids else {}
+        return jsonify(prescore_bids(bids, schools)), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@api_routes.route("/bids/leaderboard", methods=["GET"])
+@cached_read("bids", partition_arg="project_id")
+def get_bid_leaderboard():
+    """
+    Top-N bids per project by aiScore, cost per school and coverage, with
+    min/max/mean/percentile summaries, computed by a Mongo aggregation.
+    Query: ?project_id=<name>&top=<n, default 10>
+    """
+    try:
+        top = request.args.get("top", default=10, type=int)
+        if top < 1 or top > 100:
+            return jsonify({"error": "'top' must be between 1 and 100"}), 400
+        return jsonify(bid_leaderboard(request.args.get("project_id"), top)), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 @api_routes.route("/bids", methods=["GET"])
+@cached_read("bids", partition_arg="project_id")
 def get_bids():
     try:
         project_id = request.args.get('project_id')
-        db = MongoDbOperations("bids")
-        if project_id:
-            bids_data = list(db.collection.find({"project_id": project_id}, {"_id": 0}))
-            bids = [Bid(**bid) for bid in bids_data]
-        else:
-            bids = db.get_all(Bid)
-        return jsonify([bid.dict() for bid in bids]), 200
+        query = {"project_id": project_id} if project_id else None
+        return _list_documents("bids", Bid, query)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+TRAFFIC_SERIES_ARGS = ("start", "end", "points", "step", "method", "school_id", "project_id")
+
+
+def _parse_utc(name: str) -> datetime:
+    """Parse an ISO 8601 query argument as a UTC-aware datetime; naive values are UTC."""
+    if name not in request.args:
+        raise ValueError(f"Missing query parameter '{name}'.")
+    try:
+        value = datetime.fromisoformat(request.args[name])
+    except ValueError:
+        raise ValueError(f"'{name}' must be an ISO 8601 timestamp")
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+@api_routes.route("/traffic-data", methods=["POST"])
+def create_traffic_samples():
+    """
+    Store bandwidth samples. Expects a JSON array of
+    {"school_id", "project_id", "timestamp", "bandwidth"} objects.
+    """
+    try:
+        data = request.get_json()
+        if not isinstance(data, list):
+            return jsonify({"error": "Expected a JSON array of samples."}), 400
+        result = record_samples([TrafficSample(**sample) for sample in data])
+        response_cache.invalidate("traffic_data")
+        return jsonify(result), 201
+    except Exception as e:
+        return jsonify({"error": str(e)}), 400
+
+
 @api_routes.route("/traffic-data", methods=["GET"])
+@cached_read("traffic_data")
 def get_traffic_data():
+    """
+    Without range parameters, return the legacy `{time, bandwidth}` rows.
+
+    With `start` and `end` (ISO 8601, UTC when no offset is given), return stored samples downsampled to
+    about `points` values (default 500): min/mean/max per bucket, or
+    `method=lttb`. `step` sets the bucket width in seconds instead, and
+    `school_id`/`project_id` select the series.
+    """
     try:
-        db = MongoDbOperations("traffic_data")
-        traffic_data = db.get_all(TrafficData)
-        return jsonify([data.dict() for data in traffic_data]), 200
+        if not any(name in request.args for name in TRAFFIC_SERIES_ARGS):
+            return _list_documents("traffic_data", TrafficData)
+        try:
+            start = _parse_utc("start")
+            end = _parse_utc("end")
+            series = traffic_series(
+                start,
+                end,
+                points=request.args.get("points", type=int),
+                step=request.args.get("step", type=float),
+                method=request.args.get("method", "minmax"),
+                school_id=request.args.get("school_id"),
+                project_id=request.args.get("project_id"),
+            )
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        return jsonify(series), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @api_routes.route("/project-progress", methods=["GET"])
+@cached_read("project_progress")
 def get_project_progress():
     try:
         project_name = request.args.get('project')
-        db = MongoDbOperations("project_progress")
         if project_name:
-            progress_data = db.collection.find_one({"project": project_name}, {"_id": 0})
+            db = MongoDbOperations("project_progress")
+            if TRUSTED_READS:
+                progress_data = db.collection.find_one({"project": project_name}, model_projection(ProjectProgress))
+            else:
+                progress_data = db.collection.find_one({"project": project_name}, {"_id": 0})
             if progress_data:
-                progress = ProjectProgress(**progress_data)
-                return jsonify(progress.dict()), 200
+                if not TRUSTED_READS:
+                    progress_data = ProjectProgress(**progress_data).dict()
+                return jsonify(progress_data), 200
             else:
                 return jsonify({"error": "Project progress not found."}), 404
         else:
-            progress_data = db.get_all(ProjectProgress)
-            return jsonify([progress.dict() for progress in progress_data]), 200
+            return _list_documents("project_progress", ProjectProgress)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -0,0 +1,430 @@
+import hashlib
+import json
+import math
+import os
+import re
+import sys
+from dataclasses import dataclass, field
+from datetime import datetime
+from threading import Lock
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+import numpy as np
+from pymongo import UpdateOne
+from services.mongodb import get_collection
+from services.prompting import PROMPT_FIELDS, project_bid
+from utils.logger import get_logger
+from utils.metrics import Counter, register_metric, timed
+from utils.numbers import parse_money
+
+logger = get_logger(__name__)
+
+DEDUP_ENABLED = os.environ.get("DEDUP_ENABLED", "true").lower() == "true"
+# MinHash permutations and LSH bands; rows per band = permutations / bands.
+# With 256/16, bids with a Jaccard similarity of 0.9 share a band key with
+# ~96% probability and bids at 0.6 (distinct bids from one template) with
+# under 1%. Changing either requires `python -m services.dedup rebuild`.
+DEDUP_NUM_PERM = int(os.environ.get("DEDUP_NUM_PERM", 256))
+DEDUP_BANDS = int(os.environ.get("DEDUP_BANDS", 16))
+# Estimated Jaccard similarity for a candidate to count as a near-duplicate
+DEDUP_MATCH_THRESHOLD = float(os.environ.get("DEDUP_MATCH_THRESHOLD", 0.8))
+# Similarity at which a duplicate submission is flagged
+DEDUP_FLAG_THRESHOLD = float(os.environ.get("DEDUP_FLAG_THRESHOLD", 0.9))
+# Changed scoring fields up to which prior insights are updated rather than regenerated
+DEDUP_MAX_DIFF_FIELDS = int(os.environ.get("DEDUP_MAX_DIFF_FIELDS", 3))
+# Candidate signatures read per lookup; bounds the cost of very common band values
+DEDUP_MAX_SCAN = int(os.environ.get("DEDUP_MAX_SCAN", 1000))
+# Relative width of the finest numeric bucket (2% of the value)
+DEDUP_NUMERIC_PRECISION = float(os.environ.get("DEDUP_NUMERIC_PRECISION", 0.02))
+COLLECTION = "bid_signatures"
+
+DEDUP_LOOKUPS = Counter("bidwise_dedup_total", "Near-duplicate bid lookups, by source and outcome.")
+DEDUP_INSIGHTS = Counter("bidwise_dedup_insights_total", "Bid insights by how they were produced (reused, updated, analyzed).")
+register_metric(DEDUP_LOOKUPS)
+register_metric(DEDUP_INSIGHTS)
+
+_PRIME = (1 << 31) - 1
+_SHINGLE_WORDS = 3
+_WORD = re.compile(r"[a-z0-9]+")
+_LIST_INDEX = re.compile(r"\[\d+\]")
+_NUMERIC_TEXT = re.compile(r"^[^\w-]*-?[\d,]*\.?\d+\s*(%|[a-zA-Z]{1,4})?$")
+# Bucket widths for numeric fields. A small price change moves only the
+# finest token, so the bid stays similar while the change is still visible.
+_NUMERIC_SCALES = (1, 5, 25)
+# Bidder ids that say nothing about who submitted the bid
+_ANONYMOUS_BIDDERS = {None, "", "AUTO_GENERATED", "UNKNOWN"}
+
+
+def _flatten(value: Any, path: str = "") -> Iterable[Tuple[str, Any]]:
+    """Yield (dotted path, leaf value) pairs; list items get a [i] suffix."""
+    if isinstance(value, dict):
+        for key, item in value.items():
+            yield from _flatten(item, f"{path}.{key}" if path else str(key))
+    elif isinstance(value, list):
+        for index, item in enumerate(value):
+            yield from _flatten(item, f"{path}[{index}]")
+    else:
+        yield path, value
+
+
+def _as_number(value: Any) -> Optional[float]:
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str) and _NUMERIC_TEXT.match(value.strip()):
+        return parse_money(value)
+    return None
+
+
+def _numeric_tokens(path: str, number: float) -> List[str]:
+    if number == 0:
+        return [f"{path}#0"]
+    sign = "-" if number < 0 else ""
+    magnitude = math.log(abs(number))
+    return [
+        f"{path}#{scale}:{sign}{math.floor(magnitude / math.log1p(DEDUP_NUMERIC_PRECISION * scale))}"
+        for scale in _NUMERIC_SCALES
+    ]
+
+
+def bid_tokens(bid: Dict[str, Any], fields: List[str] = None) -> Set[str]:
+    """
+    Normalized features of a bid's scoring fields.
+
+    Only the prompt fields are used (see services.prompting), so ids, dates
+    and contact details never make two bids look different. Text becomes
+    lowercase word 3-shingles and numbers become buckets at several
+    resolutions. List order is ignored.
+    """
+    tokens = set()
+    for path, value in _flatten(project_bid(bid, fields or PROMPT_FIELDS)):
+        path = _LIST_INDEX.sub("", path)
+        number = _as_number(value)
+        if number is not None:
+            tokens.update(_numeric_tokens(path, number))
+        elif isinstance(value, str):
+            words = _WORD.findall(value.lower())
+            if len(words) <= _SHINGLE_WORDS:
+                tokens.add(f"{path}:{' '.join(words)}")
+            else:
+                tokens.update(f"{path}:{' '.join(words[i:i + _SHINGLE_WORDS])}"
+                              for i in range(len(words) - _SHINGLE_WORDS + 1))
+        else:
+            tokens.add(f"{path}={value}")
+    return tokens
+
+
+def fields_key(fields: Dict[str, Any]) -> str:
+    """Hash of a projected bid; equal for bids whose scoring fields are identical."""
+    canonical = json.dumps(fields, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def changed_fields(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """Leaf paths whose values differ between two projected bids, with old and new values."""
+    before, after = dict(_flatten(old)), dict(_flatten(new))
+    return {
+        path: {"old": before.get(path), "new": after.get(path)}
+        for path in sorted(before.keys() | after.keys())
+        if before.get(path) != after.get(path)
+    }
+
+
+@dataclass
+class DuplicateMatch:
+    """The most similar indexed bid for a lookup."""
+    bid_id: Optional[str]
+    project_id: Optional[str]
+    bidder_id: Optional[str]
+    similarity: float
+    changed: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    insights: Optional[Dict[str, Any]] = None
+    ai_score: Optional[int] = None
+
+    @property
+    def identical(self) -> bool:
+        """Whether every scoring field is equal."""
+        return not self.changed
+
+    def flag(self, bid: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Describe a duplicate submission, or None if it is not one.
+
+        A near-copy of another bidder's bid is marked suspicious. A
+        resubmission by the same bidder, on the same or another project, is
+        recorded but not suspicious.
+        """
+        if self.similarity < DEDUP_FLAG_THRESHOLD or (bid.get("bid_id") and bid.get("bid_id") == self.bid_id):
+            return None
+        bidder = bid.get("bidder_id")
+        if bidder not in _ANONYMOUS_BIDDERS and self.bidder_id not in _ANONYMOUS_BIDDERS and bidder != self.bidder_id:
+            reason, suspicious = "other_bidder", True
+        elif bid.get("project_id") == self.project_id:
+            reason, suspicious = "resubmission", False
+        else:
+            reason, suspicious = "other_project", False
+        return {
+            "bid_id": self.bid_id,
+            "project_id": self.project_id,
+            "bidder_id": self.bidder_id,
+            "similarity": round(self.similarity, 3),
+            "changed_fields": sorted(self.changed),
+            "reason": reason,
+            "suspicious": suspicious,
+        }
+
+
+class BidSimilarityIndex:
+    """
+    MinHash/LSH index of bids in the `bid_signatures` collection.
+
+    Each entry stores the bid's MinHash signature, its LSH band keys, the
+    projected scoring fields and, once known, its score and insights. A
+    lookup reads only the entries sharing a band key with the bid through
+    the multikey index on `bands`, so its cost depends on the number of
+    similar bids rather than the collection size.
+
+    Args:
+        num_perm: MinHash permutations.
+        bands: LSH bands; must divide `num_perm`.
+        collection_name: Collection holding the entries.
+    """
+
+    def __init__(self, num_perm: int = DEDUP_NUM_PERM, bands: int = DEDUP_BANDS,
+                 collection_name: str = COLLECTION):
+        if num_perm % bands:
+            raise ValueError(f"DEDUP_BANDS ({bands}) must divide DEDUP_NUM_PERM ({num_perm})")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.collection_name = collection_name
+        # Fixed seed: signatures must match across processes and restarts
+        rng = np.random.RandomState(1)
+        self._a = rng.randint(1, _PRIME, size=num_perm).astype(np.uint64)
+        self._b = rng.randint(0, _PRIME, size=num_perm).astype(np.uint64)
+
+    @property
+    def collection(self):
+        return get_collection(self.collection_name)
+
+    def signature(self, tokens: Set[str]) -> Optional[np.ndarray]:
+        """MinHash signature of a token set, or None if it is empty."""
+        if not tokens:
+            return None
+        hashes = np.fromiter(
+            (int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=4).digest(), "little")
+             for token in tokens),
+            dtype=np.uint64,
+            count=len(tokens),
+        )
+        # (a * x + b) mod p for every permutation and token at once; all
+        # operands are below 2**32, so the products fit in uint64
+        values = (self._a[:, None] * hashes[None, :] + self._b[:, None]) % _PRIME
+        return values.min(axis=1).astype(np.uint32)
+
+    def band_keys(self, signature: np.ndarray) -> List[str]:
+        """One key per band; bids sharing any key are candidates."""
+        rows = signature.astype("<u4").reshape(self.bands, self.rows)
+        return [f"{band}:{hashlib.blake2b(row.tobytes(), digest_size=8).hexdigest()}"
+                for band, row in enumerate(rows)]
+
+    def _entry(self, bid: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        signature = self.signature(bid_tokens(bid))
+        if signature is None:
+            return None
+        fields = project_bid(bid)
+        return {
+            "signature": signature,
+            "bands": self.band_keys(signature),
+            "fields": fields,
+            "fields_key": fields_key(fields),
+        }
+
+    def match(self, bid: Dict[str, Any], source: str = "lookup",
+              require: str = None) -> Optional[DuplicateMatch]:
+        """
+        Find the most similar indexed bid above DEDUP_MATCH_THRESHOLD.
+
+        Args:
+            bid: Bid document.
+            source: Label for the lookup metric, e.g. "ingest" or "insights".
+            require: Only consider entries that have this field, e.g. "insights".
+        """
+        entry = self._entry(bid)
+        if entry is None:
+            return None
+        # Resubmissions with only ids or dates changed: one indexed read,
+        # however many similar bids share its band keys
+        extra = {require: {"$exists": True}} if require else {}
+        with timed("mongo", op="dedup_lookup"):
+            doc = self.collection.find_one({"fields_key": entry["fields_key"], **extra}, {"signature": 0, "bands": 0})
+        if doc is not None:
+            DEDUP_LOOKUPS.inc(source=source, outcome="exact")
+            return self._match(doc, 1.0, {})
+
+        with timed("mongo", op="dedup_lookup"):
+            candidates = list(
+                self.collection.find({"bands": {"$in": entry["bands"]}, **extra}, {"signature": 1}).limit(DEDUP_MAX_SCAN)
+            )
+        best = self._closest(entry, candidates)
+        doc = None
+        if best is not None:
+            doc = self.collection.find_one({"_id": best[0]}, {"signature": 0, "bands": 0})
+        return self._near_match(entry, doc, best, source)
+
+    async def amatch(self, bid: Dict[str, Any], source: str = "lookup",
+                     require: str = None) -> Optional[DuplicateMatch]:
+        """`match` reading through Motor, for the shared event loop."""
+        from services.mongodb_async import AsyncMongoDbOperations
+        entry = self._entry(bid)
+        if entry is None:
+            return None
+        db = AsyncMongoDbOperations(self.collection_name)
+        extra = {require: {"$exists": True}} if require else {}
+        doc = await db.find_one({"fields_key": entry["fields_key"], **extra}, {"signature": 0, "bands": 0},
+                                op="dedup_lookup")
+        if doc is not None:
+            DEDUP_LOOKUPS.inc(source=source, outcome="exact")
+            return self._match(doc, 1.0, {})
+
+        candidates = await db.find_many({"bands": {"$in": entry["bands"]}, **extra}, {"signature": 1},
+                                        limit=DEDUP_MAX_SCAN, op="dedup_lookup")
+        best = self._closest(entry, candidates)
+        doc = None
+        if best is not None:
+            doc = await db.find_one({"_id": best[0]}, {"signature": 0, "bands": 0}, op="dedup_lookup")
+        return self._near_match(entry, doc, best, source)
+
+    @staticmethod
+    def _closest(entry: Dict[str, Any], candidates: List[Dict[str, Any]]) -> Optional[Tuple[Any, float]]:
+        """`_id` and similarity of the best candidate above the threshold, or None."""
+        if not candidates:
+            return None
+        # Estimated Jaccard similarity: share of equal MinHash values
+        signatures = np.stack([np.frombuffer(doc["signature"], dtype="<u4") for doc in candidates])
+        similarities = (signatures == entry["signature"][None, :]).mean(axis=1)
+        best = int(np.argmax(similarities))
+        if similarities[best] < DEDUP_MATCH_THRESHOLD:
+            return None
+        return candidates[best]["_id"], float(similarities[best])
+
+    def _near_match(self, entry: Dict[str, Any], doc: Optional[Dict[str, Any]],
+                    best: Optional[Tuple[Any, float]], source: str) -> Optional[DuplicateMatch]:
+        if doc is None:
+            DEDUP_LOOKUPS.inc(source=source, outcome="miss")
+            return None
+        DEDUP_LOOKUPS.inc(source=source, outcome="near")
+        return self._match(doc, best[1], changed_fields(doc.get("fields") or {}, entry["fields"]))
+
+    @staticmethod
+    def _match(doc: Dict[str, Any], similarity: float, changed: Dict[str, Dict[str, Any]]) -> DuplicateMatch:
+        return DuplicateMatch(
+            bid_id=doc.get("bid_id"),
+            project_id=doc.get("project_id"),
+            bidder_id=doc.get("bidder_id"),
+            similarity=similarity,
+            changed=changed,
+            insights=doc.get("insights"),
+            ai_score=doc.get("aiScore"),
+        )
+
+    def _operation(self, bid: Dict[str, Any], insights: Dict[str, Any] = None, ai_score: int = None,
+                   duplicate_of: Dict[str, Any] = None):
+        entry = self._entry(bid)
+        if entry is None:
+            return None
+        update = {
+            "bid_id": bid.get("bid_id"),
+            "project_id": bid.get("project_id"),
+            "bidder_id": bid.get("bidder_id"),
+            "signature": entry["signature"].astype("<u4").tobytes(),
+            "bands": entry["bands"],
+            "fields": entry["fields"],
+            "fields_key": entry["fields_key"],
+            "indexed_at": datetime.utcnow(),
+        }
+        if insights is not None:
+            update["insights"] = insights
+        if ai_score is not None:
+            update["aiScore"] = ai_score
+        if duplicate_of is not None:
+            update["duplicate_of"] = duplicate_of
+        if not bid.get("bid_id"):
+            # Repeats of an id-less bid replace its entry instead of piling up
+            return UpdateOne({"fields_key": entry["fields_key"], "bid_id": None}, {"$set": update}, upsert=True)
+        return UpdateOne({"bid_id": bid["bid_id"]}, {"$set": update}, upsert=True)
+
+    def add(self, bid: Dict[str, Any], insights: Dict[str, Any] = None, ai_score: int = None,
+            duplicate_of: Dict[str, Any] = None):
+        """Index a bid, replacing the entry with the same `bid_id`."""
+        self.add_many([(bid, insights, ai_score, duplicate_of)])
+
+    def add_many(self, entries: Iterable[Tuple[Dict[str, Any], Optional[Dict[str, Any]], Optional[int], Optional[Dict[str, Any]]]]) -> int:
+        """
+        Index bids with one bulk write.
+
+        Args:
+            entries: (bid, insights, ai_score, duplicate_of) tuples; any but
+                the bid may be None.
+
+        Returns:
+            int: Number of bids indexed.
+        """
+        operations = [op for op in (self._operation(*entry) for entry in entries) if op is not None]
+        if operations:
+            with timed("mongo", op="dedup_write"):
+                self.collection.bulk_write(operations, ordered=False)
+        return len(operations)
+
+    def flagged(self, project_id: str = None, suspicious_only: bool = False, limit: int = 100) -> List[Dict[str, Any]]:
+        """Indexed bids that were flagged as duplicates, newest first."""
+        # Matches the sparse duplicate_of index; unflagged entries are never read
+        query: Dict[str, Any] = {"duplicate_of.suspicious": True if suspicious_only else {"$in": [True, False]}}
+        if project_id:
+            query["project_id"] = project_id
+        projection = {"_id": 0, "bid_id": 1, "project_id": 1, "bidder_id": 1, "duplicate_of": 1, "indexed_at": 1}
+        return list(self.collection.find(query, projection).sort("indexed_at", -1).limit(limit))
+
+    def rebuild(self, batch_size: int = 1000) -> int:
+        """
+        Index every stored bid with its score. Existing entries keep their
+        insights.
+
+        Returns:
+            int: Number of bids indexed.
+        """
+        cursor = get_collection("bids").find({}, {"_id": 0}).batch_size(batch_size)
+        indexed = 0
+        batch = []
+        for bid in cursor:
+            batch.append((bid, None, bid.get("aiScore"), None))
+            if len(batch) >= batch_size:
+                indexed += self.add_many(batch)
+                batch = []
+        if batch:
+            indexed += self.add_many(batch)
+        logger.info(f"Indexed {indexed} bids for near-duplicate detection.")
+        return indexed
+
+
+_index: Optional[BidSimilarityIndex] = None
+_index_lock = Lock()
+
+
+def get_similarity_index() -> Optional[BidSimilarityIndex]:
+    """Return the shared index, or None when DEDUP_ENABLED is false."""
+    global _index
+    if not DEDUP_ENABLED:
+        return None
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = BidSimilarityIndex()
+    return _index
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "rebuild":
+        print(f"Indexed {BidSimilarityIndex().rebuild()} bids.")
+    else:
+        print("Usage: python -m services.dedup rebuild")
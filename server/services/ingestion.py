@@ -0,0 +1,278 @@
+import contextvars
+import json
+import os
+import sys
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+from pydantic import ValidationError
+from models import Bid
+from services.mongodb import MongoDbOperations
+from services.dedup import get_similarity_index
+from services.intelligence import analyze_bid_with_groq, DEFAULT_MAX_WORKERS
+from services.scoring import PRESCORE_ENABLED, prescore_bids, load_project_schools
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+INGEST_CHUNK_SIZE = int(os.environ.get("BID_INGEST_CHUNK_SIZE", 500))
+MAX_INGEST_CHUNK_SIZE = 5000
+REQUIRED_FIELDS = ("provider", "cost", "coverage", "project_id")
+
+
+class InvalidRecord:
+    """Stands in for an NDJSON line that is not valid JSON."""
+
+    __slots__ = ("error",)
+
+    def __init__(self, error: str):
+        self.error = error
+
+
+def _parse_line(line: str) -> Any:
+    try:
+        return json.loads(line)
+    except json.JSONDecodeError as e:
+        return InvalidRecord(f"Invalid JSON: {e}")
+
+
+def parse_bid_records(text: str) -> List[Any]:
+    """
+    Parse a JSON array or newline-delimited JSON (one bid per line).
+
+    NDJSON lines are parsed one by one; a malformed line becomes an
+    `InvalidRecord` at its position, reported as that row's error on
+    ingestion, instead of rejecting the whole upload.
+
+    Raises:
+        ValueError: If a JSON array is malformed or not an array.
+    """
+    stripped = text.lstrip()
+    if stripped.startswith("["):
+        records = json.loads(stripped)
+        if not isinstance(records, list):
+            raise ValueError("Expected a JSON array of bids")
+        return records
+    return [_parse_line(line) for line in text.splitlines() if line.strip()]
+
+
+def read_bid_records(file_path: str) -> List[Any]:
+    """Read raw bid records from a JSON array or NDJSON file."""
+    with open(file_path, "r") as f:
+        return parse_bid_records(f.read())
+
+
+def _missing_fields(record: Any) -> List[str]:
+    if not isinstance(record, dict):
+        return list(REQUIRED_FIELDS)
+    return [name for name in REQUIRED_FIELDS if not record.get(name)]
+
+
+def _given_score(record: Dict[str, Any], trusted_scores: bool) -> Optional[int]:
+    """The row's own `aiScore`, honoured only for trusted server-side loads."""
+    if trusted_scores and isinstance(record.get("aiScore"), int):
+        return record["aiScore"]
+    return None
+
+
+def _prescore(valid: List[Tuple[int, Dict[str, Any]]], trusted_scores: bool = False) -> Dict[int, Dict[str, Any]]:
+    """
+    Rule-score unscored rows. Each bid is scored on its own, as in
+    POST /bids, so the stored score does not depend on the chunk size.
+    """
+    pending = [(index, record) for index, record in valid if _given_score(record, trusted_scores) is None]
+    if not PRESCORE_ENABLED or not pending:
+        return {}
+    schools = load_project_schools({record["project_id"] for _, record in pending})
+    results = prescore_bids([record for _, record in pending], schools, relative=False)
+    return {index: result for (index, _), result in zip(pending, results)}
+
+
+def _score(record: Dict[str, Any], prescore: Optional[Dict[str, Any]], use_cache: bool, match=None,
+           trusted_scores: bool = False) -> int:
+    given = _given_score(record, trusted_scores)
+    if given is not None:
+        return given
+    # Clear-cut bids keep the rule-based score; only ambiguous ones reach the LLM
+    if prescore is not None and not prescore["ambiguous"]:
+        return prescore["aiScore"]
+    # A stored bid with the same scoring fields already has an LLM score
+    if use_cache and match is not None and match.identical and match.ai_score is not None:
+        return match.ai_score
+    ai_result = analyze_bid_with_groq(
+        {name: record[name] for name in REQUIRED_FIELDS},
+        use_cache=use_cache,
+    )
+    return ai_result["aiScore"]
+
+
+def find_duplicate(index, record: Dict[str, Any]):
+    """Closest near-duplicate of a bid in `index`, or None; lookup errors are logged, not raised."""
+    if index is None:
+        return None
+    try:
+        return index.match(record, source="ingest")
+    except Exception as e:
+        logger.warning(f"Near-duplicate lookup failed: {e}")
+        return None
+
+
+async def afind_duplicate(index, record: Dict[str, Any]):
+    """Async `find_duplicate` reading through Motor."""
+    if index is None:
+        return None
+    try:
+        return await index.amatch(record, source="ingest")
+    except Exception as e:
+        logger.warning(f"Near-duplicate lookup failed: {e}")
+        return None
+
+
+def _prepare_chunk(records: List[Any], offset: int, max_workers: int, use_cache: bool,
+                   trusted_scores: bool = False) -> Tuple[List[Bid], List[int], List[Dict[str, Any]], List[Any]]:
+    """
+    Validate and score one chunk; returns bids, their input indexes, row
+    errors and each bid's closest indexed near-duplicate (or None).
+    """
+    errors = []
+    valid = []
+    for position, record in enumerate(records):
+        if isinstance(record, InvalidRecord):
+            errors.append({"index": offset + position, "error": record.error})
+            continue
+        missing = _missing_fields(record)
+        if missing:
+            errors.append({"index": offset + position, "error": f"Missing required bid fields: {', '.join(missing)}"})
+        else:
+            valid.append((offset + position, record))
+
+    prescores = _prescore(valid, trusted_scores)
+    llm_calls = sum(1 for index, record in valid
+                    if _given_score(record, trusted_scores) is None
+                    and (index not in prescores or prescores[index]["ambiguous"]))
+    logger.info(f"Pre-scored {len(prescores)} bids; {llm_calls} ambiguous bids sent to the LLM")
+
+    duplicates = get_similarity_index()
+
+    def score(item):
+        index, record = item
+        # Already-scored trusted rows are only indexed, not looked up
+        given = _given_score(record, trusted_scores) is not None
+        match = None if given else find_duplicate(duplicates, record)
+        try:
+            return index, _score(record, prescores.get(index), use_cache, match, trusted_scores), None, match
+        except Exception as e:
+            return index, None, str(e), match
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(valid) or 1))) as executor:
+        scored = list(executor.map(
+            lambda item, context: context.run(score, item),
+            valid,
+            [contextvars.copy_context() for _ in valid],
+        ))
+
+    bids, indexes, matches = [], [], []
+    for (index, record), (_, ai_score, error, match) in zip(valid, scored):
+        if error is not None:
+            errors.append({"index": index, "error": f"Scoring failed: {error}"})
+            continue
+        try:
+            bids.append(Bid(
+                provider=record["provider"],
+                cost=record["cost"],
+                coverage=record["coverage"],
+                aiScore=ai_score,
+                project_id=record["project_id"],
+                bidder_id=record.get("bidder_id") or "AUTO_GENERATED",
+                bid_id=record.get("bid_id") or f"AUTO_BID_{uuid.uuid4().hex[:12]}",
+            ))
+            indexes.append(index)
+            matches.append(match)
+        except ValidationError as e:
+            errors.append({"index": index, "error": str(e)})
+    return bids, indexes, errors, matches
+
+
+def index_bids(bids: List[Bid], indexes: List[int], matches: List[Any]) -> List[Dict[str, Any]]:
+    """Add stored bids to the near-duplicate index; returns their duplicate flags by input index."""
+    duplicates = get_similarity_index()
+    if duplicates is None or not bids:
+        return []
+    entries, flags = [], []
+    for bid, index, match in zip(bids, indexes, matches):
+        record = bid.model_dump()
+        flag = match.flag(record) if match else None
+        entries.append((record, None, bid.aiScore, flag))
+        if flag:
+            flags.append({"index": index, "bid_id": bid.bid_id, "duplicate_of": flag})
+    try:
+        duplicates.add_many(entries)
+    except Exception as e:
+        logger.warning(f"Could not index {len(entries)} bids for near-duplicate lookup: {e}")
+    return flags
+
+
+def ingest_bids(records: List[Any], chunk_size: int = INGEST_CHUNK_SIZE,
+                max_workers: int = DEFAULT_MAX_WORKERS, use_cache: bool = True,
+                trusted_scores: bool = False) -> Dict[str, Any]:
+    """
+    Validate, score and store bids in chunks.
+
+    Each chunk is scored concurrently and written with one unordered
+    `insert_many`. Invalid or failing rows are reported by input index
+    and do not abort the batch.
+
+    Rows' own `aiScore` values are ignored unless `trusted_scores` is set,
+    which is meant for server-side loads of already-scored data (CLI
+    `--trusted-scores`, benchmark seeding) and is not reachable over HTTP.
+    Such rows are added to the near-duplicate index without a lookup.
+
+    Returns:
+        dict: `received`, `inserted`, `failed` counts, per-row `errors` and
+        `duplicates` flagged by the near-duplicate index.
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be a positive integer")
+    db = MongoDbOperations("bids")
+    inserted = 0
+    errors = []
+    duplicates = []
+    for start in range(0, len(records), chunk_size):
+        bids, indexes, chunk_errors, matches = _prepare_chunk(
+            records[start:start + chunk_size], start, max_workers, use_cache, trusted_scores
+        )
+        errors.extend(chunk_errors)
+        if bids:
+            result = db.store_many(bids, chunk_size=chunk_size)
+            inserted += result["inserted"]
+            errors.extend({"index": indexes[e["index"]], "error": e["error"]} for e in result["errors"])
+            # Index only the bids that were written
+            failed = {e["index"] for e in result["errors"]}
+            stored = [position for position in range(len(bids)) if position not in failed]
+            duplicates.extend(index_bids(
+                [bids[p] for p in stored], [indexes[p] for p in stored], [matches[p] for p in stored]
+            ))
+        logger.info(f"Ingested bids {start}-{start + len(records[start:start + chunk_size]) - 1}: "
+                    f"{inserted} inserted so far, {len(errors)} errors")
+
+    errors.sort(key=lambda e: e["index"])
+    return {"received": len(records), "inserted": inserted, "failed": len(errors), "errors": errors,
+            "duplicates": duplicates}
+
+
+def main():
+    args = [arg for arg in sys.argv[1:] if arg != "--trusted-scores"]
+    if not args:
+        print("Usage: python -m services.ingestion <bids.json|bids.ndjson> [chunk_size] [--trusted-scores]")
+        sys.exit(1)
+
+    records = read_bid_records(args[0])
+    chunk_size = int(args[1]) if len(args) > 1 else INGEST_CHUNK_SIZE
+    logger.info(f"Loaded {len(records)} bid records from {args[0]}")
+
+    summary = ingest_bids(records, chunk_size=chunk_size, trusted_scores="--trusted-scores" in sys.argv)
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+import copy
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from threading import Lock
+from typing import Any, Dict, Optional
+from utils.logger import get_logger
+from utils.metrics import register_collector
+
+logger = get_logger(__name__)
+
+DEFAULT_MAX_ENTRIES = int(os.environ.get("INSIGHT_CACHE_MAX_ENTRIES", 1024))
+DEFAULT_TTL_SECONDS = int(os.environ.get("INSIGHT_CACHE_TTL_SECONDS", 86400))
+PERSISTENT_DEFAULT = os.environ.get("INSIGHT_CACHE_PERSISTENT", "false").lower() == "true"
+
+
+def make_cache_key(payload: Any, prompt: str, model: str) -> str:
+    """
+    Build a content-addressed key from a payload, prompt template and model name.
+
+    The payload is serialized with sorted keys so that field order does not
+    change the key.
+    """
+    canonical = json.dumps(
+        {"payload": payload, "prompt": prompt, "model": model},
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class InsightCache:
+    """
+    Two-tier cache for LLM results.
+
+    An in-process LRU tier answers repeats in microseconds; an optional
+    persistent tier stores entries in the `ai_insights` collection so they
+    survive restarts and are shared between workers.
+
+    Args:
+        namespace: Name separating entry types (e.g. "insights", "score").
+        max_entries: Maximum entries kept in memory.
+        ttl_seconds: Entry lifetime in both tiers. Expired Mongo entries are
+            deleted by the `cached_at_ttl` index (services.mongodb.INDEX_SPECS).
+        persistent: Whether to read and write the Mongo tier.
+    """
+
+    def __init__(self, namespace: str, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 ttl_seconds: int = DEFAULT_TTL_SECONDS, persistent: bool = PERSISTENT_DEFAULT,
+                 collection_name: str = "ai_insights"):
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.persistent = persistent
+        self.collection_name = collection_name
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.persistent_hits = 0
+
+    def _collection(self):
+        from services.mongodb import get_collection
+        return get_collection(self.collection_name)
+
+    def _memory_get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return copy.deepcopy(value)
+                del self._entries[key]
+        return None
+
+    def _persistent_query(self, key: str) -> Dict[str, Any]:
+        return {
+            "cache_key": key,
+            "cache_namespace": self.namespace,
+            "cached_at": {"$gte": datetime.utcnow() - timedelta(seconds=self.ttl_seconds)},
+        }
+
+    def _persistent_result(self, key: str, doc: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Count a persistent-tier lookup and promote a hit to the memory tier."""
+        if doc is None:
+            with self._lock:
+                self.misses += 1
+            return None
+        self._remember(key, doc["value"])
+        with self._lock:
+            self.hits += 1
+            self.persistent_hits += 1
+        return copy.deepcopy(doc["value"])
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return a copy of the cached value, or None on a miss or expiry."""
+        value = self._memory_get(key)
+        if value is not None:
+            return value
+        doc = None
+        if self.persistent:
+            try:
+                doc = self._collection().find_one(self._persistent_query(key), {"_id": 0, "value": 1})
+            except Exception as e:
+                logger.warning(f"Insight cache lookup failed for '{self.namespace}': {e}")
+        return self._persistent_result(key, doc)
+
+    async def aget(self, key: str) -> Optional[Dict[str, Any]]:
+        """Async `get`; the persistent tier is read through Motor."""
+        value = self._memory_get(key)
+        if value is not None:
+            return value
+        doc = None
+        if self.persistent:
+            from services.mongodb_async import AsyncMongoDbOperations
+            try:
+                doc = await AsyncMongoDbOperations(self.collection_name).find_one(
+                    self._persistent_query(key), {"_id": 0, "value": 1}, op="insight_cache_get",
+                )
+            except Exception as e:
+                logger.warning(f"Insight cache lookup failed for '{self.namespace}': {e}")
+        return self._persistent_result(key, doc)
+
+    def _remember(self, key: str, value: Dict[str, Any]):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, copy.deepcopy(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def set(self, key: str, value: Dict[str, Any]):
+        """Store a value in the memory tier and, if enabled, the Mongo tier."""
+        self._remember(key, value)
+        if self.persistent:
+            try:
+                self._collection().update_one(
+                    {"cache_key": key, "cache_namespace": self.namespace},
+                    {"$set": {"value": value, "cached_at": datetime.utcnow()}},
+                    upsert=True,
+                )
+            except Exception as e:
+                logger.warning(f"Insight cache write failed for '{self.namespace}': {e}")
+
+    async def aset(self, key: str, value: Dict[str, Any]):
+        """Async `set`; the persistent tier is written through Motor."""
+        self._remember(key, value)
+        if self.persistent:
+            from services.mongodb_async import AsyncMongoDbOperations
+            try:
+                await AsyncMongoDbOperations(self.collection_name).update_one(
+                    {"cache_key": key, "cache_namespace": self.namespace},
+                    {"$set": {"value": value, "cached_at": datetime.utcnow()}},
+                    upsert=True,
+                    op="insight_cache_set",
+                )
+            except Exception as e:
+                logger.warning(f"Insight cache write failed for '{self.namespace}': {e}")
+
+    def clear(self):
+        """Drop all in-memory entries and reset counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.persistent_hits = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return size and hit/miss counters."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "namespace": self.namespace,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "persistent": self.persistent,
+                "hits": self.hits,
+                "persistent_hits": self.persistent_hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+_caches: Dict[str, InsightCache] = {}
+_caches_lock = Lock()
+
+
+def get_insight_cache(namespace: str) -> InsightCache:
+    """Return the process-wide cache for a namespace."""
+    with _caches_lock:
+        cache = _caches.get(namespace)
+        if cache is None:
+            cache = InsightCache(namespace)
+            _caches[namespace] = cache
+        return cache
+
+
+def all_cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Return stats for every cache created in this process."""
+    with _caches_lock:
+        caches = list(_caches.values())
+    return {cache.namespace: cache.stats() for cache in caches}
+
+
+def _cache_metrics():
+    lines = [
+        "# HELP bidwise_insight_cache_lookups_total LLM insight cache lookups, by result.",
+        "# TYPE bidwise_insight_cache_lookups_total counter",
+    ]
+    gauges = [
+        "# HELP bidwise_insight_cache_hit_ratio LLM insight cache hit ratio.",
+        "# TYPE bidwise_insight_cache_hit_ratio gauge",
+    ]
+    for namespace, stats in all_cache_stats().items():
+        lines.append(f'bidwise_insight_cache_lookups_total{{namespace="{namespace}",result="hit"}} {stats["hits"]}')
+        lines.append(f'bidwise_insight_cache_lookups_total{{namespace="{namespace}",result="miss"}} {stats["misses"]}')
+        gauges.append(f'bidwise_insight_cache_hit_ratio{{namespace="{namespace}"}} {stats["hit_rate"]}')
+    return lines + gauges
+
+
+register_collector(_cache_metrics)
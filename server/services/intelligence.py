@@ -1,163 +1,477 @@
+import asyncio
+import contextvars
 import json
 import os
+import time
 import logging
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime
-from typing import List, Dict, Any
-from agents.ai_engines import AiEngines
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import JsonOutputParser
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+from agents.llm_router import routed_llm
 from services.mongodb import MongoDbOperations
-from models import Bid
+from models import Bid, BidInsights, BidScore
+from services.dedup import DEDUP_MAX_DIFF_FIELDS, DEDUP_INSIGHTS, get_similarity_index
+from services.insight_cache import get_insight_cache, make_cache_key
+from services.prompting import compact_json, prepare_bid_prompt, count_tokens
+from services.structured_output import json_mode, parse_or_repair, aparse_or_repair
+from utils.metrics import timed
+from utils.logger import get_logger, truncate
+
+logger = get_logger(__name__)
+
+# Worker count for analyze_all_bids; 1 restores sequential analysis.
+DEFAULT_MAX_WORKERS = int(os.environ.get("ANALYSIS_MAX_WORKERS", 8))
+# In-flight LLM calls for the async analysis path; these cost no threads.
+DEFAULT_MAX_CONCURRENCY = int(os.environ.get("ANALYSIS_MAX_CONCURRENCY", 100))
+# Completion budget reserved against the tokens-per-minute limit for each call.
+EXPECTED_COMPLETION_TOKENS = int(os.environ.get("ANALYSIS_EXPECTED_COMPLETION_TOKENS", 1024))
+
+INSIGHTS_SYSTEM_PROMPT = """You are an expert bid analyst for a UNICEF school connectivity project. 
+                Carefully analyze the following bid details and generate a comprehensive JSON report 
+                that provides strategic insights, technical evaluation, and recommendations.
+
+                Key areas to focus:
+                - Detailed technical capabilities assessment
+                - Financial analysis and cost-effectiveness
+                - Risk evaluation
+                - Strategic recommendations
+                - Compliance and certification review
+
+                Ensure the output is a structured JSON matching the specified schema."""
+
+UPDATE_SYSTEM_PROMPT = """You are an expert bid analyst for a UNICEF school connectivity project.
+    Below is your JSON report for a bid and the fields that changed in a revised
+    submission of it. Return the complete JSON report updated for these changes,
+    with the same structure. Keep sections the changes do not affect as they are."""
+
+SCORE_SYSTEM_PROMPT = """You are an AI specialized in analyzing connectivity project bids.
+    Output a JSON with an integer 'aiScore' key, rating cost-effectiveness, coverage, and quality.
+    Example:
+    {
+      "aiScore": 85,
+      "analysis": "..."
+    }
+    """
+
+
+def _model_name(llm) -> str:
+    return getattr(llm, "model_name", None) or getattr(llm, "model", None) or type(llm).__name__
+
 
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
+def _engine(message) -> str:
+    """Engine that answered a routed call, for log and metric labels."""
+    return (getattr(message, "response_metadata", None) or {}).get("engine", "unknown")
+
+
+def _prior_insights(match) -> Dict[str, Any]:
+    """A near-duplicate's insights without the identifiers of the bid they were made for."""
+    return {key: value for key, value in match.insights.items()
+            if key not in ("project_id", "bidder_id", "bid_id", "duplicate_of")}
+
+
+def _reuse_plan(match) -> Optional[str]:
+    """
+    How to serve insights from a near-duplicate: "reused" when every scoring
+    field is equal, "updated" when only a few changed, None to analyze.
+    """
+    if match is None or match.insights is None:
+        return None
+    if match.identical:
+        return "reused"
+    if len(match.changed) <= DEDUP_MAX_DIFF_FIELDS:
+        return "updated"
+    return None
+
+
+def _update_messages(match) -> Tuple[List[Dict[str, str]], int]:
+    """Messages asking the model to revise prior insights for the changed fields only."""
+    user_prompt = (f"Previous report: {compact_json(_prior_insights(match))}\n\n"
+                   f"Changed fields: {compact_json(match.changed)}")
+    messages = [
+        {"role": "system", "content": UPDATE_SYSTEM_PROMPT},
+        {"role": "user", "content": user_prompt}
+    ]
+    return messages, count_tokens(UPDATE_SYSTEM_PROMPT) + count_tokens(user_prompt) + EXPECTED_COMPLETION_TOKENS
+
+
+def _insights_error(bid_data: Dict[str, Any], error: Exception) -> Dict[str, Any]:
+    logger.error(f"Error generating insights for bid {bid_data.get('bid_id', 'UNKNOWN')}: {error}")
+    return {
+        'project_id': bid_data.get('project_id', 'UNKNOWN'),
+        'bidder_id': bid_data.get('bidder_id', 'UNKNOWN'),
+        'bid_id': bid_data.get('bid_id', 'UNKNOWN'),
+        'error': str(error)
+    }
 
 
 class BidAnalyzer:
     def __init__(self, api_key: str = None):
-        self.llm = AiEngines.groq_api()
-        self.output_parser = JsonOutputParser()
-        self.db = MongoDbOperations()
-        self.db.collection_name = "ai_insights"
-
-    def generate_bid_insights(self, bid_data: Dict[str, Any]) -> Dict[str, Any]:
+        from langchain_core.prompts import ChatPromptTemplate
+        # Calls go through the "insights" route (LLM_ROUTE_INSIGHTS), which
+        # handles deadlines, hedging, failover, rate limits and usage metrics.
+        # The response is parsed separately so a bad parse can be repaired
+        # without re-analyzing.
+        self.llm = json_mode(routed_llm("insights"))
+        self.prompt = ChatPromptTemplate.from_messages([
+            ("system", INSIGHTS_SYSTEM_PROMPT),
+            ("human", "Bid Details: {bid_data}")
+        ])
+        self.db = MongoDbOperations("ai_insights")
+        self.cache = get_insight_cache("insights")
+        # Near-duplicate index; None when DEDUP_ENABLED is false
+        self.duplicates = get_similarity_index()
+        self.last_run_stats: Optional[Dict[str, Any]] = None
+
+    def generate_bid_insights(self, bid_data: Dict[str, Any], use_cache: bool = True) -> Dict[str, Any]:
         """
         Generate comprehensive AI insights for a given bid
 
         Args:
             bid_data (Dict): Single bid data dictionary
+            use_cache (bool): Set to False to bypass the insight cache
 
         Returns:
             Dict: Comprehensive AI-generated insights
         """
         try:
-            # Create a prompt template for AI analysis
-            prompt = ChatPromptTemplate.from_messages([
-                ("system", """You are an expert bid analyst for a UNICEF school connectivity project. 
-                Carefully analyze the following bid details and generate a comprehensive JSON report 
-                that provides strategic insights, technical evaluation, and recommendations.
+            cache_key = make_cache_key(bid_data, INSIGHTS_SYSTEM_PROMPT, _model_name(self.llm))
+            if use_cache:
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    return cached
+
+            # Reuse or revise the insights of a near-identical bid; with the
+            # cache bypassed the bid is analyzed afresh, but still flagged
+            match = self._find_duplicate(bid_data)
+            plan = _reuse_plan(match) if use_cache else None
+            if plan == "reused":
+                parsed = BidInsights.model_validate(_prior_insights(match))
+            elif plan == "updated":
+                messages, tokens = _update_messages(match)
+                with timed("llm", op="insights_update"):
+                    message = self.llm.invoke(messages, tokens=tokens)
+                parsed = parse_or_repair(message, BidInsights, self.llm, "insights_update", _engine(message), tokens)
+            else:
+                # Send only the scoring fields, compactly serialized and within budget
+                prepared = prepare_bid_prompt(bid_data, prompt="insights")
+                tokens = count_tokens(INSIGHTS_SYSTEM_PROMPT) + prepared.tokens + EXPECTED_COMPLETION_TOKENS
+
+                # Generate insights with additional context
+                with timed("llm", op="insights"):
+                    message = self.llm.invoke(self.prompt.format_messages(bid_data=prepared.text), tokens=tokens)
+                parsed = parse_or_repair(message, BidInsights, self.llm, "insights", _engine(message), tokens)
+            insights = self._with_metadata(parsed, bid_data, match, plan)
+            self.cache.set(cache_key, insights)
+            self._index_bid(bid_data, insights, match)
+            return insights
 
-                Key areas to focus:
-                - Detailed technical capabilities assessment
-                - Financial analysis and cost-effectiveness
-                - Risk evaluation
-                - Strategic recommendations
-                - Compliance and certification review
+        except Exception as e:
+            return _insights_error(bid_data, e)
 
-                Ensure the output is a structured JSON matching the specified schema."""),
-                ("human", "Bid Details: {bid_data}")
-            ])
+    async def agenerate_bid_insights(self, bid_data: Dict[str, Any], use_cache: bool = True) -> Dict[str, Any]:
+        """
+        Async variant of `generate_bid_insights` using `ainvoke`. Waiting on
+        the provider and the rate limiter does not hold a thread.
+        """
+        try:
+            cache_key = make_cache_key(bid_data, INSIGHTS_SYSTEM_PROMPT, _model_name(self.llm))
+            if use_cache:
+                cached = await self.cache.aget(cache_key)
+                if cached is not None:
+                    return cached
+
+            match = await self._afind_duplicate(bid_data)
+            plan = _reuse_plan(match) if use_cache else None
+            if plan == "reused":
+                parsed = BidInsights.model_validate(_prior_insights(match))
+            elif plan == "updated":
+                messages, tokens = _update_messages(match)
+                with timed("llm", op="insights_update"):
+                    message = await self.llm.ainvoke(messages, tokens=tokens)
+                parsed = await aparse_or_repair(message, BidInsights, self.llm, "insights_update", _engine(message), tokens)
+            else:
+                prepared = prepare_bid_prompt(bid_data, prompt="insights")
+                tokens = count_tokens(INSIGHTS_SYSTEM_PROMPT) + prepared.tokens + EXPECTED_COMPLETION_TOKENS
+
+                with timed("llm", op="insights"):
+                    message = await self.llm.ainvoke(self.prompt.format_messages(bid_data=prepared.text), tokens=tokens)
+                parsed = await aparse_or_repair(message, BidInsights, self.llm, "insights", _engine(message), tokens)
+            insights = self._with_metadata(parsed, bid_data, match, plan)
+            await self.cache.aset(cache_key, insights)
+            if self.duplicates:
+                await asyncio.to_thread(self._index_bid, bid_data, insights, match)
+            return insights
 
-            # Create the chain
-            chain = prompt | self.llm | self.output_parser
+        except Exception as e:
+            return _insights_error(bid_data, e)
 
-            # Generate insights with additional context
-            insights = chain.invoke({
-                "bid_data": json.dumps(bid_data)
-            })
+    def _find_duplicate(self, bid_data: Dict[str, Any]):
+        if self.duplicates is None:
+            return None
+        try:
+            return self.duplicates.match(bid_data, source="insights", require="insights")
+        except Exception as e:
+            # The index only saves work; analysis goes ahead without it
+            logger.warning(f"Near-duplicate lookup failed for bid {bid_data.get('bid_id', 'UNKNOWN')}: {e}")
+            return None
 
-            logger.info(f"Insights..... {insights}")
+    async def _afind_duplicate(self, bid_data: Dict[str, Any]):
+        if self.duplicates is None:
+            return None
+        try:
+            return await self.duplicates.amatch(bid_data, source="insights", require="insights")
+        except Exception as e:
+            logger.warning(f"Near-duplicate lookup failed for bid {bid_data.get('bid_id', 'UNKNOWN')}: {e}")
+            return None
 
-            # Ensure insights is a dictionary
-            if not isinstance(insights, dict):
-                insights = {}
+    def _index_bid(self, bid_data: Dict[str, Any], insights: Dict[str, Any], match):
+        if self.duplicates is None:
+            return
+        try:
+            self.duplicates.add(bid_data, insights=insights, duplicate_of=match.flag(bid_data) if match else None)
+        except Exception as e:
+            logger.warning(f"Could not index bid {bid_data.get('bid_id', 'UNKNOWN')} for near-duplicate lookup: {e}")
+
+    def _with_metadata(self, parsed: BidInsights, bid_data: Dict[str, Any], match=None,
+                       plan: Optional[str] = None) -> Dict[str, Any]:
+        insights = parsed.model_dump(exclude_none=True)
+        if self.duplicates is not None:
+            DEDUP_INSIGHTS.inc(mode=plan or "analyzed")
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Insights for bid %s: %s", bid_data.get('bid_id', 'UNKNOWN'), truncate(insights))
+
+        # Inject additional metadata
+        insights['project_id'] = bid_data.get('project_id', 'UNKNOWN')
+        insights['bidder_id'] = bid_data.get('bidder_id', 'UNKNOWN')
+        insights['bid_id'] = bid_data.get('bid_id', 'UNKNOWN')
+        if plan:
+            insights['duplicate_of'] = {
+                'bid_id': match.bid_id,
+                'similarity': round(match.similarity, 3),
+                'changed_fields': sorted(match.changed),
+                'mode': plan,
+            }
+        return insights
 
-            # Inject additional metadata
-            insights['project_id'] = bid_data.get('project_id', 'UNKNOWN')
-            insights['bidder_id'] = bid_data.get('bidder_id', 'UNKNOWN')
-            insights['bid_id'] = bid_data.get('bid_id', 'UNKNOWN')
+    def _timed_insights(self, bid_data: Dict[str, Any], use_cache: bool = True) -> Tuple[Dict[str, Any], float]:
+        start = time.perf_counter()
+        insights = self.generate_bid_insights(bid_data, use_cache=use_cache)
+        return insights, (time.perf_counter() - start) * 1000
 
-            return insights
+    def iter_bid_insights(self, bids: List[Dict[str, Any]], max_workers: int = None,
+                          use_cache: bool = True) -> Iterator[Tuple[int, Dict[str, Any], float]]:
+        """
+        Analyze bids concurrently and yield results in completion order.
 
-        except Exception as e:
-            logger.error(f"Error generating insights for bid {bid_data.get('bid_id', 'UNKNOWN')}: {e}")
-            return {
-                'project_id': bid_data.get('project_id', 'UNKNOWN'),
-                'bidder_id': bid_data.get('bidder_id', 'UNKNOWN'),
-                'bid_id': bid_data.get('bid_id', 'UNKNOWN'),
-                'error': str(e)
-            }
+        At most `max_workers` bids are in flight; the next one is submitted
+        as each result is yielded. Closing the generator early (e.g. when a
+        stream client disconnects) cancels the bids not yet started.
+
+        Args:
+            bids (List[Dict]): List of bid dictionaries
+            max_workers (int): Maximum concurrent LLM calls (defaults to ANALYSIS_MAX_WORKERS)
+            use_cache (bool): Set to False to bypass the insight cache
 
-    def analyze_all_bids(self, bids: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        Yields:
+            Tuple[int, Dict, float]: Input index, insights and call latency in ms
         """
-        Analyze all bids in the provided list
+        workers = max(1, min(max_workers or DEFAULT_MAX_WORKERS, len(bids) or 1))
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bid-analysis")
+        pending = iter(enumerate(bids))
+        futures = {}
+
+        def submit_next():
+            item = next(pending, None)
+            if item is not None:
+                index, bid = item
+                # Each task runs in a copy of the caller's context so stage
+                # timings reach the request's Server-Timing breakdown
+                future = executor.submit(contextvars.copy_context().run, self._timed_insights, bid, use_cache)
+                futures[future] = index
+
+        try:
+            for _ in range(workers):
+                submit_next()
+            while futures:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    insights, latency = future.result()
+                    # Drop the finished future so streamed results are not retained
+                    index = futures.pop(future)
+                    submit_next()
+                    yield index, insights, latency
+        finally:
+            # Runs on early close too: do not wait for, or start, abandoned bids
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def analyze_all_bids(self, bids: List[Dict[str, Any]], max_workers: int = None,
+                         use_cache: bool = True) -> List[Dict[str, Any]]:
+        """
+        Analyze all bids in the provided list concurrently.
+
+        Output order matches input order and a failing bid only affects its own
+        entry. Timing for the run is kept in `self.last_run_stats`.
 
         Args:
             bids (List[Dict]): List of bid dictionaries
+            max_workers (int): Maximum concurrent LLM calls (defaults to ANALYSIS_MAX_WORKERS)
+            use_cache (bool): Set to False to bypass the insight cache
 
         Returns:
             List[Dict]: List of AI-generated bid insights
         """
-        return [self.generate_bid_insights(bid) for bid in bids]
+        workers = max(1, min(max_workers or DEFAULT_MAX_WORKERS, len(bids) or 1))
+        start = time.perf_counter()
+        if workers == 1:
+            results = [self._timed_insights(bid, use_cache) for bid in bids]
+        else:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bid-analysis") as executor:
+                results = list(executor.map(
+                    lambda bid, context: context.run(self._timed_insights, bid, use_cache),
+                    bids,
+                    [contextvars.copy_context() for _ in bids],
+                ))
+        wall_time_ms = (time.perf_counter() - start) * 1000
+
+        self.last_run_stats = {
+            "bids": len(bids),
+            "workers": workers,
+            "wall_time_ms": round(wall_time_ms, 1),
+            "latencies_ms": [
+                {"bid_id": insights.get("bid_id"), "latency_ms": round(latency, 1)}
+                for insights, latency in results
+            ],
+        }
+        logger.info(f"Analyzed {len(bids)} bids with {workers} workers in {wall_time_ms:.0f} ms")
+        return [insights for insights, _ in results]
+
+    async def aanalyze_all_bids(self, bids: List[Dict[str, Any]], max_concurrency: int = None,
+                                use_cache: bool = True) -> List[Dict[str, Any]]:
+        """
+        Async variant of `analyze_all_bids`: all bids are in flight on one
+        event loop, bounded by a semaphore instead of a thread pool.
+
+        Args:
+            bids (List[Dict]): List of bid dictionaries
+            max_concurrency (int): Maximum in-flight LLM calls (defaults to ANALYSIS_MAX_CONCURRENCY)
+            use_cache (bool): Set to False to bypass the insight cache
+
+        Returns:
+            List[Dict]: List of AI-generated bid insights, in input order
+        """
+        concurrency = max(1, min(max_concurrency or DEFAULT_MAX_CONCURRENCY, len(bids) or 1))
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def timed_insights(bid):
+            async with semaphore:
+                call_start = time.perf_counter()
+                insights = await self.agenerate_bid_insights(bid, use_cache=use_cache)
+                return insights, (time.perf_counter() - call_start) * 1000
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*(timed_insights(bid) for bid in bids))
+        wall_time_ms = (time.perf_counter() - start) * 1000
+
+        self.last_run_stats = {
+            "bids": len(bids),
+            "workers": concurrency,
+            "wall_time_ms": round(wall_time_ms, 1),
+            "latencies_ms": [
+                {"bid_id": insights.get("bid_id"), "latency_ms": round(latency, 1)}
+                for insights, latency in results
+            ],
+        }
+        logger.info(f"Analyzed {len(bids)} bids with {concurrency} concurrent calls in {wall_time_ms:.0f} ms")
+        return [insights for insights, _ in results]
 
 
 def load_bids(file_path: str) -> List[Bid]:
     """
-    Load bids from a JSON file
+    Load bids from a JSON array or NDJSON file
 
     Args:
-        file_path (str): Path to the JSON file containing bids
+        file_path (str): Path to the file containing bids
 
     Returns:
         List[Bid]: List of bid instances
     """
-    with open(file_path, 'r') as f:
-        bids_data = json.load(f)
-    return [Bid(**bid) for bid in bids_data]
+    from services.ingestion import InvalidRecord, read_bid_records
+    records = read_bid_records(file_path)
+    for record in records:
+        if isinstance(record, InvalidRecord):
+            raise ValueError(record.error)
+    return [Bid(**bid) for bid in records]
+
+
+def _score_messages(bid_data: Dict[str, Any]) -> Tuple[List[Dict[str, str]], int]:
+    """Build the scoring messages and their token count."""
+    prepared = prepare_bid_prompt(bid_data, prompt="score")
+    user_prompt = f"Bid Details: {prepared.text}"
+    messages = [
+        {"role": "system", "content": SCORE_SYSTEM_PROMPT},
+        {"role": "user", "content": user_prompt}
+    ]
+    return messages, count_tokens(SCORE_SYSTEM_PROMPT) + count_tokens(user_prompt)
+
+
+def analyze_bid_with_groq(bid_data: Dict[str, Any], use_cache: bool = True) -> Dict[str, Any]:
+    """
+    Score a single bid, returning a dict with an integer 'aiScore' and an
+    'analysis'. Parsed results are cached by bid content unless `use_cache`
+    is False.
 
+    Scoring goes through the "score" route (LLM_ROUTE_SCORE), which tries
+    the cheapest, fastest model first and fails over to larger ones.
 
-def analyze_bid_with_groq(bid_data: Dict[str, Any]) -> Dict[str, Any]:
-    """
-    Example function that calls your ChatGroq chain
-    to produce a JSON with an 'aiScore' key (and other analysis if desired).
+    Raises:
+        StructuredOutputError: If the response cannot be parsed, even after a repair call.
+        NoEngineAvailable: If no engine answered before the deadline.
     """
 
-    # 1. Initialize your AI LLM (ChatGroq) from AiEngines
-    llm = AiEngines.groq_api()
+    # 1. Get the routed LLM handle
+    llm = json_mode(routed_llm("score"))
+
+    cache = get_insight_cache("score")
+    cache_key = make_cache_key(bid_data, SCORE_SYSTEM_PROMPT, _model_name(llm))
+    if use_cache:
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
 
     # 2. Build your prompt
-    # For instance, you can use a simple string or your custom chain.
-    system_prompt = """You are an AI specialized in analyzing connectivity project bids.
-    Output a JSON with an integer 'aiScore' key, rating cost-effectiveness, coverage, and quality.
-    Example:
-    {
-      "aiScore": 85,
-      "analysis": "..."
-    }
-    """
+    messages, prompt_tokens = _score_messages(bid_data)
+
+    # 3. Call the LLM
+    tokens = prompt_tokens + EXPECTED_COMPLETION_TOKENS
+    with timed("llm", op="score"):
+        response = llm.invoke(messages, tokens=tokens)
+
+    # 4. Validate the JSON, with a short repair call if needed
+    analysis = parse_or_repair(response, BidScore, llm, "score", _engine(response), tokens).model_dump()
+    cache.set(cache_key, analysis)
+    return analysis
+
+
+async def aanalyze_bid_with_groq(bid_data: Dict[str, Any], use_cache: bool = True) -> Dict[str, Any]:
+    """Async variant of `analyze_bid_with_groq` using `ainvoke`."""
+    llm = json_mode(routed_llm("score"))
+
+    cache = get_insight_cache("score")
+    cache_key = make_cache_key(bid_data, SCORE_SYSTEM_PROMPT, _model_name(llm))
+    if use_cache:
+        cached = await cache.aget(cache_key)
+        if cached is not None:
+            return cached
+
+    messages, prompt_tokens = _score_messages(bid_data)
 
-    user_prompt = f"Bid Details: {json.dumps(bid_data)}"
-
-    # 3. Call the LLM - a minimal example (no advanced chain or JSON parser)
-    # You can integrate your existing chain if you prefer.
-    response = llm.invoke(
-        [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt}
-        ]
-    )
-
-    logger.info("Raw AI Response: %s", response)
-
-    # 4. Attempt to parse out the JSON
-    # We'll do a naive approach: find a JSON block in the response
-    # If your chain is well-structured, you can parse it more elegantly.
-    # Or you can use your existing "JsonOutputParser" from your code.
-    analysis = {}
-    try:
-        # If response is raw text, we do a simple parse.
-        # For a robust approach, see your existing 'JsonOutputParser'.
-        analysis = json.loads(response)
-    except Exception as e:
-        logger.error("Failed to parse AI response as JSON: %s", e)
-        # fallback to a default
-        analysis = {"aiScore": 60, "analysis": "Default fallback score."}
-
-    # Ensure we have an integer aiScore
-    if not isinstance(analysis.get("aiScore"), int):
-        logger.warning("No valid 'aiScore' found; defaulting to 70.")
-        analysis["aiScore"] = 70
+    tokens = prompt_tokens + EXPECTED_COMPLETION_TOKENS
+    with timed("llm", op="score"):
+        response = await llm.ainvoke(messages, tokens=tokens)
 
+    analysis = (await aparse_or_repair(response, BidScore, llm, "score", _engine(response), tokens)).model_dump()
+    await cache.aset(cache_key, analysis)
     return analysis
 
 
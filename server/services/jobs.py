@@ -0,0 +1,205 @@
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from threading import Event, Lock, Thread
+from typing import Any, Dict, List, Optional
+from services.mongodb import MongoDbOperations
+from utils.logger import get_logger, request_id_var
+
+logger = get_logger(__name__)
+
+JOB_WORKERS = int(os.environ.get("ANALYSIS_JOB_WORKERS", 2))
+JOBS_COLLECTION = "analysis_jobs"
+# Each process refreshes `heartbeat_at` on its unfinished jobs this often.
+# Jobs whose heartbeat is older than JOB_STALE_SECONDS belonged to a worker
+# that crashed or was killed, and are marked failed.
+JOB_HEARTBEAT_SECONDS = float(os.environ.get("ANALYSIS_JOB_HEARTBEAT_SECONDS", 15))
+JOB_STALE_SECONDS = float(os.environ.get("ANALYSIS_JOB_STALE_SECONDS", 120))
+UNFINISHED = ("queued", "running")
+
+
+def _stale_cutoff() -> datetime:
+    return datetime.utcnow() - timedelta(seconds=JOB_STALE_SECONDS)
+
+
+def _stale_filter(query: Dict[str, Any] = None) -> Dict[str, Any]:
+    return {**(query or {}), "status": {"$in": list(UNFINISHED)}, "heartbeat_at": {"$lt": _stale_cutoff()}}
+
+
+def _stale_update() -> Dict[str, Any]:
+    now = datetime.utcnow()
+    return {"$set": {
+        "status": "failed",
+        "error": "The worker running this job stopped before it finished.",
+        "finished_at": now,
+        "updated_at": now,
+    }}
+
+
+def fail_stale_jobs() -> int:
+    """Mark unfinished jobs whose worker stopped heartbeating as failed."""
+    result = MongoDbOperations(JOBS_COLLECTION).collection.update_many(_stale_filter(), _stale_update())
+    if result.modified_count:
+        logger.warning(f"Marked {result.modified_count} stale analysis jobs as failed.")
+    return result.modified_count
+
+
+class AnalysisJobManager:
+    """
+    Runs bid analysis jobs on an in-process worker pool.
+
+    Job state and per-bid results are written to the `analysis_jobs`
+    collection as they complete, so any worker process can serve status
+    and result polls. A heartbeat thread keeps `heartbeat_at` fresh on
+    this process's unfinished jobs; jobs left behind by a dead worker are
+    failed on startup and when they are read.
+    """
+
+    def __init__(self, max_workers: int = JOB_WORKERS):
+        self.db = MongoDbOperations(JOBS_COLLECTION)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="analysis-job")
+        self._active = set()
+        self._lock = Lock()
+        self._stopped = Event()
+        try:
+            fail_stale_jobs()
+        except Exception as e:
+            logger.warning(f"Could not check for stale analysis jobs: {e}")
+        self._heartbeat = Thread(target=self._beat, name="analysis-job-heartbeat", daemon=True)
+        self._heartbeat.start()
+
+    def _beat(self):
+        while not self._stopped.wait(JOB_HEARTBEAT_SECONDS):
+            with self._lock:
+                active = list(self._active)
+            if not active:
+                continue
+            try:
+                self.db.collection.update_many(
+                    {"job_id": {"$in": active}, "status": {"$in": list(UNFINISHED)}},
+                    {"$set": {"heartbeat_at": datetime.utcnow()}},
+                )
+            except Exception as e:
+                logger.warning(f"Analysis job heartbeat failed: {e}")
+
+    def submit(self, bids: List[Dict[str, Any]], max_workers: int = None, use_cache: bool = True) -> str:
+        """
+        Record a new job and queue it for background analysis.
+
+        Returns:
+            str: The job id.
+        """
+        job_id = uuid.uuid4().hex
+        now = datetime.utcnow()
+        self.db.store_data({
+            "job_id": job_id,
+            "status": "queued",
+            "total": len(bids),
+            "completed": 0,
+            "failed": 0,
+            "results": [None] * len(bids),
+            "error": None,
+            "created_at": now,
+            "updated_at": now,
+            "heartbeat_at": now,
+        })
+        with self._lock:
+            self._active.add(job_id)
+        self.executor.submit(self._run, job_id, bids, max_workers, use_cache)
+        return job_id
+
+    def _run(self, job_id: str, bids: List[Dict[str, Any]], max_workers: Optional[int], use_cache: bool):
+        from services.intelligence import BidAnalyzer
+
+        collection = self.db.collection
+        # Tag the job's log records with its id
+        request_id_var.set(job_id)
+        try:
+            collection.update_one(
+                {"job_id": job_id},
+                {"$set": {"status": "running", "started_at": datetime.utcnow(), "updated_at": datetime.utcnow()}},
+            )
+            analyzer = BidAnalyzer()
+            for index, insights, latency in analyzer.iter_bid_insights(bids, max_workers, use_cache):
+                collection.update_one(
+                    {"job_id": job_id},
+                    {
+                        "$set": {f"results.{index}": insights, "updated_at": datetime.utcnow()},
+                        "$inc": {"completed": 1, "failed": 1 if "error" in insights else 0},
+                    },
+                )
+            collection.update_one(
+                {"job_id": job_id},
+                {"$set": {"status": "completed", "finished_at": datetime.utcnow(), "updated_at": datetime.utcnow()}},
+            )
+            logger.info(f"Analysis job {job_id} completed ({len(bids)} bids).")
+        except Exception as e:
+            logger.error(f"Analysis job {job_id} failed: {e}")
+            now = datetime.utcnow()
+            collection.update_one(
+                {"job_id": job_id},
+                {"$set": {"status": "failed", "error": str(e), "finished_at": now, "updated_at": now}},
+            )
+        finally:
+            with self._lock:
+                self._active.discard(job_id)
+
+    def get(self, job_id: str, include_results: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Return the job document, optionally without its results array. A
+        job whose worker stopped heartbeating is marked failed first.
+        """
+        projection = {"_id": 0} if include_results else {"_id": 0, "results": 0}
+        job = self.db.collection.find_one({"job_id": job_id}, projection)
+        if job is None or job["status"] not in UNFINISHED or job.get("heartbeat_at", datetime.max) >= _stale_cutoff():
+            return job
+        # The filter re-checks staleness, so a heartbeat that landed meanwhile wins
+        if self.db.collection.update_one(_stale_filter({"job_id": job_id}), _stale_update()).modified_count:
+            job = self.db.collection.find_one({"job_id": job_id}, projection)
+        return job
+
+    def active_jobs(self) -> int:
+        """Number of jobs queued or running in this process."""
+        with self._lock:
+            return len(self._active)
+
+    def shutdown(self, wait: bool = True):
+        """Stop accepting jobs and optionally wait for running ones to finish."""
+        self.executor.shutdown(wait=wait)
+        self._stopped.set()
+
+
+_manager: Optional[AnalysisJobManager] = None
+_manager_lock = Lock()
+
+
+def _reset_after_fork():
+    # The parent's worker threads do not exist in a forked child
+    global _manager
+    _manager = None
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def drain_jobs(wait: bool = True):
+    """
+    Stop the job manager, if one was started, waiting for queued and
+    running jobs to finish. Called on graceful worker shutdown.
+    """
+    global _manager
+    with _manager_lock:
+        manager, _manager = _manager, None
+    if manager is not None:
+        logger.info(f"Draining {manager.active_jobs()} analysis jobs before shutdown.")
+        manager.shutdown(wait=wait)
+
+
+def get_job_manager() -> AnalysisJobManager:
+    """Return the process-wide job manager, creating it on first use."""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = AnalysisJobManager()
+        return _manager
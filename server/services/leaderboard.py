@@ -0,0 +1,151 @@
+import sys
+from typing import Any, Dict, List, Optional
+from pymongo import UpdateOne
+from services.mongodb import MongoDbOperations
+from utils.logger import get_logger
+from utils.numbers import parse_money, parse_percent
+
+logger = get_logger(__name__)
+
+LEADERBOARD_FIELDS = {
+    "_id": 0,
+    "bid_id": 1,
+    "bidder_id": 1,
+    "provider": 1,
+    "cost": 1,
+    "coverage": 1,
+    "aiScore": 1,
+    "cost_value": 1,
+    "coverage_pct": 1,
+    "cost_per_school": 1,
+}
+STAT_FIELDS = ("aiScore", "cost_value", "cost_per_school", "coverage_pct")
+PERCENTILES = [0.25, 0.5, 0.75, 0.9]
+# Sorts missing cost-per-school values last when ranking by lowest cost
+_MISSING_COST = 1e308
+
+
+def _row_output() -> Dict[str, str]:
+    return {name: f"${name}" for name in LEADERBOARD_FIELDS if name != "_id"}
+
+
+def leaderboard_pipeline(project_id: Optional[str] = None, top: int = 10) -> List[Dict[str, Any]]:
+    """
+    Build the aggregation that ranks bids per project and summarizes them.
+
+    Needs MongoDB 7.0+ for `$percentile` (`$topN`/`$bottomN` need 5.2+).
+    """
+    pipeline = []
+    if project_id:
+        pipeline.append({"$match": {"project_id": project_id}})
+    pipeline += [
+        # Bids reference their project by name; schools drive cost per school
+        {"$lookup": {
+            "from": "projects",
+            "localField": "project_id",
+            "foreignField": "name",
+            "pipeline": [{"$project": {"_id": 0, "schools": 1}}],
+            "as": "project",
+        }},
+        {"$set": {"schools": {"$first": "$project.schools"}}},
+        {"$set": {"cost_per_school": {"$cond": [
+            {"$and": [{"$gt": ["$schools", 0]}, {"$isNumber": "$cost_value"}]},
+            {"$divide": ["$cost_value", "$schools"]},
+            None,
+        ]}}},
+        {"$group": {
+            "_id": "$project_id",
+            "bids": {"$sum": 1},
+            "schools": {"$first": "$schools"},
+            "top_ai_score": {"$topN": {"n": top, "sortBy": {"aiScore": -1}, "output": _row_output()}},
+            "top_cost_per_school": {"$topN": {
+                "n": top,
+                "sortBy": {"cost_per_school_sort": 1},
+                "output": _row_output(),
+            }},
+            "top_coverage": {"$topN": {"n": top, "sortBy": {"coverage_pct": -1}, "output": _row_output()}},
+            **{f"{name}_min": {"$min": f"${name}"} for name in STAT_FIELDS},
+            **{f"{name}_max": {"$max": f"${name}"} for name in STAT_FIELDS},
+            **{f"{name}_avg": {"$avg": f"${name}"} for name in STAT_FIELDS},
+            **{
+                f"{name}_percentiles": {"$percentile": {"input": f"${name}", "p": PERCENTILES, "method": "approximate"}}
+                for name in STAT_FIELDS
+            },
+        }},
+        {"$sort": {"_id": 1}},
+    ]
+    # $topN sorts on a field path, so add the null-safe cost key before grouping
+    group_index = next(i for i, stage in enumerate(pipeline) if "$group" in stage)
+    pipeline.insert(group_index, {"$set": {
+        "cost_per_school_sort": {"$ifNull": ["$cost_per_school", _MISSING_COST]},
+    }})
+    return pipeline
+
+
+def _format(group: Dict[str, Any]) -> Dict[str, Any]:
+    stats = {}
+    for name in STAT_FIELDS:
+        percentiles = group.get(f"{name}_percentiles") or [None] * len(PERCENTILES)
+        stats[name] = {
+            "min": group.get(f"{name}_min"),
+            "max": group.get(f"{name}_max"),
+            "mean": group.get(f"{name}_avg"),
+            **{f"p{int(p * 100)}": value for p, value in zip(PERCENTILES, percentiles)},
+        }
+    return {
+        "project_id": group["_id"],
+        "bids": group["bids"],
+        "schools": group.get("schools"),
+        "top": {
+            "aiScore": group["top_ai_score"],
+            "cost_per_school": [row for row in group["top_cost_per_school"] if row.get("cost_per_school") is not None],
+            "coverage": [row for row in group["top_coverage"] if row.get("coverage_pct") is not None],
+        },
+        "stats": stats,
+    }
+
+
+def bid_leaderboard(project_id: Optional[str] = None, top: int = 10) -> List[Dict[str, Any]]:
+    """
+    Return the top-N bids per project by aiScore, cost per school and
+    coverage, with min/max/mean/percentile summaries per metric.
+    """
+    db = MongoDbOperations("bids")
+    return [_format(group) for group in db.collection.aggregate(leaderboard_pipeline(project_id, top))]
+
+
+def backfill_bid_numbers(batch_size: int = 1000) -> int:
+    """
+    Add `cost_value` and `coverage_pct` to bids stored before they were
+    normalized at write time.
+
+    Returns:
+        int: Number of bids updated.
+    """
+    collection = MongoDbOperations("bids").collection
+    cursor = collection.find(
+        {"$or": [{"cost_value": {"$exists": False}}, {"coverage_pct": {"$exists": False}}]},
+        {"_id": 1, "cost": 1, "coverage": 1},
+    ).batch_size(batch_size)
+    updated = 0
+    batch = []
+    for doc in cursor:
+        batch.append(UpdateOne({"_id": doc["_id"]}, {"$set": {
+            "cost_value": parse_money(doc.get("cost")),
+            "coverage_pct": parse_percent(doc.get("coverage")),
+        }}))
+        if len(batch) >= batch_size:
+            updated += collection.bulk_write(batch, ordered=False).modified_count
+            batch = []
+    if batch:
+        updated += collection.bulk_write(batch, ordered=False).modified_count
+    logger.info(f"Backfilled numeric fields on {updated} bids.")
+    return updated
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "backfill":
+        print(f"Updated {backfill_bid_numbers()} bids")
+    else:
+        print("Usage: python -m services.leaderboard backfill")
+        sys.exit(1)
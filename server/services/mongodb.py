@@ -1,41 +1,250 @@
 import pymongo.errors
-from pymongo import MongoClient
+from pymongo import MongoClient, IndexModel, ASCENDING, DESCENDING
 from bson.objectid import ObjectId
 from datetime import datetime, timedelta
+from threading import Lock
 from utils.logger import get_logger
+from utils.metrics import timed
 import os
-from dotenv import load_dotenv
+from utils.config import load_config
 from models import Project, Bid, TrafficData, ProjectProgress
+from services.insight_cache import DEFAULT_TTL_SECONDS as INSIGHT_CACHE_TTL_SECONDS
 from pydantic import BaseModel
 
-load_dotenv()
+load_config()
 # Initialize logger
 logger = get_logger(__name__)
 
+DEFAULT_DATABASE = "app"
+
+# Process-wide client and collection handle registry. MongoClient is thread-safe
+# and maintains its own connection pool, so one instance per process is enough.
+_client = None
+_client_lock = Lock()
+_collections = {}
+
+
+def _client_options() -> dict:
+    """Build MongoClient pool and timeout options from the environment."""
+    return {
+        "maxPoolSize": int(os.environ.get("MONGO_MAX_POOL_SIZE", 100)),
+        "minPoolSize": int(os.environ.get("MONGO_MIN_POOL_SIZE", 0)),
+        "maxIdleTimeMS": int(os.environ.get("MONGO_MAX_IDLE_TIME_MS", 300000)),
+        "connectTimeoutMS": int(os.environ.get("MONGO_CONNECT_TIMEOUT_MS", 5000)),
+        "serverSelectionTimeoutMS": int(os.environ.get("MONGO_SERVER_SELECTION_TIMEOUT_MS", 5000)),
+        "socketTimeoutMS": int(os.environ.get("MONGO_SOCKET_TIMEOUT_MS", 30000)),
+    }
+
+
+def get_client() -> MongoClient:
+    """
+    Return the shared MongoClient, creating it on first use.
+
+    The client connects lazily, so no network round trip happens here.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                if os.environ.get("MONGO_BACKEND") == "mongomock":
+                    # In-memory stand-in for offline benchmarks (pip install mongomock)
+                    import mongomock
+                    logger.info("Creating in-memory mongomock client.")
+                    _client = mongomock.MongoClient()
+                else:
+                    options = _client_options()
+                    logger.info(f"Creating MongoDB client (maxPoolSize={options['maxPoolSize']}).")
+                    with timed("mongo", op="client_init"):
+                        _client = MongoClient(os.environ.get("MONGO_URI"), **options)
+    return _client
+
+
+def get_collection(collection_name: str, database_name: str = None):
+    """Return a cached collection handle from the shared client."""
+    database_name = database_name or os.environ.get("MONGO_DB_NAME", DEFAULT_DATABASE)
+    key = (database_name, str(collection_name))
+    collection = _collections.get(key)
+    if collection is None:
+        client = get_client()
+        with _client_lock:
+            collection = _collections.setdefault(key, client[database_name][str(collection_name)])
+    return collection
+
+
+def check_health() -> bool:
+    """
+    Ping the MongoDB deployment.
+
+    Meant for startup and health endpoints, not for the request path.
+    """
+    try:
+        get_client().admin.command("ping")
+        return True
+    except Exception as e:
+        logger.error(f"MongoDB health check failed: {e}")
+        return False
+
+
+def _reset_after_fork():
+    """MongoClient is not fork-safe: let each forked worker create its own."""
+    global _client
+    _client = None
+    _collections.clear()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def close_client():
+    """Close the shared client and drop cached collection handles."""
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+        _client = None
+        _collections.clear()
+
+
+# Indexes declared per collection and created by ensure_indexes() at startup.
+INDEX_SPECS = {
+    "bids": [
+        IndexModel([("project_id", ASCENDING), ("aiScore", DESCENDING)], name="project_id_aiScore"),
+        IndexModel([("project_id", ASCENDING), ("cost_value", ASCENDING)], name="project_id_cost_value"),
+        IndexModel([("project_id", ASCENDING), ("coverage_pct", DESCENDING)], name="project_id_coverage_pct"),
+    ],
+    "projects": [
+        IndexModel([("name", ASCENDING)], name="name_unique", unique=True),
+    ],
+    "project_progress": [
+        IndexModel([("project", ASCENDING)], name="project_unique", unique=True),
+    ],
+    "traffic_data": [
+        IndexModel([("time", ASCENDING)], name="time"),
+    ],
+    "traffic_buckets": [
+        IndexModel([("school_id", ASCENDING), ("bucket_start", ASCENDING)], name="school_id_bucket_start"),
+        IndexModel([("project_id", ASCENDING), ("bucket_start", ASCENDING)], name="project_id_bucket_start"),
+    ],
+    "ai_insights": [
+        IndexModel([("cache_key", ASCENDING), ("cache_namespace", ASCENDING)], name="cache_key", sparse=True),
+        # MongoDB deletes expired cache entries; documents without cached_at are kept
+        IndexModel([("cached_at", ASCENDING)], name="cached_at_ttl", expireAfterSeconds=INSIGHT_CACHE_TTL_SECONDS),
+    ],
+    "analysis_jobs": [
+        IndexModel([("job_id", ASCENDING)], name="job_id_unique", unique=True),
+    ],
+    "bid_signatures": [
+        # Multikey: one entry per LSH band key, so lookups read only candidates
+        IndexModel([("bands", ASCENDING)], name="bands"),
+        IndexModel([("fields_key", ASCENDING)], name="fields_key"),
+        IndexModel([("bid_id", ASCENDING)], name="bid_id", sparse=True),
+        IndexModel([("duplicate_of.suspicious", ASCENDING), ("indexed_at", DESCENDING)], name="duplicate_of_indexed_at", sparse=True),
+    ],
+}
+
+# Hot read/write queries checked by find_collection_scans().
+DIAGNOSTIC_QUERIES = [
+    ("bids", {"project_id": "PROJECT_ID_1"}, [("aiScore", DESCENDING)]),
+    ("projects", {"name": "Rural Schools Network - Region A"}, None),
+    ("project_progress", {"project": "Remote Learning Initiative C"}, None),
+    ("traffic_data", {"time": {"$gte": "00:00"}}, [("time", ASCENDING)]),
+    ("traffic_buckets", {"school_id": "SCHOOL_0001", "bucket_start": {"$gte": datetime(2025, 1, 1)}}, [("bucket_start", ASCENDING)]),
+    ("analysis_jobs", {"job_id": "0"}, None),
+    ("bid_signatures", {"bands": {"$in": ["0:0000000000000000"]}}, None),
+]
+
+
+def ensure_indexes(specs: dict = None) -> dict:
+    """
+    Create the declared indexes. Existing indexes are left untouched, so this
+    is safe to run on every startup.
+
+    Returns:
+        dict: Created index names (or the error) per collection.
+    """
+    results = {}
+    for collection_name, indexes in (specs or INDEX_SPECS).items():
+        try:
+            results[collection_name] = get_collection(collection_name).create_indexes(indexes)
+        except Exception as e:
+            logger.error(f"Failed to ensure indexes on '{collection_name}': {e}")
+            results[collection_name] = {"error": str(e)}
+    logger.info(f"Index bootstrap finished for {len(results)} collections.")
+    return results
+
+
+def bootstrap_indexes() -> dict:
+    """
+    Run ensure_indexes() at server startup.
+
+    Skipped when `MONGO_ENSURE_INDEXES=false` or MongoDB is unreachable.
+
+    Returns:
+        dict: The ensure_indexes() results, or an empty dict when skipped.
+    """
+    if os.getenv("MONGO_ENSURE_INDEXES", "true").lower() != "true" or not check_health():
+        return {}
+    return ensure_indexes()
+
+
+def _plan_stages(plan: dict) -> list:
+    """Collect stage names from an explain plan tree."""
+    if not isinstance(plan, dict):
+        return []
+    stages = [plan["stage"]] if "stage" in plan else []
+    for key in ("queryPlan", "inputStage"):
+        stages += _plan_stages(plan.get(key))
+    for child in plan.get("inputStages", []):
+        stages += _plan_stages(child)
+    return stages
+
+
+def explain_query(collection_name: str, query: dict, sort: list = None) -> dict:
+    """
+    Explain a find query and report whether it falls back to a collection scan.
+
+    Returns:
+        dict: The collection, query, winning plan stages and a `collscan` flag.
+    """
+    cursor = get_collection(collection_name).find(query)
+    if sort:
+        cursor = cursor.sort(sort)
+    plan = cursor.explain().get("queryPlanner", {}).get("winningPlan", {})
+    stages = _plan_stages(plan)
+    return {
+        "collection": collection_name,
+        "query": query,
+        "stages": stages,
+        "collscan": "COLLSCAN" in stages,
+    }
+
+
+def find_collection_scans(queries: list = None) -> list:
+    """Explain each diagnostic query and return those still doing a COLLSCAN."""
+    flagged = []
+    for collection_name, query, sort in queries or DIAGNOSTIC_QUERIES:
+        report = explain_query(collection_name, query, sort)
+        if report["collscan"]:
+            logger.warning(f"COLLSCAN on '{collection_name}' for {query}")
+            flagged.append(report)
+    return flagged
+
+
 class MongoDbOperations:
     def __init__(self, collection_name: str):
-        """Initialize MongoDB connection and specific collection."""
-        self.conn_string = os.environ.get("MONGO_URI")
+        """Bind to a collection on the process-wide MongoDB client."""
         self.collection_name = collection_name
         self.collection = self._database_conn()
 
     def _database_conn(self):
-        """Establish a connection to MongoDB and return the specified collection."""
+        """Return the cached handle for the specified collection."""
         try:
-            logger.info(f"Connecting to MongoDB collection: {self.collection_name}")
-            client = MongoClient(self.conn_string)
-            client.admin.command("ping")  # Ping to confirm connection
-            logger.info("Successfully connected to MongoDB.")
-
-            # Access the 'app' database and specified collection
-            db = client["app"]
-            collection = db[str(self.collection_name)]
-            logger.info(f"Connected to '{self.collection_name}' collection.")
-            return collection
+            return get_collection(self.collection_name)
         except Exception as e:
             logger.error(f"Unexpected error while connecting to MongoDB: {e}")
             raise
 
+    @timed("mongo", op="store_data")
     def store_data(self, data):
         """
         Store a new document in the MongoDB collection.
@@ -47,23 +256,52 @@ class MongoDbOperations:
             else:
                 data_dict = data
             self.collection.insert_one(data_dict)
-            logger.info(f"Data added to '{self.collection_name}' successfully.")
+            logger.debug("Data added to '%s' successfully.", self.collection_name)
         except Exception as e:
             logger.error(f"Error while adding data to '{self.collection_name}': {e}")
             raise
 
+    @timed("mongo", op="store_many")
+    def store_many(self, documents: list, chunk_size: int = 1000) -> dict:
+        """
+        Insert documents with unordered `insert_many` calls of at most
+        `chunk_size` documents. A failing document does not stop the rest.
+
+        Returns:
+            dict: `inserted` count and `errors` as {"index", "error"} entries,
+            where index is the position in `documents`.
+        """
+        inserted = 0
+        errors = []
+        for start in range(0, len(documents), chunk_size):
+            chunk = [
+                doc.dict() if isinstance(doc, BaseModel) else doc
+                for doc in documents[start:start + chunk_size]
+            ]
+            try:
+                result = self.collection.insert_many(chunk, ordered=False)
+                inserted += len(result.inserted_ids)
+            except pymongo.errors.BulkWriteError as e:
+                inserted += e.details.get("nInserted", 0)
+                for write_error in e.details.get("writeErrors", []):
+                    errors.append({"index": start + write_error["index"], "error": write_error.get("errmsg")})
+        logger.info(f"Bulk insert into '{self.collection_name}': {inserted} inserted, {len(errors)} failed.")
+        return {"inserted": inserted, "errors": errors}
+
+    @timed("mongo", op="get_all")
     def get_all(self, model):
         """
         Fetch all documents from the MongoDB collection and return as model instances.
         """
         try:
             data = list(self.collection.find({}, {"_id": 0}))
-            logger.info(f"Fetched {len(data)} records from '{self.collection_name}'.")
+            logger.debug("Fetched %d records from '%s'.", len(data), self.collection_name)
             return [model(**item) for item in data]
         except Exception as e:
             logger.error(f"Error while fetching data from '{self.collection_name}': {e}")
             raise
 
+    @timed("mongo", op="get_by_id")
     def get_by_id(self, doc_id: str, model):
         """
         Fetch a document by its ID and return as a model instance.
@@ -72,11 +310,96 @@ class MongoDbOperations:
             doc_object_id = ObjectId(doc_id)
             doc = self.collection.find_one({"_id": doc_object_id}, {"_id": 0})
             if doc:
-                logger.info(f"Fetched document with ID: {doc_id} from '{self.collection_name}'.")
+                logger.debug("Fetched document with ID: %s from '%s'.", doc_id, self.collection_name)
                 return model(**doc)
             else:
                 logger.warning(f"No document found with ID: {doc_id} in '{self.collection_name}'.")
                 return None
         except Exception as e:
             logger.error(f"Error while fetching document by ID from '{self.collection_name}': {e}")
-            raise
\ No newline at end of file
+            raise
+
+    @timed("mongo", op="find_page")
+    def find_page(self, query: dict = None, projection: dict = None, sort: list = None,
+                  limit: int = None, offset: int = 0, after_id: str = None):
+        """
+        Fetch one page of raw documents.
+
+        When `limit` is set without `sort` or `offset`, pages are ordered by `_id`
+        and a keyset cursor for the next page is returned; pass it back as
+        `after_id` to continue.
+
+        Returns:
+            tuple: (list of documents without `_id`, next cursor or None)
+        """
+        try:
+            query = dict(query or {})
+            projection = dict(projection or {"_id": 0})
+            keyset = after_id is not None or (limit is not None and not sort and not offset)
+            if after_id is not None:
+                query["_id"] = {"$gt": ObjectId(after_id)}
+            if keyset:
+                projection.pop("_id", None)
+
+            cursor = self.collection.find(query, projection or None)
+            if keyset:
+                cursor = cursor.sort("_id", 1)
+            elif sort:
+                cursor = cursor.sort(sort)
+            if offset:
+                cursor = cursor.skip(offset)
+            if limit is not None:
+                cursor = cursor.limit(limit)
+
+            docs = list(cursor)
+            next_cursor = None
+            if keyset:
+                if limit is not None and len(docs) == limit:
+                    next_cursor = str(docs[-1]["_id"])
+                for doc in docs:
+                    doc.pop("_id", None)
+            return docs, next_cursor
+        except Exception as e:
+            logger.error(f"Error while fetching a page from '{self.collection_name}': {e}")
+            raise
+
+    def iter_documents(self, query: dict = None, projection: dict = None, sort: list = None,
+                       batch_size: int = 500, limit: int = None, offset: int = 0, after_id: str = None):
+        """
+        Iterate over raw documents with a bounded cursor batch size, so memory
+        use does not grow with the collection.
+
+        `limit`, `offset` and `after_id` page the stream the same way as
+        `find_page`; with `after_id`, documents are ordered by `_id`.
+        """
+        query = dict(query or {})
+        if after_id is not None:
+            query["_id"] = {"$gt": ObjectId(after_id)}
+        cursor = self.collection.find(query, projection or {"_id": 0}).batch_size(batch_size)
+        if after_id is not None:
+            cursor = cursor.sort("_id", 1)
+        elif sort:
+            cursor = cursor.sort(sort)
+        if offset:
+            cursor = cursor.skip(offset)
+        if limit is not None:
+            cursor = cursor.limit(limit)
+        try:
+            for doc in cursor:
+                yield doc
+        finally:
+            cursor.close()
+
+
+if __name__ == "__main__":
+    import sys
+
+    command = sys.argv[1] if len(sys.argv) > 1 else "indexes"
+    if command == "indexes":
+        print(ensure_indexes())
+    elif command == "explain":
+        for report in [explain_query(name, query, sort) for name, query, sort in DIAGNOSTIC_QUERIES]:
+            print(f"{'COLLSCAN' if report['collscan'] else 'ok':8} {report['collection']}: {' <- '.join(report['stages'])}")
+    else:
+        print("Usage: python -m services.mongodb [indexes|explain]")
+        sys.exit(1)
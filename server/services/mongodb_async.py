@@ -0,0 +1,215 @@
+import asyncio
+import os
+from bson.objectid import ObjectId
+from pydantic import BaseModel
+from pymongo.errors import BulkWriteError
+from services.mongodb import DEFAULT_DATABASE, MongoDbOperations, _client_options
+from utils.logger import get_logger
+from utils.metrics import timed
+
+logger = get_logger(__name__)
+
+# Motor client for the shared background event loop (utils.event_loop).
+# Motor clients are bound to one loop, so this must only be used from there.
+_client = None
+
+
+def _use_motor() -> bool:
+    # mongomock has no async driver; those runs go through the sync client
+    return os.environ.get("MONGO_BACKEND") != "mongomock"
+
+
+def get_async_client():
+    """
+    Return the shared Motor client, creating it on first use.
+
+    Requires `pip install motor`.
+    """
+    global _client
+    if _client is None:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        options = _client_options()
+        logger.info(f"Creating async MongoDB client (maxPoolSize={options['maxPoolSize']}).")
+        _client = AsyncIOMotorClient(os.environ.get("MONGO_URI"), **options)
+    return _client
+
+
+def get_async_collection(collection_name: str, database_name: str = None):
+    """Return a Motor collection handle from the shared async client."""
+    database_name = database_name or os.environ.get("MONGO_DB_NAME", DEFAULT_DATABASE)
+    return get_async_client()[database_name][str(collection_name)]
+
+
+def _reset_after_fork():
+    global _client
+    _client = None
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+class AsyncMongoDbOperations:
+    """
+    Async counterpart of MongoDbOperations backed by Motor.
+
+    Method names, arguments and return values match the synchronous class.
+    With MONGO_BACKEND=mongomock each call runs the synchronous operation in
+    a worker thread instead.
+    """
+
+    def __init__(self, collection_name: str):
+        self.collection_name = collection_name
+        if _use_motor():
+            self.collection = get_async_collection(collection_name)
+            self._sync = None
+        else:
+            self.collection = None
+            self._sync = MongoDbOperations(collection_name)
+
+    async def store_data(self, data):
+        """
+        Store a new document in the MongoDB collection.
+        `data` can be an instance of a Pydantic model.
+        """
+        if self._sync is not None:
+            return await asyncio.to_thread(self._sync.store_data, data)
+        try:
+            data_dict = data.dict() if isinstance(data, BaseModel) else data
+            with timed("mongo", op="store_data"):
+                await self.collection.insert_one(data_dict)
+            logger.debug("Data added to '%s' successfully.", self.collection_name)
+        except Exception as e:
+            logger.error(f"Error while adding data to '{self.collection_name}': {e}")
+            raise
+
+    async def store_many(self, documents: list, chunk_size: int = 1000) -> dict:
+        """
+        Insert documents with unordered `insert_many` calls of at most
+        `chunk_size` documents.
+
+        Returns:
+            dict: `inserted` count and `errors` as {"index", "error"} entries.
+        """
+        if self._sync is not None:
+            return await asyncio.to_thread(self._sync.store_many, documents, chunk_size)
+        inserted = 0
+        errors = []
+        with timed("mongo", op="store_many"):
+            for start in range(0, len(documents), chunk_size):
+                chunk = [
+                    doc.dict() if isinstance(doc, BaseModel) else doc
+                    for doc in documents[start:start + chunk_size]
+                ]
+                try:
+                    result = await self.collection.insert_many(chunk, ordered=False)
+                    inserted += len(result.inserted_ids)
+                except BulkWriteError as e:
+                    inserted += e.details.get("nInserted", 0)
+                    for write_error in e.details.get("writeErrors", []):
+                        errors.append({"index": start + write_error["index"], "error": write_error.get("errmsg")})
+        logger.info(f"Bulk insert into '{self.collection_name}': {inserted} inserted, {len(errors)} failed.")
+        return {"inserted": inserted, "errors": errors}
+
+    async def get_all(self, model):
+        """
+        Fetch all documents from the MongoDB collection and return as model instances.
+        """
+        if self._sync is not None:
+            return await asyncio.to_thread(self._sync.get_all, model)
+        try:
+            with timed("mongo", op="get_all"):
+                data = await self.collection.find({}, {"_id": 0}).to_list(None)
+            logger.debug("Fetched %d records from '%s'.", len(data), self.collection_name)
+            return [model(**item) for item in data]
+        except Exception as e:
+            logger.error(f"Error while fetching data from '{self.collection_name}': {e}")
+            raise
+
+    async def get_by_id(self, doc_id: str, model):
+        """
+        Fetch a document by its ID and return as a model instance.
+        """
+        if self._sync is not None:
+            return await asyncio.to_thread(self._sync.get_by_id, doc_id, model)
+        try:
+            with timed("mongo", op="get_by_id"):
+                doc = await self.collection.find_one({"_id": ObjectId(doc_id)}, {"_id": 0})
+            if doc:
+                return model(**doc)
+            logger.warning(f"No document found with ID: {doc_id} in '{self.collection_name}'.")
+            return None
+        except Exception as e:
+            logger.error(f"Error while fetching document by ID from '{self.collection_name}': {e}")
+            raise
+
+    async def find_page(self, query: dict = None, projection: dict = None, sort: list = None,
+                        limit: int = None, offset: int = 0, after_id: str = None):
+        """
+        Fetch one page of raw documents. Same paging rules as
+        MongoDbOperations.find_page.
+
+        Returns:
+            tuple: (list of documents without `_id`, next cursor or None)
+        """
+        if self._sync is not None:
+            return await asyncio.to_thread(
+                self._sync.find_page, query, projection, sort, limit, offset, after_id
+            )
+        try:
+            query = dict(query or {})
+            projection = dict(projection or {"_id": 0})
+            keyset = after_id is not None or (limit is not None and not sort and not offset)
+            if after_id is not None:
+                query["_id"] = {"$gt": ObjectId(after_id)}
+            if keyset:
+                projection.pop("_id", None)
+
+            cursor = self.collection.find(query, projection or None)
+            if keyset:
+                cursor = cursor.sort("_id", 1)
+            elif sort:
+                cursor = cursor.sort(sort)
+            if offset:
+                cursor = cursor.skip(offset)
+            if limit is not None:
+                cursor = cursor.limit(limit)
+
+            with timed("mongo", op="find_page"):
+                docs = await cursor.to_list(None)
+            next_cursor = None
+            if keyset:
+                if limit is not None and len(docs) == limit:
+                    next_cursor = str(docs[-1]["_id"])
+                for doc in docs:
+                    doc.pop("_id", None)
+            return docs, next_cursor
+        except Exception as e:
+            logger.error(f"Error while fetching a page from '{self.collection_name}': {e}")
+            raise
+
+    async def find_one(self, query: dict, projection: dict = None, op: str = "find_one"):
+        """Fetch one raw document, or None. `op` labels the timing metric."""
+        if self._sync is not None:
+            return await asyncio.to_thread(self._sync.collection.find_one, query, projection)
+        with timed("mongo", op=op):
+            return await self.collection.find_one(query, projection)
+
+    async def find_many(self, query: dict, projection: dict = None, limit: int = None, op: str = "find_many") -> list:
+        """Fetch raw documents as a list, at most `limit` of them."""
+        if self._sync is not None:
+            def find():
+                cursor = self._sync.collection.find(query, projection)
+                return list(cursor.limit(limit) if limit else cursor)
+            return await asyncio.to_thread(find)
+        cursor = self.collection.find(query, projection)
+        if limit:
+            cursor = cursor.limit(limit)
+        with timed("mongo", op=op):
+            return await cursor.to_list(None)
+
+    async def update_one(self, query: dict, update: dict, upsert: bool = False, op: str = "update_one"):
+        """Apply an update to one document."""
+        if self._sync is not None:
+            return await asyncio.to_thread(self._sync.collection.update_one, query, update, upsert=upsert)
+        with timed("mongo", op=op):
+            return await self.collection.update_one(query, update, upsert=upsert)
@@ -0,0 +1,182 @@
+import copy
+import json
+import os
+from dataclasses import dataclass
+from threading import Lock
+from typing import Any, Dict, List, Optional
+from utils.logger import get_logger
+from utils.metrics import Counter, register_metric
+from utils.rate_limit import estimate_tokens
+
+logger = get_logger(__name__)
+
+# Dotted paths sent to the LLM, in priority order: when a bid is over budget
+# the last paths are dropped first. Identifiers, contact details and
+# registration numbers do not affect scoring and are left out; the ids are
+# added back to the result by the caller.
+DEFAULT_PROMPT_FIELDS = [
+    "provider",
+    "cost",
+    "coverage",
+    "pricing_proposal.pricing_model",
+    "technical_proposal.connectivity_options.primary_technology",
+    "technical_proposal.connectivity_options.bandwidth_options",
+    "project_details.location.target_schools",
+    "project_details.location.total_coverage_area_km2",
+    "legal_compliance.warranties",
+    "legal_compliance.certifications",
+    "legal_compliance.regulatory_compliance",
+    "technical_proposal.connectivity_options.backup_technology",
+    "technical_proposal.connectivity_options.security_protocols",
+    "technical_proposal.connectivity_options.infrastructure_plan",
+    "pricing_proposal.payment_milestones",
+    "pricing_proposal.payment_terms",
+    "legal_compliance.insurance_details",
+    "project_details.location.region",
+    "bidder_details.company_name",
+]
+PROMPT_FIELDS = [
+    path.strip() for path in os.environ.get("PROMPT_FIELDS", "").split(",") if path.strip()
+] or DEFAULT_PROMPT_FIELDS
+# Token budget for the serialized bid (excluding the system prompt)
+PROMPT_MAX_BID_TOKENS = int(os.environ.get("PROMPT_MAX_BID_TOKENS", 1500))
+# Strings and lists longer than this are shortened when over budget
+PROMPT_MAX_STRING_CHARS = int(os.environ.get("PROMPT_MAX_STRING_CHARS", 200))
+PROMPT_MAX_LIST_ITEMS = int(os.environ.get("PROMPT_MAX_LIST_ITEMS", 5))
+PROMPT_TOKEN_ENCODING = os.environ.get("PROMPT_TOKEN_ENCODING", "cl100k_base")
+
+PROMPT_TOKENS = Counter("bidwise_prompt_tokens_total", "Bid prompt tokens before and after compaction, by prompt and stage.")
+PROMPT_TRUNCATIONS = Counter("bidwise_prompt_truncations_total", "Bid prompts truncated to fit the token budget, by prompt.")
+register_metric(PROMPT_TOKENS)
+register_metric(PROMPT_TRUNCATIONS)
+
+_encoding = None
+_encoding_lock = Lock()
+
+
+def _get_encoding():
+    """Load the tiktoken encoding once; False when it is unavailable."""
+    global _encoding
+    if _encoding is None:
+        with _encoding_lock:
+            if _encoding is None:
+                try:
+                    import tiktoken
+                    _encoding = tiktoken.get_encoding(PROMPT_TOKEN_ENCODING)
+                except Exception as e:
+                    # tiktoken downloads encodings on first use; offline hosts fall back
+                    logger.warning(f"tiktoken encoding '{PROMPT_TOKEN_ENCODING}' unavailable, estimating tokens: {e}")
+                    _encoding = False
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    """Count tokens with tiktoken, or estimate them if it is unavailable."""
+    encoding = _get_encoding()
+    if encoding:
+        return len(encoding.encode(text, disallowed_special=()))
+    return estimate_tokens(text)
+
+
+def compact_json(data: Any) -> str:
+    """Serialize without whitespace or ASCII escaping."""
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def _lookup(data: Dict[str, Any], path: str):
+    value = data
+    for key in path.split("."):
+        if not isinstance(value, dict) or key not in value:
+            return None
+        value = value[key]
+    return value
+
+
+def _assign(target: Dict[str, Any], path: str, value: Any):
+    keys = path.split(".")
+    for key in keys[:-1]:
+        target = target.setdefault(key, {})
+    target[keys[-1]] = value
+
+
+def project_bid(bid: Dict[str, Any], fields: List[str] = None) -> Dict[str, Any]:
+    """
+    Keep only the scoring fields of a bid, preserving nesting.
+
+    Bids with none of the fields are returned unchanged, so unknown shapes
+    are never sent empty.
+    """
+    projected = {}
+    for path in fields or PROMPT_FIELDS:
+        value = _lookup(bid, path)
+        if value not in (None, "", [], {}):
+            _assign(projected, path, copy.deepcopy(value))
+    return projected or bid
+
+
+def _shorten(value: Any) -> Any:
+    """Trim long strings and lists throughout a document."""
+    if isinstance(value, dict):
+        return {key: _shorten(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_shorten(item) for item in value[:PROMPT_MAX_LIST_ITEMS]]
+    if isinstance(value, str) and len(value) > PROMPT_MAX_STRING_CHARS:
+        return value[:PROMPT_MAX_STRING_CHARS] + "..."
+    return value
+
+
+@dataclass
+class PreparedBid:
+    """A bid serialized for a prompt, with token counts before and after."""
+    text: str
+    original_tokens: int
+    tokens: int
+    truncated: bool = False
+
+
+def prepare_bid_prompt(bid: Dict[str, Any], prompt: str = "bid", max_tokens: Optional[int] = None,
+                       fields: List[str] = None) -> PreparedBid:
+    """
+    Project a bid to its scoring fields, serialize it compactly and fit it
+    into the token budget.
+
+    Over-budget bids first have long strings and lists shortened, then lose
+    their lowest-priority fields until they fit.
+
+    Args:
+        bid: The bid document.
+        prompt: Label for the metrics, e.g. "insights" or "score".
+        max_tokens: Token budget (defaults to PROMPT_MAX_BID_TOKENS; 0 disables it).
+        fields: Dotted paths to keep (defaults to PROMPT_FIELDS).
+    """
+    budget = PROMPT_MAX_BID_TOKENS if max_tokens is None else max_tokens
+    fields = fields or PROMPT_FIELDS
+    original_tokens = count_tokens(json.dumps(bid, default=str))
+
+    projected = project_bid(bid, fields)
+    text = compact_json(projected)
+    tokens = count_tokens(text)
+    truncated = False
+
+    if budget and tokens > budget:
+        truncated = True
+        projected = _shorten(projected)
+        text = compact_json(projected)
+        tokens = count_tokens(text)
+        kept = [path for path in fields if _lookup(projected, path) is not None]
+        while tokens > budget and len(kept) > 1:
+            kept.pop()
+            text = compact_json(project_bid(projected, kept))
+            tokens = count_tokens(text)
+        if tokens > budget:
+            # A single oversized field: cut the serialized text itself
+            encoding = _get_encoding()
+            text = encoding.decode(encoding.encode(text, disallowed_special=())[:budget]) if encoding else text[:budget * 4]
+            tokens = count_tokens(text)
+        PROMPT_TRUNCATIONS.inc(prompt=prompt)
+        logger.info(f"Bid {bid.get('bid_id', 'UNKNOWN')} truncated to {tokens} tokens (budget {budget}).")
+
+    PROMPT_TOKENS.inc(original_tokens, prompt=prompt, stage="original")
+    PROMPT_TOKENS.inc(tokens, prompt=prompt, stage="sent")
+    logger.debug("Prompt for bid %s: %d -> %d tokens", bid.get("bid_id", "UNKNOWN"), original_tokens, tokens)
+    return PreparedBid(text=text, original_tokens=original_tokens, tokens=tokens, truncated=truncated)
@@ -0,0 +1,186 @@
+import os
+import warnings
+from typing import Any, Dict, List, Optional
+import numpy as np
+from services.mongodb import MongoDbOperations
+from utils.numbers import parse_money, parse_percent
+
+PRESCORE_ENABLED = os.environ.get("PRESCORE_ENABLED", "true").lower() == "true"
+
+# Metric weights in the composite score; missing metrics are left out and the
+# remaining weights renormalized.
+WEIGHTS = {"cost_per_school": 0.40, "coverage_pct": 0.35, "bandwidth_mbps": 0.25}
+
+COST_PER_SCHOOL_REFERENCE = float(os.environ.get("PRESCORE_COST_PER_SCHOOL_REFERENCE", 1000))
+BANDWIDTH_TARGET_MBPS = float(os.environ.get("PRESCORE_BANDWIDTH_TARGET_MBPS", 100))
+AMBIGUOUS_LOW = int(os.environ.get("PRESCORE_AMBIGUOUS_LOW", 55))
+AMBIGUOUS_HIGH = int(os.environ.get("PRESCORE_AMBIGUOUS_HIGH", 75))
+# Bids within this many points of a neighbour are too close to call.
+TIE_MARGIN = int(os.environ.get("PRESCORE_TIE_MARGIN", 3))
+# Share of the total weight that must be backed by data.
+MIN_EVIDENCE = float(os.environ.get("PRESCORE_MIN_EVIDENCE", 0.6))
+# Batches at least this large are scored relative to each other.
+RELATIVE_MIN_BIDS = 3
+
+def _get(data: Dict[str, Any], *path: str) -> Any:
+    for key in path:
+        if not isinstance(data, dict):
+            return None
+        data = data.get(key)
+    return data
+
+
+def extract_metrics(bid: Dict[str, Any], schools: Optional[int] = None) -> Dict[str, Optional[float]]:
+    """
+    Pull scoring metrics from a flat bid (provider/cost/coverage) or a
+    sample.json-style proposal.
+
+    Args:
+        bid: The bid document.
+        schools: Number of schools in the project, when the bid does not say.
+    """
+    total_cost = parse_money(bid.get("cost"))
+    if total_cost is None:
+        total_cost = parse_money(_get(bid, "pricing_proposal", "pricing_model", "total_contract_value"))
+
+    target_schools = _get(bid, "project_details", "location", "target_schools") or schools
+
+    bandwidth = _get(bid, "technical_proposal", "connectivity_options", "bandwidth_options",
+                     "standard_package", "download_speed")
+
+    return {
+        "total_cost": total_cost,
+        "target_schools": float(target_schools) if target_schools else None,
+        "cost_per_school": total_cost / target_schools if total_cost and target_schools else None,
+        "coverage_pct": parse_percent(bid.get("coverage")),
+        "bandwidth_mbps": float(bandwidth) if isinstance(bandwidth, (int, float)) else None,
+    }
+
+
+def _relative(values: np.ndarray, higher_is_better: bool) -> np.ndarray:
+    """
+    Min-max scale each column across the batch, ignoring NaNs. Columns
+    whose known values are all equal score 1.0 in either direction.
+    """
+    with warnings.catch_warnings():
+        # Columns with no data at all stay NaN
+        warnings.simplefilter("ignore", RuntimeWarning)
+        low = np.nanmin(values, axis=0)
+        high = np.nanmax(values, axis=0)
+    span = np.where(high > low, high - low, 1.0)
+    scaled = (values - low) / span
+    if not higher_is_better:
+        scaled = 1.0 - scaled
+    return np.where(high > low, scaled, 1.0)
+
+
+def prescore_bids(bids: List[Dict[str, Any]], schools: Dict[str, int] = None,
+                  relative: bool = True) -> List[Dict[str, Any]]:
+    """
+    Score and rank the bids of one project in one vectorized pass.
+
+    Small batches are scored against absolute references (cost per school
+    against PRESCORE_COST_PER_SCHOOL_REFERENCE, bandwidth against
+    PRESCORE_BANDWIDTH_TARGET_MBPS). Larger batches are additionally
+    scaled relative to each other. A bid is marked `ambiguous` when too
+    few metrics are known, when its score falls inside the
+    [PRESCORE_AMBIGUOUS_LOW, PRESCORE_AMBIGUOUS_HIGH] band, or when it is
+    within PRESCORE_TIE_MARGIN points of another bid. Only ambiguous bids
+    need an LLM opinion.
+
+    With `relative=False` every bid is scored on its own, as `prescore_bid`
+    does: no relative term and no tie check. Scores that get stored use
+    this mode so they do not depend on which other bids share the batch.
+
+    Args:
+        bids: Bid documents.
+        schools: Optional project_id -> school count lookup.
+        relative: Scale and compare bids against each other.
+
+    Returns:
+        List[Dict]: Per bid, `aiScore`, `ambiguous`, `rank` (1 is best) and
+        the extracted `metrics`, in input order.
+    """
+    if not bids:
+        return []
+    schools = schools or {}
+    metrics = [extract_metrics(bid, schools.get(bid.get("project_id"))) for bid in bids]
+    names = list(WEIGHTS)
+    values = np.array(
+        [[np.nan if m[name] is None else m[name] for name in names] for m in metrics],
+        dtype=float,
+    )
+    cost, coverage, bandwidth = values[:, 0], values[:, 1], values[:, 2]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        absolute = np.column_stack([
+            np.clip(COST_PER_SCHOOL_REFERENCE / cost, 0.0, 1.0),
+            np.clip(coverage / 100.0, 0.0, 1.0),
+            np.clip(bandwidth / BANDWIDTH_TARGET_MBPS, 0.0, 1.0),
+        ])
+        if relative and len(bids) >= RELATIVE_MIN_BIDS:
+            scaled = np.column_stack([
+                _relative(cost[:, None], higher_is_better=False)[:, 0],
+                _relative(coverage[:, None], higher_is_better=True)[:, 0],
+                _relative(bandwidth[:, None], higher_is_better=True)[:, 0],
+            ])
+            subscores = 0.5 * absolute + 0.5 * scaled
+        else:
+            subscores = absolute
+
+    weights = np.array([WEIGHTS[name] for name in names])
+    present = ~np.isnan(subscores)
+    evidence = (present * weights).sum(axis=1)
+    weighted = np.where(present, subscores, 0.0) @ weights
+    scores = np.round(100 * np.divide(weighted, evidence, out=np.zeros_like(weighted), where=evidence > 0))
+
+    order = np.argsort(-scores, kind="stable")
+    ranks = np.empty(len(bids), dtype=int)
+    ranks[order] = np.arange(1, len(bids) + 1)
+
+    sorted_scores = scores[order]
+    gaps = np.full(len(bids), np.inf)
+    if relative and len(bids) > 1:
+        diffs = np.abs(np.diff(sorted_scores))
+        nearest = np.minimum(np.append(diffs, np.inf), np.insert(diffs, 0, np.inf))
+        gaps[order] = nearest
+
+    ambiguous = (
+        (evidence < MIN_EVIDENCE)
+        | ((scores >= AMBIGUOUS_LOW) & (scores <= AMBIGUOUS_HIGH))
+        | (gaps < TIE_MARGIN)
+    )
+
+    return [
+        {
+            "aiScore": int(scores[i]),
+            "ambiguous": bool(ambiguous[i]),
+            "rank": int(ranks[i]),
+            "metrics": metrics[i],
+        }
+        for i in range(len(bids))
+    ]
+
+
+def prescore_bid(bid: Dict[str, Any], schools: Optional[int] = None) -> Dict[str, Any]:
+    """Score a single bid against the absolute references."""
+    lookup = {bid.get("project_id"): schools} if schools else None
+    return prescore_bids([bid], lookup)[0]
+
+
+def _schools_query(project_ids):
+    return {"name": {"$in": list(project_ids)}}, {"_id": 0, "name": 1, "schools": 1}
+
+
+def load_project_schools(project_ids) -> Dict[str, int]:
+    """Look up school counts for projects (bids reference projects by name)."""
+    projects = MongoDbOperations("projects").collection.find(*_schools_query(project_ids))
+    return {project["name"]: project.get("schools") for project in projects}
+
+
+async def aload_project_schools(project_ids) -> Dict[str, int]:
+    """Async `load_project_schools` through Motor, for the shared event loop."""
+    from services.mongodb_async import AsyncMongoDbOperations
+    query, projection = _schools_query(project_ids)
+    projects = await AsyncMongoDbOperations("projects").find_many(query, projection, op="load_project_schools")
+    return {project["name"]: project.get("schools") for project in projects}
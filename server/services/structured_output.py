@@ -0,0 +1,178 @@
+import json
+import os
+import re
+from typing import Any, Dict, List, Type
+from pydantic import BaseModel, ValidationError
+from utils.logger import get_logger
+from utils.metrics import Counter, register_metric, record_llm_usage, timed
+
+logger = get_logger(__name__)
+
+# Repair calls per response before giving up; 0 disables repair
+PARSE_REPAIR_ATTEMPTS = int(os.environ.get("LLM_PARSE_REPAIR_ATTEMPTS", 1))
+# Ask providers that support it for a JSON object response
+LLM_JSON_MODE = os.environ.get("LLM_JSON_MODE", "true").lower() == "true"
+# Longest broken response sent back for repair
+REPAIR_MAX_CHARS = int(os.environ.get("LLM_REPAIR_MAX_CHARS", 8000))
+
+LLM_PARSE = Counter("bidwise_llm_parse_total", "Structured LLM responses, by prompt and outcome (ok, repaired, failed).")
+register_metric(LLM_PARSE)
+
+REPAIR_SYSTEM_PROMPT = """You fix malformed JSON. Return only a single valid JSON object
+    that keeps the content of the input and matches this JSON schema:
+    {schema}
+    Do not add commentary or code fences."""
+
+_FENCE = re.compile(r"```(?:json)?\s*(.*?)```", re.DOTALL | re.IGNORECASE)
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+
+
+class StructuredOutputError(ValueError):
+    """The LLM response could not be parsed into the expected model, even after repair."""
+
+
+def message_text(message) -> str:
+    """Text content of an AIMessage, or the value itself if it is a string."""
+    content = getattr(message, "content", message)
+    if isinstance(content, list):
+        # Content blocks: keep the text parts
+        content = "".join(part.get("text", "") if isinstance(part, dict) else str(part) for part in content)
+    return content if isinstance(content, str) else str(content)
+
+
+def extract_json(text: str) -> Dict[str, Any]:
+    """
+    Find the JSON object in an LLM response.
+
+    Accepts plain JSON, JSON inside code fences, JSON surrounded by prose and
+    trailing commas.
+
+    Raises:
+        ValueError: If no JSON object is found.
+    """
+    candidates = [match.strip() for match in _FENCE.findall(text)] + [text.strip()]
+    decoder = json.JSONDecoder()
+    for candidate in candidates:
+        for attempt in (candidate, _TRAILING_COMMA.sub(r"\1", candidate)):
+            start = attempt.find("{")
+            while start != -1:
+                try:
+                    value, _ = decoder.raw_decode(attempt, start)
+                    if isinstance(value, dict):
+                        return value
+                except json.JSONDecodeError:
+                    pass
+                start = attempt.find("{", start + 1)
+    raise ValueError("No JSON object found in the response")
+
+
+def parse_structured(message, schema: Type[BaseModel]) -> BaseModel:
+    """
+    Extract and validate a response against a Pydantic model.
+
+    Raises:
+        ValueError: If there is no JSON object or it fails validation.
+    """
+    return schema.model_validate(extract_json(message_text(message)))
+
+
+def json_mode(llm):
+    """Bind JSON-object response mode to a chat model when enabled."""
+    return llm.bind(response_format={"type": "json_object"}) if LLM_JSON_MODE else llm
+
+
+def _repair_messages(text: str, error: Exception, schema: Type[BaseModel]) -> List[Dict[str, str]]:
+    return [
+        {"role": "system", "content": REPAIR_SYSTEM_PROMPT.format(schema=json.dumps(schema.model_json_schema()))},
+        {"role": "user", "content": f"Error: {_describe(error)[:500]}\n\nInput:\n{text[:REPAIR_MAX_CHARS]}"},
+    ]
+
+
+def _describe(error: Exception) -> str:
+    if isinstance(error, ValidationError):
+        return "; ".join(f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in error.errors())
+    return str(error)
+
+
+def _record(llm, message, model: str, outcome: str = "ok"):
+    # Routed handles (agents.llm_router) count usage per engine themselves
+    if not getattr(llm, "records_usage", False):
+        record_llm_usage(message, model, outcome=outcome)
+
+
+def _failed(prompt: str, model: str, error: Exception):
+    LLM_PARSE.inc(prompt=prompt, outcome="failed")
+    logger.warning(f"Unparseable {prompt} response from {model}: {_describe(error)}")
+    return StructuredOutputError(f"Could not parse the {prompt} response: {_describe(error)}")
+
+
+def parse_or_repair(message, schema: Type[BaseModel], llm, prompt: str, model: str,
+                    tokens: int = 0) -> BaseModel:
+    """
+    Parse a response into `schema`. On failure, send only the broken output
+    and the validation error back to the model for a short repair call,
+    instead of re-running the analysis.
+
+    Args:
+        message: The AIMessage to parse.
+        schema: Pydantic model the response must match.
+        llm: Chat model used for repair calls.
+        prompt: Prompt label for metrics, e.g. "insights" or "score".
+        model: Model name for usage metrics.
+        tokens: Token estimate of the original call, charged to the rate
+            limiter for each repair call as well.
+
+    Raises:
+        StructuredOutputError: If the response is still invalid after the repair attempts.
+    """
+    try:
+        result = parse_structured(message, schema)
+        LLM_PARSE.inc(prompt=prompt, outcome="ok")
+        return result
+    except ValueError as e:
+        error = e
+
+    text = message_text(message)
+    for _ in range(PARSE_REPAIR_ATTEMPTS):
+        try:
+            with timed("llm", op="repair"):
+                message = json_mode(llm).invoke(_repair_messages(text, error, schema), tokens=tokens)
+            _record(llm, message, model)
+            result = parse_structured(message, schema)
+            LLM_PARSE.inc(prompt=prompt, outcome="repaired")
+            return result
+        except ValueError as e:
+            error, text = e, message_text(message)
+        except Exception as e:
+            _record(llm, None, model, outcome="error")
+            error = e
+            break
+    raise _failed(prompt, model, error)
+
+
+async def aparse_or_repair(message, schema: Type[BaseModel], llm, prompt: str, model: str,
+                           tokens: int = 0) -> BaseModel:
+    """Async variant of `parse_or_repair`; repair calls use `ainvoke`."""
+    try:
+        result = parse_structured(message, schema)
+        LLM_PARSE.inc(prompt=prompt, outcome="ok")
+        return result
+    except ValueError as e:
+        error = e
+
+    text = message_text(message)
+    for _ in range(PARSE_REPAIR_ATTEMPTS):
+        try:
+            with timed("llm", op="repair"):
+                message = await json_mode(llm).ainvoke(_repair_messages(text, error, schema), tokens=tokens)
+            _record(llm, message, model)
+            result = parse_structured(message, schema)
+            LLM_PARSE.inc(prompt=prompt, outcome="repaired")
+            return result
+        except ValueError as e:
+            error, text = e, message_text(message)
+        except Exception as e:
+            _record(llm, None, model, outcome="error")
+            error = e
+            break
+    raise _failed(prompt, model, error)
@@ -0,0 +1,280 @@
+import os
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from pymongo import UpdateOne
+from models import TrafficSample
+from services.mongodb import get_collection
+from utils.logger import get_logger
+from utils.metrics import timed
+
+logger = get_logger(__name__)
+
+# Samples are grouped per school into buckets of this many seconds; one hour
+# of per-minute samples is one document of 60 points.
+TRAFFIC_BUCKET_SECONDS = int(os.environ.get("TRAFFIC_BUCKET_SECONDS", 3600))
+TRAFFIC_DEFAULT_POINTS = int(os.environ.get("TRAFFIC_DEFAULT_POINTS", 500))
+TRAFFIC_MAX_POINTS = int(os.environ.get("TRAFFIC_MAX_POINTS", 5000))
+COLLECTION = "traffic_buckets"
+
+
+def _to_utc(value: datetime) -> datetime:
+    """Naive UTC datetime, as stored by MongoDB."""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _epoch(value: datetime) -> float:
+    return _to_utc(value).replace(tzinfo=timezone.utc).timestamp()
+
+
+def bucket_start(timestamp: datetime, bucket_seconds: int = TRAFFIC_BUCKET_SECONDS) -> datetime:
+    """Start of the bucket holding `timestamp`."""
+    epoch = _epoch(timestamp)
+    return datetime.fromtimestamp(epoch - epoch % bucket_seconds, tz=timezone.utc).replace(tzinfo=None)
+
+
+def record_samples(samples: Iterable[TrafficSample]) -> Dict[str, int]:
+    """
+    Append samples to their per-school time buckets.
+
+    Each bucket document holds parallel `t` (epoch seconds) and `v`
+    (bandwidth) arrays plus running count, sum, min and max, so whole
+    buckets can be summarized without reading their points.
+
+    Returns:
+        dict: Number of `samples` written and `buckets` touched.
+    """
+    grouped = defaultdict(list)
+    for sample in samples:
+        key = (sample.school_id, sample.project_id, bucket_start(sample.timestamp))
+        grouped[key].append((_epoch(sample.timestamp), float(sample.bandwidth)))
+
+    operations = []
+    for (school_id, project_id, start), points in grouped.items():
+        values = [v for _, v in points]
+        operations.append(UpdateOne(
+            {"school_id": school_id, "bucket_start": start},
+            {
+                "$setOnInsert": {"project_id": project_id},
+                "$push": {"t": {"$each": [t for t, _ in points]}, "v": {"$each": values}},
+                "$inc": {"count": len(values), "sum": sum(values)},
+                "$min": {"min": min(values)},
+                "$max": {"max": max(values)},
+            },
+            upsert=True,
+        ))
+    if operations:
+        with timed("mongo", op="traffic_write"):
+            get_collection(COLLECTION).bulk_write(operations, ordered=False)
+    written = sum(len(points) for points in grouped.values())
+    logger.info(f"Stored {written} traffic samples in {len(operations)} buckets.")
+    return {"samples": written, "buckets": len(operations)}
+
+
+def load_series(start: datetime, end: datetime, school_id: str = None,
+                project_id: str = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Read the raw points in [start, end) as sorted numpy arrays.
+
+    Returns:
+        tuple: (epoch seconds, bandwidth)
+    """
+    query: Dict[str, Any] = {
+        "bucket_start": {
+            "$gte": bucket_start(start),
+            "$lt": _to_utc(end),
+        }
+    }
+    if school_id:
+        query["school_id"] = school_id
+    if project_id:
+        query["project_id"] = project_id
+
+    with timed("mongo", op="traffic_read"):
+        buckets = list(get_collection(COLLECTION).find(query, {"_id": 0, "t": 1, "v": 1}))
+    if not buckets:
+        return np.empty(0), np.empty(0)
+
+    times = np.concatenate([np.asarray(bucket["t"], dtype=float) for bucket in buckets])
+    values = np.concatenate([np.asarray(bucket["v"], dtype=float) for bucket in buckets])
+    mask = (times >= _epoch(start)) & (times < _epoch(end))
+    times, values = times[mask], values[mask]
+    order = np.argsort(times, kind="stable")
+    return times[order], values[order]
+
+
+def load_bucket_summaries(start: datetime, end: datetime, school_id: str = None,
+                          project_id: str = None) -> Dict[str, np.ndarray]:
+    """
+    Read only the stored count/sum/min/max of the buckets in [start, end),
+    without their points. Used when output buckets span whole storage buckets.
+    """
+    query: Dict[str, Any] = {"bucket_start": {"$gte": _to_utc(start), "$lt": _to_utc(end)}}
+    if school_id:
+        query["school_id"] = school_id
+    if project_id:
+        query["project_id"] = project_id
+    projection = {"_id": 0, "bucket_start": 1, "count": 1, "sum": 1, "min": 1, "max": 1}
+    with timed("mongo", op="traffic_read"):
+        buckets = list(get_collection(COLLECTION).find(query, projection).sort("bucket_start", 1))
+    return {
+        "t": np.array([_epoch(bucket["bucket_start"]) for bucket in buckets], dtype=float),
+        "count": np.array([bucket["count"] for bucket in buckets], dtype=np.int64),
+        "sum": np.array([bucket["sum"] for bucket in buckets], dtype=float),
+        "min": np.array([bucket["min"] for bucket in buckets], dtype=float),
+        "max": np.array([bucket["max"] for bucket in buckets], dtype=float),
+    }
+
+
+def _merge_summaries(summaries: Dict[str, np.ndarray], start: float, step: float) -> Dict[str, np.ndarray]:
+    """Combine storage bucket summaries into output buckets of `step` seconds."""
+    times = summaries["t"]
+    if times.size == 0:
+        return {"t": times, "min": times, "mean": times, "max": times, "count": summaries["count"]}
+    index = ((times - start) // step).astype(np.int64)
+    starts = np.flatnonzero(np.r_[True, index[1:] != index[:-1]])
+    counts = np.add.reduceat(summaries["count"], starts)
+    return {
+        "t": start + index[starts] * step,
+        "min": np.minimum.reduceat(summaries["min"], starts),
+        "mean": np.add.reduceat(summaries["sum"], starts) / counts,
+        "max": np.maximum.reduceat(summaries["max"], starts),
+        "count": counts,
+    }
+
+
+def downsample_minmax(times: np.ndarray, values: np.ndarray, start: float, step: float) -> Dict[str, np.ndarray]:
+    """
+    Min, mean and max per fixed-width time bucket. Empty buckets are omitted.
+
+    Args:
+        times: Sorted epoch seconds.
+        values: Values aligned with `times`.
+        start: Epoch second of the first bucket.
+        step: Bucket width in seconds.
+    """
+    if times.size == 0:
+        return {"t": times, "min": values, "mean": values, "max": values, "count": values.astype(int)}
+    index = ((times - start) // step).astype(np.int64)
+    # Times are sorted, so each bucket is a contiguous run
+    starts = np.flatnonzero(np.r_[True, index[1:] != index[:-1]])
+    counts = np.diff(np.r_[starts, times.size])
+    return {
+        "t": start + index[starts] * step,
+        "min": np.minimum.reduceat(values, starts),
+        "mean": np.add.reduceat(values, starts) / counts,
+        "max": np.maximum.reduceat(values, starts),
+        "count": counts,
+    }
+
+
+def lttb(times: np.ndarray, values: np.ndarray, threshold: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Largest-Triangle-Three-Buckets downsampling to `threshold` points.
+
+    Keeps the visual shape of a line chart, including spikes that bucket
+    means would flatten. Each bucket's triangle areas are computed in one
+    numpy expression.
+    """
+    size = times.size
+    if threshold >= size or threshold < 3:
+        return times, values
+
+    edges = np.linspace(1, size - 1, threshold - 1).astype(np.int64)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, size - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        low, high = edges[bucket], edges[bucket + 1]
+        next_high = edges[bucket + 2] if bucket + 2 < len(edges) else size
+        # Average of the next bucket is the third triangle corner
+        next_t = times[high:next_high].mean() if next_high > high else times[-1]
+        next_v = values[high:next_high].mean() if next_high > high else values[-1]
+        candidate_t, candidate_v = times[low:high], values[low:high]
+        areas = np.abs(
+            (times[previous] - next_t) * (candidate_v - values[previous])
+            - (times[previous] - candidate_t) * (next_v - values[previous])
+        )
+        previous = low + int(np.argmax(areas))
+        selected[bucket + 1] = previous
+    return times[selected], values[selected]
+
+
+def _average_duplicates(times: np.ndarray, values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Average samples sharing a timestamp, e.g. several schools at one minute."""
+    unique, inverse = np.unique(times, return_inverse=True)
+    if unique.size == times.size:
+        return times, values
+    return unique, np.bincount(inverse, weights=values) / np.bincount(inverse)
+
+
+def _iso(epoch: float) -> str:
+    return datetime.fromtimestamp(float(epoch), tz=timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def traffic_series(start: datetime, end: datetime, points: int = None, step: Optional[float] = None,
+                   method: str = "minmax", school_id: str = None, project_id: str = None) -> Dict[str, Any]:
+    """
+    Downsampled bandwidth for a time range, sized to the chart.
+
+    Args:
+        start, end: Time range (end exclusive).
+        points: Target number of points (defaults to TRAFFIC_DEFAULT_POINTS).
+        step: Bucket width in seconds for "minmax"; overrides `points`.
+        method: "minmax" (min/mean/max per bucket) or "lttb".
+        school_id, project_id: Series filters; without them all schools are combined.
+
+    Returns:
+        dict: Range, method, bucket width, raw point count and the points.
+    """
+    start, end = _to_utc(start), _to_utc(end)
+    if end <= start:
+        raise ValueError("'end' must be after 'start'")
+    if method not in ("minmax", "lttb"):
+        raise ValueError("'method' must be 'minmax' or 'lttb'")
+    points = max(3, min(points or TRAFFIC_DEFAULT_POINTS, TRAFFIC_MAX_POINTS))
+
+    span = _epoch(end) - _epoch(start)
+    result: Dict[str, Any] = {
+        "start": _iso(_epoch(start)),
+        "end": _iso(_epoch(end)),
+        "method": method,
+    }
+
+    if method == "minmax":
+        step = max(float(step), 1.0) if step else max(span / points, 1.0)
+        if span / step > TRAFFIC_MAX_POINTS:
+            raise ValueError(f"'step' is too small for the range; at most {TRAFFIC_MAX_POINTS} buckets are returned")
+        # Output buckets made of whole storage buckets need no raw points
+        aligned = (
+            step % TRAFFIC_BUCKET_SECONDS == 0
+            and _epoch(start) % TRAFFIC_BUCKET_SECONDS == 0
+            and _epoch(end) % TRAFFIC_BUCKET_SECONDS == 0
+        )
+        if aligned:
+            summaries = load_bucket_summaries(start, end, school_id, project_id)
+            buckets = _merge_summaries(summaries, _epoch(start), step)
+            result["raw_points"] = int(summaries["count"].sum())
+        else:
+            times, values = load_series(start, end, school_id, project_id)
+            buckets = downsample_minmax(times, values, _epoch(start), step)
+            result["raw_points"] = int(times.size)
+        result["step_seconds"] = step
+        result["points"] = [
+            {"t": _iso(t), "min": round(float(low), 3), "mean": round(float(mean), 3),
+             "max": round(float(high), 3), "count": int(count)}
+            for t, low, mean, high, count in zip(buckets["t"], buckets["min"], buckets["mean"], buckets["max"], buckets["count"])
+        ]
+        return result
+
+    times, values = load_series(start, end, school_id, project_id)
+    result["raw_points"] = int(times.size)
+    if method == "lttb":
+        times, values = lttb(*_average_duplicates(times, values), points)
+        result["points"] = [
+            {"t": _iso(t), "bandwidth": round(float(v), 3)} for t, v in zip(times, values)
+        ]
+        return result
@@ -0,0 +1,40 @@
+"""
+Shared fixtures. Tests run offline on the in-memory MongoDB and the fake
+LLM (see the Offline LLM Backends section of the README).
+"""
+import os
+
+# Module-level settings are read at import time, so set these first
+os.environ.setdefault("MONGO_BACKEND", "mongomock")
+os.environ.setdefault("LLM_BACKEND", "fake")
+os.environ.setdefault("FAKE_LLM_LATENCY", "0")
+os.environ.setdefault("FAKE_LLM_JITTER", "0")
+os.environ.setdefault("BASE_URL", "http://localhost")
+os.environ.setdefault("MONGO_ENSURE_INDEXES", "false")
+os.environ.setdefault("RESPONSE_CACHE_ENABLED", "false")
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def clean_state():
+    """Each test starts with an empty database and empty insight caches."""
+    from services.mongodb import DEFAULT_DATABASE, get_client
+    from services.insight_cache import _caches
+    database = os.environ.get("MONGO_DB_NAME", DEFAULT_DATABASE)
+    get_client().drop_database(database)
+    for cache in list(_caches.values()):
+        cache.clear()
+    yield
+    get_client().drop_database(database)
+
+
+@pytest.fixture
+def client():
+    from app import app
+    return app.test_client()
+
+
+@pytest.fixture
+def bid():
+    return {"provider": "TechNet Solutions", "cost": "$125,000", "coverage": "98%", "project_id": "PROJECT_ID_1"}
@@ -0,0 +1,65 @@
+from agents.offline_models import FakeChatModel
+from services.dedup import get_similarity_index
+from services.intelligence import BidAnalyzer
+
+PROPOSAL = {
+    "project_id": "PROJECT_ID_1",
+    "provider": "TechNet Solutions",
+    "pricing_proposal": {"pricing_model": {"total_contract_value": 125000}},
+    "technical_proposal": {"summary": "Fibre backbone with satellite backup for rural schools"},
+}
+
+
+def _count_llm_calls(monkeypatch):
+    calls = []
+    original = FakeChatModel._agenerate
+
+    async def counting(self, messages, *args, **kwargs):
+        calls.append(messages)
+        return await original(self, messages, *args, **kwargs)
+
+    monkeypatch.setattr(FakeChatModel, "_agenerate", counting)
+    return calls
+
+
+def test_identical_bid_reuses_insights_from_the_index(monkeypatch):
+    calls = _count_llm_calls(monkeypatch)
+    analyzer = BidAnalyzer()
+    analyzer.generate_bid_insights(dict(PROPOSAL, bid_id="BID_1"))
+    analyzer.cache.clear()
+
+    insights = analyzer.generate_bid_insights(dict(PROPOSAL, bid_id="BID_2"))
+
+    assert len(calls) == 1
+    assert insights["duplicate_of"]["mode"] == "reused"
+
+
+def test_cache_false_analyzes_a_duplicate_again(monkeypatch):
+    calls = _count_llm_calls(monkeypatch)
+    analyzer = BidAnalyzer()
+    analyzer.generate_bid_insights(dict(PROPOSAL, bid_id="BID_1"))
+
+    insights = analyzer.generate_bid_insights(dict(PROPOSAL, bid_id="BID_2"), use_cache=False)
+
+    assert len(calls) == 2
+    assert "duplicate_of" not in insights
+
+
+def test_post_bids_cache_false_rescores_an_identical_bid(client, bid, monkeypatch):
+    # Ambiguous for the pre-scorer, so the score comes from the LLM
+    monkeypatch.setattr("routes.API.PRESCORE_ENABLED", False)
+    calls = _count_llm_calls(monkeypatch)
+    assert client.post("/bids", json=bid).status_code == 201
+    assert client.post("/bids", json=bid).status_code == 201
+    assert len(calls) == 1
+
+    assert client.post("/bids?cache=false", json=bid).status_code == 201
+    assert len(calls) == 2
+
+
+def test_resubmitting_a_bid_without_id_keeps_one_signature():
+    index = get_similarity_index()
+    for _ in range(3):
+        index.add(PROPOSAL, ai_score=80)
+
+    assert index.collection.count_documents({}) == 1
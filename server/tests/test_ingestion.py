@@ -0,0 +1,30 @@
+import json
+
+import pytest
+
+import routes.API
+from services.ingestion import MAX_INGEST_CHUNK_SIZE
+
+
+@pytest.mark.parametrize("chunk_size", ["abc", "1.5", "0", "-3"])
+def test_bulk_rejects_invalid_chunk_size(client, bid, chunk_size):
+    response = client.post(f"/bids/bulk?chunk_size={chunk_size}", data=json.dumps([bid]),
+                           content_type="application/json")
+    assert response.status_code == 400
+    assert "chunk_size" in response.get_json()["error"]
+
+
+def test_bulk_caps_chunk_size(client, bid, monkeypatch):
+    seen = {}
+    ingest_bids = routes.API.ingest_bids
+
+    def spy(records, chunk_size, **kwargs):
+        seen["chunk_size"] = chunk_size
+        return ingest_bids(records, chunk_size=chunk_size, **kwargs)
+
+    monkeypatch.setattr(routes.API, "ingest_bids", spy)
+    response = client.post("/bids/bulk?chunk_size=10000000", data=json.dumps([bid, dict(bid, cost="$90,000")]),
+                           content_type="application/json")
+    assert response.status_code == 201
+    assert response.get_json()["inserted"] == 2
+    assert seen["chunk_size"] == MAX_INGEST_CHUNK_SIZE
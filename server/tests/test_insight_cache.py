@@ -0,0 +1,20 @@
+from services.insight_cache import DEFAULT_TTL_SECONDS, InsightCache
+from services.mongodb import INDEX_SPECS, ensure_indexes, get_collection
+
+
+def test_persistent_tier_expires_entries_with_a_ttl_index():
+    ensure_indexes({"ai_insights": INDEX_SPECS["ai_insights"]})
+
+    index = get_collection("ai_insights").index_information()["cached_at_ttl"]
+
+    assert list(index["key"]) == [("cached_at", 1)]
+    assert index["expireAfterSeconds"] == DEFAULT_TTL_SECONDS
+
+
+def test_persistent_tier_serves_entries_after_the_memory_tier_is_cleared():
+    cache = InsightCache("test", persistent=True)
+    cache.set("key", {"aiScore": 80})
+    cache.clear()
+
+    assert cache.get("key") == {"aiScore": 80}
+    assert cache.persistent_hits == 1
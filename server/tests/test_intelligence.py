@@ -0,0 +1,38 @@
+import threading
+import time
+
+from services.intelligence import BidAnalyzer
+
+
+def test_closing_insight_stream_early_stops_remaining_bids(monkeypatch):
+    calls = []
+    lock = threading.Lock()
+
+    def fake_insights(self, bid_data, use_cache=True):
+        with lock:
+            calls.append(bid_data["bid_id"])
+        time.sleep(0.05)
+        return {"bid_id": bid_data["bid_id"], "aiScore": 50}
+
+    monkeypatch.setattr(BidAnalyzer, "generate_bid_insights", fake_insights)
+    bids = [{"bid_id": f"BID_{i}"} for i in range(80)]
+
+    stream = BidAnalyzer().iter_bid_insights(bids, max_workers=4)
+    next(stream)
+    start = time.perf_counter()
+    stream.close()
+
+    assert time.perf_counter() - start < 0.5
+    time.sleep(0.2)
+    assert len(calls) < 10
+
+
+def test_insight_stream_yields_every_bid(monkeypatch):
+    monkeypatch.setattr(BidAnalyzer, "generate_bid_insights",
+                        lambda self, bid_data, use_cache=True: {"bid_id": bid_data["bid_id"]})
+    bids = [{"bid_id": f"BID_{i}"} for i in range(25)]
+
+    results = list(BidAnalyzer().iter_bid_insights(bids, max_workers=4))
+
+    assert sorted(index for index, _, _ in results) == list(range(25))
+    assert all(insights["bid_id"] == bids[index]["bid_id"] for index, insights, _ in results)
@@ -0,0 +1,45 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from services.intelligence import BidAnalyzer
+from services.jobs import AnalysisJobManager, JOB_STALE_SECONDS
+
+
+@pytest.fixture
+def manager():
+    manager = AnalysisJobManager(max_workers=1)
+    yield manager
+    manager.shutdown()
+
+
+def test_failed_job_records_finished_at(manager, bid, monkeypatch):
+    def fail(self, bids, max_workers=None, use_cache=True):
+        raise RuntimeError("boom")
+        yield
+
+    monkeypatch.setattr(BidAnalyzer, "iter_bid_insights", fail)
+    job_id = manager.submit([bid])
+    manager.executor.submit(lambda: None).result()
+    job = manager.get(job_id)
+    assert job["status"] == "failed"
+    assert job["error"] == "boom"
+    assert job["finished_at"] is not None
+
+
+def test_get_fails_only_stale_jobs(manager, monkeypatch):
+    now = datetime.utcnow()
+    manager.db.store_data({"job_id": "fresh", "status": "running", "heartbeat_at": now})
+    manager.db.store_data({"job_id": "stale", "status": "running",
+                           "heartbeat_at": now - timedelta(seconds=JOB_STALE_SECONDS + 1)})
+    writes = []
+    update_one = type(manager.db.collection).update_one
+    monkeypatch.setattr(type(manager.db.collection), "update_one",
+                        lambda self, *args, **kwargs: writes.append(args) or update_one(self, *args, **kwargs))
+
+    assert manager.get("fresh")["status"] == "running"
+    assert writes == []
+    job = manager.get("stale")
+    assert job["status"] == "failed"
+    assert job["finished_at"] is not None
+    assert len(writes) == 1
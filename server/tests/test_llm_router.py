@@ -0,0 +1,52 @@
+import time
+
+import pytest
+
+import agents.llm_router as llm_router
+import utils.rate_limit as rate_limit
+from agents.llm_router import LlmRouter
+from utils.rate_limit import RateLimiter, TokenBucket
+from utils.event_loop import run_sync
+
+
+def throttled(capacity, refill_per_second):
+    limiter = RateLimiter()
+    limiter.requests = TokenBucket(capacity, refill_per_second)
+    return limiter
+
+
+@pytest.fixture
+def limiters(monkeypatch):
+    limiters = {"groq": RateLimiter(), "openai": RateLimiter()}
+    monkeypatch.setattr(rate_limit, "_limiters", limiters)
+    return limiters
+
+
+def test_throttled_engine_fails_over_without_hedging(limiters, monkeypatch):
+    limiters["groq"] = throttled(1, 0.01)
+    router = LlmRouter({"test": "groq:primary,openai:backup"})
+    messages = [("human", "hello")]
+
+    assert run_sync(router.ainvoke("test", messages)).response_metadata["engine"] == "groq:primary"
+    monkeypatch.setattr(llm_router, "LLM_HEDGE_DELAY_SECONDS", 0.05)
+    message = run_sync(router.ainvoke("test", messages))
+    assert message.response_metadata["engine"] == "openai:backup"
+    engines = router.stats()["engines"]
+    assert engines["groq:primary"]["hedged"] == 0
+    assert engines["groq:primary"]["timeout"] == 0
+
+
+def test_rate_limit_wait_does_not_count_against_deadline(limiters, monkeypatch):
+    monkeypatch.setenv("FAKE_LLM_LATENCY", "0.15")
+    limiters["groq"] = throttled(1, 2)
+    router = LlmRouter({"test": "groq:only"})
+    messages = [("human", "hello")]
+
+    run_sync(router.ainvoke("test", messages, timeout=0.4))
+    started = time.perf_counter()
+    # About 0.35s waiting for the limiter plus 0.15s for the call exceeds the
+    # deadline, which only starts once the limiter lets the call through
+    message = run_sync(router.ainvoke("test", messages, timeout=0.4))
+    assert time.perf_counter() - started >= 0.45
+    assert message.response_metadata["engine"] == "groq:only"
+    assert router.stats()["engines"]["groq:only"]["timeout"] == 0
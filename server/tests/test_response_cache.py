@@ -0,0 +1,20 @@
+import time
+
+import utils.response_cache as response_cache_module
+from utils.response_cache import response_cache
+
+
+def test_last_modified_is_when_the_entry_was_built(client, monkeypatch):
+    monkeypatch.setattr(response_cache_module, "RESPONSE_CACHE_ENABLED", True)
+    response_cache.clear()
+    first = client.get("/projects")
+    assert first.status_code == 200
+    assert client.get("/projects").last_modified == first.last_modified
+
+    # An expired entry is rebuilt without any invalidation in this process
+    time.sleep(1.1)
+    response_cache.clear()
+    rebuilt = client.get("/projects")
+    assert rebuilt.last_modified > first.last_modified
+    assert client.get("/projects", headers={"If-Modified-Since": first.headers["Last-Modified"]}).status_code == 200
+    response_cache.clear()
@@ -1,3 +1,4 @@
-from .logger import get_logger
+from .logger import get_logger, truncate
+from .rate_limit import RateLimiter, TokenBucket, get_rate_limiter, estimate_tokens
 
-__all__ = ["get_logger"]
+__all__ = ["get_logger", "truncate", "RateLimiter", "TokenBucket", "get_rate_limiter", "estimate_tokens"]
@@ -0,0 +1,28 @@
+import os
+from threading import Lock
+
+_loaded = False
+_lock = Lock()
+
+
+def load_config(path: str = None) -> bool:
+    """
+    Load `.env` into the environment once per process.
+
+    Module-level settings are read from os.environ at import time, so this
+    runs first in app.py; later calls are no-ops. Variables already set in
+    the environment take precedence over the file.
+
+    Returns:
+        bool: True if this call loaded the file.
+    """
+    global _loaded
+    if _loaded:
+        return False
+    with _lock:
+        if _loaded:
+            return False
+        from dotenv import load_dotenv
+        load_dotenv(path or os.environ.get("DOTENV_PATH"))
+        _loaded = True
+        return True
@@ -0,0 +1,57 @@
+import asyncio
+import os
+from concurrent.futures import Future
+from threading import Lock, Thread
+from typing import Any, Awaitable, Optional
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# One long-lived event loop per process. Async Mongo (Motor) and LLM clients
+# bind their connection pools to the loop they first run on, so all async
+# work is scheduled here rather than on the per-request loops Flask creates
+# for `async def` views.
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = Lock()
+
+
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """Return the shared background event loop, starting it on first use."""
+    global _loop
+    if _loop is None:
+        with _loop_lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                Thread(target=loop.run_forever, name="async-io", daemon=True).start()
+                logger.info("Started background event loop.")
+                _loop = loop
+    return _loop
+
+
+def submit(coro: Awaitable) -> Future:
+    """
+    Schedule a coroutine on the background loop from any thread.
+
+    The task runs in a copy of the caller's context, so request ids and
+    stage timings carry over.
+    """
+    return asyncio.run_coroutine_threadsafe(coro, get_event_loop())
+
+
+def run_sync(coro: Awaitable, timeout: float = None) -> Any:
+    """Run a coroutine on the background loop and block for its result."""
+    return submit(coro).result(timeout)
+
+
+async def run_on_loop(coro: Awaitable) -> Any:
+    """Await a coroutine on the background loop from another event loop."""
+    return await asyncio.wrap_future(submit(coro))
+
+
+def _reset_after_fork():
+    # The loop thread does not survive fork; each worker starts its own
+    global _loop
+    _loop = None
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
@@ -1,4 +1,147 @@
+import atexit
+import json
 import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from threading import Lock
+from typing import Any, Dict
+
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+# "json" for structured records, "text" for the original human-readable format
+LOG_FORMAT = os.environ.get("LOG_FORMAT", "json").lower()
+LOG_MAX_PAYLOAD_CHARS = int(os.environ.get("LOG_MAX_PAYLOAD_CHARS", 2000))
+# Per-logger sampling of records below WARNING, e.g. "services.mongodb=0.1,services.intelligence=0.5"
+LOG_SAMPLE_RATES = os.environ.get("LOG_SAMPLE_RATES", "")
+
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
+
+_configured = False
+_configure_lock = Lock()
+_listener = None
+
+# LogRecord attributes that are not user-supplied `extra` fields
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "request_id"}
+
+
+def truncate(value: Any, limit: int = None) -> str:
+    """Render a value for logging, cut to at most `limit` characters."""
+    limit = limit or LOG_MAX_PAYLOAD_CHARS
+    text = value if isinstance(value, str) else repr(value)
+    if len(text) <= limit:
+        return text
+    return f"{text[:limit]}... [{len(text) - limit} more chars]"
+
+
+def _parse_sample_rates(spec: str) -> Dict[str, float]:
+    rates = {}
+    for item in spec.split(","):
+        if "=" in item:
+            name, rate = item.split("=", 1)
+            rates[name.strip()] = float(rate)
+    return rates
+
+
+class ContextFilter(logging.Filter):
+    """
+    Attached to the QueueHandler, so it runs in the calling thread, where
+    the request id context variable is set: attaches the request id,
+    samples low-severity records and truncates oversized messages before
+    the record is queued.
+    """
+
+    def __init__(self, sample_rates: Dict[str, float] = None):
+        super().__init__()
+        self.sample_rates = sample_rates or {}
+
+    def _rate(self, name: str) -> float:
+        # The most specific configured prefix wins
+        while name:
+            if name in self.sample_rates:
+                return self.sample_rates[name]
+            name = name.rpartition(".")[0]
+        return 1.0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < logging.WARNING and self.sample_rates:
+            rate = self._rate(record.name)
+            if rate < 1.0 and random.random() >= rate:
+                return False
+        record.request_id = request_id_var.get()
+        message = record.getMessage()
+        if len(message) > LOG_MAX_PAYLOAD_CHARS:
+            record.msg = truncate(message)
+            record.args = None
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, including `extra` fields and the request id."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", "-"),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED and not key.startswith("_"):
+                payload[key] = value
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
+
+def configure_logging():
+    """
+    Route all logging through a queue drained by a background writer thread,
+    so callers never block on stream I/O. Safe to call more than once.
+    """
+    global _configured, _listener
+    with _configure_lock:
+        if _configured:
+            return
+        stream_handler = logging.StreamHandler(sys.stderr)
+        if LOG_FORMAT == "json":
+            stream_handler.setFormatter(JsonFormatter())
+        else:
+            stream_handler.setFormatter(logging.Formatter(
+                "%(asctime)s - %(levelname)s - [%(request_id)s] %(message)s"
+            ))
+
+        log_queue = queue.SimpleQueue()
+        queue_handler = logging.handlers.QueueHandler(log_queue)
+        queue_handler.addFilter(ContextFilter(_parse_sample_rates(LOG_SAMPLE_RATES)))
+
+        root = logging.getLogger()
+        root.handlers = [queue_handler]
+        root.setLevel(LOG_LEVEL)
+
+        _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_stop_listener)
+        # Threads do not survive fork; pre-forking servers need a new writer per worker
+        os.register_at_fork(after_in_child=_restart_listener)
+        _configured = True
+
+
+def _stop_listener():
+    if _listener is not None and _listener._thread is not None:
+        _listener.stop()
+
+
+def _restart_listener():
+    if _listener is not None:
+        _listener._thread = None
+        _listener.start()
+
 
 def get_logger(name: str) -> logging.Logger:
     """
@@ -11,15 +154,37 @@ def get_logger(name: str) -> logging.Logger:
     """
 
     # Configure
-    logging.basicConfig(
-        level=logging.INFO,
-        format="%(asctime)s - %(levelname)s - %(message)s"
-    )
+    configure_logging()
     logger = logging.getLogger(name)
 
     return logger
 
 
+def init_request_logging(app):
+    """
+    Tag every log record of a request with its id. The id is taken from an
+    incoming X-Request-ID header or generated, and echoed on the response.
+    """
+    from flask import g, request
 
+    @app.before_request
+    def _bind_request_id():
+        request_id = request.headers.get("X-Request-ID") or uuid.uuid4().hex
+        g.request_id_token = request_id_var.set(request_id)
+        g.request_id = request_id
 
+    @app.after_request
+    def _echo_request_id(response):
+        request_id = g.get("request_id")
+        if request_id:
+            response.headers["X-Request-ID"] = request_id
+        return response
 
+    @app.teardown_request
+    def _unbind_request_id(exc=None):
+        token = g.pop("request_id_token", None)
+        if token is not None:
+            try:
+                request_id_var.reset(token)
+            except ValueError:
+                request_id_var.set("-")
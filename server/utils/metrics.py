@@ -0,0 +1,214 @@
+import os
+import time
+from bisect import bisect_left
+from contextlib import ContextDecorator
+from contextvars import ContextVar
+from threading import Lock
+from typing import Callable, Dict, List, Optional, Tuple
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# Send Server-Timing on every response instead of only when requested
+SERVER_TIMING_ALWAYS = os.environ.get("SERVER_TIMING", "false").lower() == "always"
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+# Stage timings for the current request, read by the Server-Timing header
+_request_timings: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("request_timings", default=None)
+
+
+def _label_key(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: str = "") -> str:
+    parts = [f'{name}="{value}"' for name, value in key]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Histogram:
+    """Prometheus-style cumulative histogram with labels."""
+
+    def __init__(self, name: str, documentation: str, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        self._series: Dict[LabelKey, list] = {}
+        self._lock = Lock()
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            index = bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    bucket_labels = _format_labels(key, 'le="%s"' % bound)
+                    lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+                inf_labels = _format_labels(key, 'le="+Inf"')
+                lines.append(f"{self.name}_bucket{inf_labels} {count}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {total}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {count}")
+        return lines
+
+
+class Counter:
+    """Prometheus-style monotonically increasing counter with labels."""
+
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(key)} {value}")
+        return lines
+
+
+REQUEST_DURATION = Histogram("bidwise_request_duration_seconds", "HTTP request latency by route.")
+STAGE_DURATION = Histogram("bidwise_stage_duration_seconds", "Latency of request stages (mongo, llm, validation, serialization).")
+LLM_TOKENS = Counter("bidwise_llm_tokens_total", "LLM tokens used, by model and kind.")
+LLM_CALLS = Counter("bidwise_llm_calls_total", "LLM calls, by model and outcome.")
+RESPONSE_CACHE = Counter("bidwise_response_cache_total", "Read response cache lookups, by result.")
+
+_metrics = [REQUEST_DURATION, STAGE_DURATION, LLM_TOKENS, LLM_CALLS, RESPONSE_CACHE]
+_collectors: List[Callable[[], List[str]]] = []
+
+
+def register_metric(metric):
+    """Add a Histogram or Counter to the /metrics output."""
+    _metrics.append(metric)
+    return metric
+
+
+def register_collector(collector: Callable[[], List[str]]):
+    """Add a callable returning extra exposition lines (e.g. gauges) at scrape time."""
+    _collectors.append(collector)
+
+
+def render_metrics() -> str:
+    """Render all metrics in the Prometheus text exposition format."""
+    lines = []
+    for metric in _metrics:
+        lines.extend(metric.render())
+    for collector in _collectors:
+        lines.extend(collector())
+    return "\n".join(lines) + "\n"
+
+
+class timed(ContextDecorator):
+    """
+    Time a block or function as a request stage.
+
+    Records into bidwise_stage_duration_seconds and, inside a request,
+    into that request's Server-Timing breakdown.
+
+        with timed("mongo", op="find"):
+            ...
+    """
+
+    def __init__(self, stage: str, **labels):
+        self.stage = stage
+        self.labels = labels
+
+    def _recreate_cm(self):
+        # Fresh instance per decorated call, so concurrent calls don't share a start time
+        return type(self)(self.stage, **self.labels)
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self._start
+        STAGE_DURATION.observe(elapsed, stage=self.stage, **self.labels)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings.append((self.stage, elapsed))
+        return False
+
+
+def record_llm_usage(message, model: str, outcome: str = "ok"):
+    """Count an LLM call and its token usage from an AIMessage."""
+    LLM_CALLS.inc(model=model, outcome=outcome)
+    usage = getattr(message, "usage_metadata", None) or {}
+    if usage.get("input_tokens"):
+        LLM_TOKENS.inc(usage["input_tokens"], model=model, kind="input")
+    if usage.get("output_tokens"):
+        LLM_TOKENS.inc(usage["output_tokens"], model=model, kind="output")
+
+
+def _server_timing(timings: List[Tuple[str, float]], total: float) -> str:
+    stages: Dict[str, List[float]] = {}
+    for stage, elapsed in timings:
+        stages.setdefault(stage, []).append(elapsed)
+    parts = [
+        f'{stage};dur={sum(values) * 1000:.1f};desc="{len(values)} calls"'
+        for stage, values in stages.items()
+    ]
+    parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts)
+
+
+def init_app(app):
+    """
+    Register request timing hooks and the /metrics endpoint on a Flask app.
+
+    Send `X-Server-Timing: 1` (or set SERVER_TIMING=always) to get a
+    per-stage Server-Timing header on the response.
+    """
+    from flask import Response, g, request
+
+    @app.before_request
+    def _start_timer():
+        g.metrics_start = time.perf_counter()
+        g.metrics_token = _request_timings.set([])
+
+    @app.after_request
+    def _record_request(response):
+        start = g.pop("metrics_start", None)
+        if start is None:
+            return response
+        elapsed = time.perf_counter() - start
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        REQUEST_DURATION.observe(elapsed, method=request.method, route=route, status=response.status_code)
+        timings = _request_timings.get() or []
+        if SERVER_TIMING_ALWAYS or request.headers.get("X-Server-Timing"):
+            response.headers["Server-Timing"] = _server_timing(timings, elapsed)
+        return response
+
+    @app.teardown_request
+    def _reset_timings(exc=None):
+        token = g.pop("metrics_token", None)
+        if token is not None:
+            try:
+                _request_timings.reset(token)
+            except ValueError:
+                # Created in a different context (e.g. a streamed response)
+                _request_timings.set(None)
+
+    @app.route("/metrics")
+    def metrics():
+        return Response(render_metrics(), mimetype="text/plain; version=0.0.4")
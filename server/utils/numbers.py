@@ -0,0 +1,29 @@
+import re
+from typing import Any, Optional
+
+_NUMBER = re.compile(r"-?\d+(?:\.\d+)?")
+
+
+def parse_money(value: Any) -> Optional[float]:
+    """Parse amounts like "$125,000", "125000", "$1.2M" or 1.2e5 into a float."""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    if not isinstance(value, str):
+        return None
+    cleaned = value.replace(",", "")
+    match = _NUMBER.search(cleaned)
+    if not match:
+        return None
+    amount = float(match.group())
+    suffix = cleaned[match.end():].strip().lower()[:1]
+    return amount * {"k": 1e3, "m": 1e6}.get(suffix, 1)
+
+
+def parse_percent(value: Any) -> Optional[float]:
+    """Parse percentages like "98%" or 98 into a float."""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    if not isinstance(value, str):
+        return None
+    match = _NUMBER.search(value)
+    return float(match.group()) if match else None
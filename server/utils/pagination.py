@@ -0,0 +1,77 @@
+import os
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+from bson.objectid import ObjectId
+
+MAX_LIMIT = int(os.environ.get("LIST_MAX_LIMIT", 1000))
+STREAM_BATCH_SIZE = int(os.environ.get("LIST_STREAM_BATCH_SIZE", 500))
+
+
+@dataclass
+class ListParams:
+    """Parsed pagination, projection and sort options for a list endpoint."""
+    limit: Optional[int] = None
+    offset: int = 0
+    after: Optional[str] = None
+    fields: Optional[List[str]] = None
+    sort: List[Tuple[str, int]] = field(default_factory=list)
+    stream: bool = False
+
+    def projection(self) -> Dict[str, int]:
+        """Mongo projection for the requested fields (always excluding `_id`)."""
+        if not self.fields:
+            return {"_id": 0}
+        return {"_id": 0, **{name: 1 for name in self.fields}}
+
+
+def parse_list_params(args, allowed_fields: Iterable[str]) -> ListParams:
+    """
+    Parse list query parameters.
+
+    Supported parameters: `limit`, `offset`, `after` (keyset cursor),
+    `fields` (comma-separated projection), `sort` (comma-separated, `-` prefix
+    for descending) and `stream=true`.
+
+    Args:
+        args: The request's query arguments.
+        allowed_fields: Field names that may be projected or sorted on.
+
+    Raises:
+        ValueError: If a parameter is malformed or names an unknown field.
+    """
+    allowed = set(allowed_fields)
+    params = ListParams()
+
+    if args.get("limit") is not None:
+        params.limit = int(args["limit"])
+        if params.limit < 1:
+            raise ValueError("'limit' must be a positive integer")
+        params.limit = min(params.limit, MAX_LIMIT)
+    if args.get("offset") is not None:
+        params.offset = int(args["offset"])
+        if params.offset < 0:
+            raise ValueError("'offset' must not be negative")
+    params.after = args.get("after") or None
+    if params.after is not None and not ObjectId.is_valid(params.after):
+        raise ValueError("'after' is not a valid cursor")
+
+    if args.get("fields"):
+        params.fields = [name.strip() for name in args["fields"].split(",") if name.strip()]
+        unknown = set(params.fields) - allowed
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+
+    if args.get("sort"):
+        for name in args["sort"].split(","):
+            name = name.strip()
+            direction = -1 if name.startswith("-") else 1
+            name = name.lstrip("+-")
+            if name not in allowed:
+                raise ValueError(f"Cannot sort on unknown field '{name}'")
+            params.sort.append((name, direction))
+
+    if params.after is not None and (params.sort or params.offset):
+        raise ValueError("'after' cannot be combined with 'sort' or 'offset'")
+
+    params.stream = args.get("stream") == "true"
+    return params
@@ -0,0 +1,162 @@
+import asyncio
+import os
+import time
+from threading import Lock, Condition
+from typing import Dict
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket.
+
+    Args:
+        capacity: Maximum number of tokens the bucket can hold.
+        refill_per_second: Tokens added back per second.
+    """
+
+    def __init__(self, capacity: float, refill_per_second: float):
+        self.capacity = float(capacity)
+        self.refill_per_second = float(refill_per_second)
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._cond = Condition(Lock())
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.refill_per_second)
+        self._updated = now
+
+    def acquire(self, amount: float = 1) -> float:
+        """
+        Block until `amount` tokens are available and take them.
+
+        Requests larger than the capacity are clamped so they can still proceed.
+
+        Returns: Seconds spent waiting.
+        """
+        amount = min(float(amount), self.capacity)
+        waited = 0.0
+        with self._cond:
+            while True:
+                self._refill()
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return waited
+                delay = (amount - self._tokens) / self.refill_per_second
+                start = time.monotonic()
+                self._cond.wait(delay)
+                waited += time.monotonic() - start
+
+    def try_acquire(self, amount: float = 1) -> float:
+        """
+        Take `amount` tokens if available without blocking.
+
+        Returns: 0 on success, otherwise seconds until enough tokens refill.
+        """
+        amount = min(float(amount), self.capacity)
+        with self._cond:
+            self._refill()
+            if self._tokens >= amount:
+                self._tokens -= amount
+                return 0.0
+            return (amount - self._tokens) / self.refill_per_second
+
+    def refund(self, amount: float = 1):
+        """Give back tokens taken by a reservation that was abandoned."""
+        with self._cond:
+            self._refill()
+            self._tokens = min(self.capacity, self._tokens + min(float(amount), self.capacity))
+            self._cond.notify_all()
+
+    async def acquire_async(self, amount: float = 1) -> float:
+        """
+        Wait until `amount` tokens are available without blocking the event loop.
+
+        Returns: Seconds spent waiting.
+        """
+        waited = 0.0
+        while True:
+            delay = self.try_acquire(amount)
+            if delay <= 0:
+                return waited
+            await asyncio.sleep(delay)
+            waited += delay
+
+
+class RateLimiter:
+    """
+    Combined requests-per-minute and tokens-per-minute limiter for one provider.
+    A limit of 0 disables that dimension.
+    """
+
+    def __init__(self, requests_per_minute: int = 0, tokens_per_minute: int = 0):
+        self.requests = TokenBucket(requests_per_minute, requests_per_minute / 60.0) if requests_per_minute > 0 else None
+        self.tokens = TokenBucket(tokens_per_minute, tokens_per_minute / 60.0) if tokens_per_minute > 0 else None
+
+    def acquire(self, tokens: int = 0) -> float:
+        """
+        Reserve one request and `tokens` tokens, blocking as needed.
+
+        Returns: Seconds spent waiting.
+        """
+        waited = 0.0
+        if self.requests is not None:
+            waited += self.requests.acquire(1)
+        if self.tokens is not None and tokens > 0:
+            waited += self.tokens.acquire(tokens)
+        return waited
+
+    def try_acquire(self, tokens: int = 0) -> float:
+        """
+        Reserve one request and `tokens` tokens if both are available, without blocking.
+
+        Returns: 0 on success, otherwise seconds until the reservation could succeed.
+        """
+        if self.requests is not None:
+            delay = self.requests.try_acquire(1)
+            if delay > 0:
+                return delay
+        if self.tokens is not None and tokens > 0:
+            delay = self.tokens.try_acquire(tokens)
+            if delay > 0:
+                if self.requests is not None:
+                    self.requests.refund(1)
+                return delay
+        return 0.0
+
+    async def acquire_async(self, tokens: int = 0) -> float:
+        """Async variant of `acquire` for event-loop callers."""
+        waited = 0.0
+        if self.requests is not None:
+            waited += await self.requests.acquire_async(1)
+        if self.tokens is not None and tokens > 0:
+            waited += await self.tokens.acquire_async(tokens)
+        return waited
+
+
+_limiters: Dict[str, RateLimiter] = {}
+_limiters_lock = Lock()
+
+
+def get_rate_limiter(provider: str) -> RateLimiter:
+    """
+    Return the shared rate limiter for a provider.
+
+    Limits are read from `<PROVIDER>_REQUESTS_PER_MINUTE` and
+    `<PROVIDER>_TOKENS_PER_MINUTE`, e.g. GROQ_REQUESTS_PER_MINUTE.
+    """
+    with _limiters_lock:
+        limiter = _limiters.get(provider)
+        if limiter is None:
+            prefix = provider.upper()
+            limiter = RateLimiter(
+                requests_per_minute=int(os.environ.get(f"{prefix}_REQUESTS_PER_MINUTE", 0)),
+                tokens_per_minute=int(os.environ.get(f"{prefix}_TOKENS_PER_MINUTE", 0)),
+            )
+            _limiters[provider] = limiter
+        return limiter
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate (about four characters per token)."""
+    return max(1, len(text) // 4)
@@ -0,0 +1,193 @@
+import hashlib
+import os
+import time
+from datetime import datetime, timezone
+from functools import wraps
+from threading import Lock, Thread
+from typing import Dict, Optional
+from flask import request, make_response, Response
+from utils.logger import get_logger
+from utils.metrics import RESPONSE_CACHE
+
+logger = get_logger(__name__)
+
+# gunicorn.conf.py defaults this to false for multi-worker servers without
+# change streams, where other workers would not see invalidations.
+RESPONSE_CACHE_ENABLED = os.environ.get("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+# Safety net for writes made by other processes when change streams are off
+RESPONSE_CACHE_TTL_SECONDS = int(os.environ.get("RESPONSE_CACHE_TTL_SECONDS", 30))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.environ.get("RESPONSE_CACHE_MAX_ENTRIES", 512))
+
+
+class _Entry:
+    __slots__ = ("body", "status", "mimetype", "headers", "etag", "tag", "expires_at", "last_modified")
+
+    def __init__(self, body: bytes, status: int, mimetype: str, headers: dict, tag: str, expires_at: float):
+        self.body = body
+        self.headers = headers
+        self.status = status
+        self.mimetype = mimetype
+        self.etag = hashlib.sha1(body).hexdigest()
+        self.tag = tag
+        self.expires_at = expires_at
+        # When the body was built, so it never predates the data it shows
+        self.last_modified = datetime.now(timezone.utc).replace(microsecond=0)
+
+
+class ResponseCache:
+    """
+    In-process cache of serialized GET responses.
+
+    Entries are tagged with a namespace (the collection name) and an
+    optional partition (e.g. a project id), so a write can drop exactly the
+    responses it affects. Last-Modified is the time each entry was built.
+
+    Each namespace also has a generation counter that every invalidation
+    bumps. A read takes the generation before building its response and
+    `put` drops the entry if it changed meanwhile, so a response built from
+    pre-write data is never cached after the write invalidated it.
+    """
+
+    def __init__(self, ttl_seconds: int = RESPONSE_CACHE_TTL_SECONDS,
+                 max_entries: int = RESPONSE_CACHE_MAX_ENTRIES):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: Dict[str, _Entry] = {}
+        self._generations: Dict[str, int] = {}
+        self._lock = Lock()
+
+    @staticmethod
+    def _tag(namespace: str, partition: Optional[str]) -> str:
+        return f"{namespace}:{partition}" if partition else namespace
+
+    def generation(self, namespace: str) -> int:
+        with self._lock:
+            return self._generations.get(namespace, 0)
+
+    def get(self, key: str) -> Optional[_Entry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at <= time.monotonic():
+                del self._entries[key]
+                entry = None
+            return entry
+
+    def put(self, key: str, entry: _Entry, namespace: str = None, generation: int = None) -> bool:
+        """
+        Store an entry, unless `namespace` was invalidated since `generation`
+        was read. Returns whether the entry was stored.
+        """
+        with self._lock:
+            if namespace is not None and self._generations.get(namespace, 0) != generation:
+                return False
+            if len(self._entries) >= self.max_entries:
+                self._entries.pop(next(iter(self._entries)))
+            self._entries[key] = entry
+            return True
+
+    def invalidate(self, namespace: str, partition: Optional[str] = None):
+        """
+        Drop cached responses for a namespace. With a partition, only that
+        partition's responses and the unpartitioned ones are dropped.
+        """
+        with self._lock:
+            if partition is None:
+                doomed = [k for k, e in self._entries.items()
+                          if e.tag == namespace or e.tag.startswith(namespace + ":")]
+            else:
+                targets = {namespace, self._tag(namespace, partition)}
+                doomed = [k for k, e in self._entries.items() if e.tag in targets]
+            for key in doomed:
+                del self._entries[key]
+            self._generations[namespace] = self._generations.get(namespace, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+response_cache = ResponseCache()
+
+
+def cached_read(namespace: str, partition_arg: str = None):
+    """
+    Cache a GET view's JSON response and answer conditional requests.
+
+    Responses carry ETag and Last-Modified headers; matching If-None-Match or
+    If-Modified-Since requests get 304. Only 200 responses are cached, and
+    `stream=true` requests bypass the cache.
+
+    Args:
+        namespace: Collection the view reads from; writes invalidate it.
+        partition_arg: Query argument that partitions the namespace (e.g. project_id).
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if not RESPONSE_CACHE_ENABLED or request.args.get("stream") == "true":
+                return view(*args, **kwargs)
+
+            key = request.full_path
+            entry = response_cache.get(key)
+            RESPONSE_CACHE.inc(result="miss" if entry is None else "hit")
+            if entry is None:
+                # Taken before the view reads, so a concurrent write is detected
+                generation = response_cache.generation(namespace)
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200 or response.is_streamed:
+                    return response
+                entry = _Entry(
+                    response.get_data(),
+                    response.status_code,
+                    response.mimetype,
+                    # Keep custom headers such as X-Next-Cursor
+                    {k: v for k, v in response.headers.items() if k.startswith("X-")},
+                    ResponseCache._tag(namespace, request.args.get(partition_arg) if partition_arg else None),
+                    time.monotonic() + response_cache.ttl_seconds,
+                )
+                response_cache.put(key, entry, namespace, generation)
+
+            response = Response(entry.body, status=entry.status, mimetype=entry.mimetype, headers=entry.headers)
+            response.set_etag(entry.etag)
+            response.last_modified = entry.last_modified
+            response.headers["Cache-Control"] = "no-cache"
+            return response.make_conditional(request)
+        return wrapper
+    return decorator
+
+
+# Collections whose writes invalidate another collection's cached responses
+COLLECTION_NAMESPACES = {"traffic_buckets": "traffic_data"}
+
+
+def start_change_stream_invalidation(namespaces) -> Optional[Thread]:
+    """
+    Invalidate cached responses from MongoDB change streams, so writes made
+    by any process are seen without polling. Needs a replica set; enabled
+    with RESPONSE_CACHE_CHANGE_STREAMS=true.
+    """
+    from services.mongodb import get_client, DEFAULT_DATABASE
+
+    def watch():
+        database = get_client()[os.environ.get("MONGO_DB_NAME", DEFAULT_DATABASE)]
+        pipeline = [{"$match": {"ns.coll": {"$in": list(namespaces)}}}]
+        while True:
+            try:
+                with database.watch(pipeline) as stream:
+                    logger.info("Watching change streams for response cache invalidation.")
+                    for change in stream:
+                        collection = change["ns"]["coll"]
+                        response_cache.invalidate(COLLECTION_NAMESPACES.get(collection, collection))
+            except Exception as e:
+                logger.error(f"Change stream for response cache stopped: {e}")
+                response_cache.clear()
+                time.sleep(5)
+
+    thread = Thread(target=watch, name="response-cache-invalidation", daemon=True)
+    thread.start()
+    if not getattr(start_change_stream_invalidation, "_fork_hook", False):
+        # Restart the watcher in each pre-forked worker
+        os.register_at_fork(after_in_child=lambda: Thread(
+            target=watch, name="response-cache-invalidation", daemon=True).start())
+        start_change_stream_invalidation._fork_hook = True
+    return thread
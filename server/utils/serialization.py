@@ -0,0 +1,89 @@
+import os
+from decimal import Decimal
+from typing import Any, Callable, Dict, Type
+import orjson
+from bson.objectid import ObjectId
+from flask.json.provider import JSONProvider
+from pydantic import BaseModel
+
+# Return stored documents without re-validating them through their model.
+# Documents are validated when they are written, so reads only need the
+# model's fields and defaults.
+TRUSTED_READS = os.environ.get("TRUSTED_READS", "true").lower() == "true"
+
+_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def _default(value: Any):
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    if isinstance(value, (ObjectId, Decimal)):
+        return str(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps_bytes(value: Any) -> bytes:
+    """Serialize to compact JSON bytes with orjson."""
+    return orjson.dumps(value, default=_default, option=_OPTIONS)
+
+
+class OrjsonProvider(JSONProvider):
+    """
+    Flask JSON provider backed by orjson, used by `jsonify` and
+    `request.get_json`. Keys keep their insertion order.
+    """
+
+    mimetype = "application/json"
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return dumps_bytes(obj).decode("utf-8")
+
+    def loads(self, s, **kwargs: Any) -> Any:
+        return orjson.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        # Skip the bytes -> str -> bytes round trip of the base class
+        return self._app.response_class(dumps_bytes(obj), mimetype=self.mimetype)
+
+
+def model_projection(model: Type[BaseModel]) -> Dict[str, int]:
+    """Mongo projection returning exactly the model's fields."""
+    return {"_id": 0, **{name: 1 for name in model.model_fields}}
+
+
+def trusted_reader(model: Type[BaseModel]) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Build a function that turns a stored document, read with
+    `model_projection`, into the same dict as `model(**doc).dict()`,
+    without validation or copying. Optional fields missing from older
+    documents are filled in with their defaults.
+
+    A `model_validator` can derive fields that older documents lack, which
+    defaults alone cannot reproduce. Such a model must provide a
+    `complete_trusted(doc)` static method doing the same work on the raw
+    document; otherwise its documents are validated as usual.
+    """
+    if model.__pydantic_decorators__.model_validators:
+        complete = getattr(model, "complete_trusted", None)
+        if complete is None:
+            return lambda doc: model(**doc).dict()
+    else:
+        complete = None
+
+    defaults = {
+        name: field.get_default(call_default_factory=True)
+        for name, field in model.model_fields.items()
+        if not field.is_required()
+    }
+    if not defaults and complete is None:
+        return lambda doc: doc
+
+    def read(doc: Dict[str, Any]) -> Dict[str, Any]:
+        for name, value in defaults.items():
+            if name not in doc:
+                doc[name] = value
+        return complete(doc) if complete is not None else doc
+    return read